@@ -7,6 +7,7 @@
 #include "exec.h"
 #include "schema.h"
 #include "buffermgr.h"
+#include "swssrecorder.h"
 #include <fstream>
 #include <iostream>
 
@@ -27,8 +28,7 @@ using namespace swss;
 int gBatchSize = 0;
 bool gSwssRecord = false;
 bool gLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 /* Global database mutex */
 mutex gDbMutex;
 
@@ -9,6 +9,7 @@
 #include <fstream>
 #include <iostream>
 #include "warm_restart.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -27,8 +28,7 @@ using namespace swss;
 int gBatchSize = 0;
 bool gSwssRecord = false;
 bool gLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 /* Global database mutex */
 mutex gDbMutex;
 
@@ -32,6 +32,7 @@
 #include "natmgr.h"
 #include "shellcmd.h"
 #include "warm_restart.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -50,8 +51,7 @@ using namespace swss;
 int       gBatchSize = 0;
 bool      gSwssRecord = false;
 bool      gLogRotate = false;
-ofstream  gRecordOfs;
-string    gRecordFile;
+SwssRecorder gSwssRecorder;
 mutex     gDbMutex;
 NatMgr    *natmgr = NULL;
 
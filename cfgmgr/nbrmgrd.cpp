@@ -10,6 +10,7 @@
 #include "schema.h"
 #include "nbrmgr.h"
 #include "warm_restart.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -31,8 +32,7 @@ using namespace swss;
 int gBatchSize = 0;
 bool gSwssRecord = false;
 bool gLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 /* Global database mutex */
 mutex gDbMutex;
 
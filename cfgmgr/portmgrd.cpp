@@ -8,6 +8,7 @@
 #include "portmgr.h"
 #include "schema.h"
 #include "select.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -26,8 +27,7 @@ using namespace swss;
 int gBatchSize = 0;
 bool gSwssRecord = false;
 bool gLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 /* Global database mutex */
 mutex gDbMutex;
 
@@ -14,6 +14,7 @@
 #include "vlanmgr.h"
 #include "shellcmd.h"
 #include "warm_restart.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -34,8 +35,7 @@ MacAddress gMacAddress;
 int gBatchSize = 0;
 bool gSwssRecord = false;
 bool gLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 /* Global database mutex */
 mutex gDbMutex;
 
@@ -13,6 +13,7 @@
 #include "producerstatetable.h"
 #include "vxlanmgr.h"
 #include "shellcmd.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -31,8 +32,7 @@ using namespace swss;
 int gBatchSize = 0;
 bool gSwssRecord = false;
 bool gLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 /* Global database mutex */
 mutex gDbMutex;
 
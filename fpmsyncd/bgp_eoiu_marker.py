@@ -6,7 +6,9 @@ Description: bgp_eoiu_marker.py -- populating bgp eoiu marker flags in stateDB d
     It does not do anything in case neither system nor bgp warm restart is enabled.
 
     The script check bgp neighbor state via vtysh cli interface periodically (every 1 second).
-    It looks for explicit EOR and implicit EOR (keep alive after established) in the json output of show ip bgp neighbors A.B.C.D json
+    It looks for explicit EOR and implicit EOR (keep alive after established) in the json output of show bgp neighbors json.
+    The state of all neighbors is fetched with one vtysh call per check, falling back to
+    show bgp neighbors A.B.C.D json per neighbor if the bulk output can not be parsed.
 
     Once the script has collected all needed EORs, it set a EOIU flags in stateDB.
 
@@ -98,13 +100,16 @@ class BgpStateCheck():
         syslog.syslog('Cleaned ipv4 and ipv6 eoiu marker flags')
         return
 
-    def bgp_eor_received(self, neigh, is_ipv4):
+    # neig_status is the json output of "show bgp neighbors json", if it is not given
+    # the state of the neighbor is queried from vtysh.
+    def bgp_eor_received(self, neigh, is_ipv4, neig_status=None):
         try:
             neighstr = "%s" % neigh
             eor_received = False
-            cmd = "vtysh -c 'show bgp neighbors %s json'" % neighstr
-            output = commands.getoutput(cmd)
-            neig_status = json.loads(output)
+            if neig_status is None:
+                cmd = "vtysh -c 'show bgp neighbors %s json'" % neighstr
+                output = commands.getoutput(cmd)
+                neig_status = json.loads(output)
             if neighstr in neig_status:
                 if "gracefulRestartInfo" in neig_status[neighstr]:
                     if "endOfRibRecv" in neig_status[neighstr]["gracefulRestartInfo"]:
@@ -132,6 +137,17 @@ class BgpStateCheck():
         except Exception:
             syslog.syslog(syslog.LOG_ERR, "*ERROR* bgp_eor_received Exception: %s" % (traceback.format_exc()))
 
+    # Fetch the state of all bgp neighbors with a single vtysh call.
+    # Returns None if the output can not be parsed, so the caller can fall back to
+    # querying the neighbors one by one.
+    def get_all_neigh_status(self):
+        try:
+            cmd = "vtysh -c 'show bgp neighbors json'"
+            output = commands.getoutput(cmd)
+            return json.loads(output)
+        except Exception:
+            syslog.syslog(syslog.LOG_ERR, "*ERROR* get_all_neigh_status Exception: %s" % (traceback.format_exc()))
+            return None
 
     # This function is to collect eor state based on the saved ipv4_neigh_eor_status and ipv6_neigh_eor_status dictionaries
     # It iterates through the dictionary, and check whether the specific neighbor has EOR received.
@@ -142,26 +158,36 @@ class BgpStateCheck():
     # Once all ipv4 neighbors have EOR received, bgp_ipv4_eoiu becomes True.
     # Once all ipv6 neighbors have EOR received, bgp_ipv6_eoiu becomes True.
 
+    # The state of all neighbors is fetched once per check (get_all_neigh_status).
+    # The eoiu marker of a family is set in stateDB as soon as it is reached, without
+    # waiting for the other family.
+
     # The neighbor EoR states were checked in a loop with an interval (CHECK_INTERVAL)
     # The function will timeout in case eoiu states never meet the condition
     # after some time (DEF_TIME_OUT).
     def wait_for_bgp_eoiu(self):
         wait_time = self.DEF_TIME_OUT
         while wait_time >= 0:
+            neig_status = None
+            if not (self.bgp_ipv4_eoiu and self.bgp_ipv6_eoiu):
+                neig_status = self.get_all_neigh_status()
+
             if not self.bgp_ipv4_eoiu:
                 for neigh, eor_status in self.ipv4_neigh_eor_status.items():
-                    if eor_status == "unknown" and self.bgp_eor_received(neigh, True):
+                    if eor_status == "unknown" and self.bgp_eor_received(neigh, True, neig_status):
                         self.ipv4_neigh_eor_status[neigh] = "rcvd"
                 if "unknown" not in self.ipv4_neigh_eor_status.values():
                     self.bgp_ipv4_eoiu = True
+                    self.set_bgp_eoiu_marker("IPv4", "reached")
                     syslog.syslog("BGP ipv4 eoiu reached")
 
             if not self.bgp_ipv6_eoiu:
                 for neigh, eor_status in self.ipv6_neigh_eor_status.items():
-                    if eor_status == "unknown" and self.bgp_eor_received(neigh, False):
+                    if eor_status == "unknown" and self.bgp_eor_received(neigh, False, neig_status):
                         self.ipv6_neigh_eor_status[neigh] = "rcvd"
                 if "unknown" not in self.ipv6_neigh_eor_status.values():
                     self.bgp_ipv6_eoiu = True
+                    self.set_bgp_eoiu_marker("IPv6", "reached")
                     syslog.syslog('BGP ipv6 eoiu reached')
 
             if self.bgp_ipv6_eoiu and self.bgp_ipv4_eoiu:
@@ -208,12 +234,6 @@ def main():
         syslog.syslog(syslog.LOG_ERR, str(e))
         sys.exit(1)
 
-    # set statedb to signal other processes like fpmsynd
-    if bgp_state_check.bgp_ipv4_eoiu:
-        bgp_state_check.set_bgp_eoiu_marker("IPv4", "reached")
-    if bgp_state_check.bgp_ipv6_eoiu:
-        bgp_state_check.set_bgp_eoiu_marker("IPv6", "reached")
-
     print "bgp_eoiu_marker service is done"
     return
 
@@ -0,0 +1,250 @@
+#include <arpa/inet.h>
+#include <assert.h>
+#include <getopt.h>
+#include <string.h>
+#include <unistd.h>
+
+#include <chrono>
+#include <fstream>
+#include <iostream>
+#include <iterator>
+#include <string>
+#include <vector>
+
+#include "fpm/fpm.h"
+#include "fpmsyncd/fpmdecoder.h"
+
+using namespace std;
+using namespace swss;
+
+/*
+ * Replay an FPM stream through the in place decoder and through libnl, the way
+ * fpmsyncd did before, and compare their speed and their output. The stream is the
+ * raw TCP payload sent by zebra to fpmsyncd, which can be captured with e.g.
+ * "tcpflow -i lo port 2620", or generated with -g.
+ */
+
+#define DEFAULT_ITERATIONS 10
+
+/* Next hops of the generated routes */
+#define GENERATED_OIF_BASE 100
+
+static void usage()
+{
+    cout << "Usage: fpmbench [-n ITERATIONS] FILE" << endl;
+    cout << "       fpmbench -g ROUTES [-e ECMP] FILE" << endl;
+    cout << "       Replay the FPM stream in FILE, or generate a stream of ROUTES IPv4 routes" << endl;
+    cout << "       with ECMP next hops each into FILE" << endl;
+}
+
+/* Get the netlink messages of an FPM stream */
+static bool splitStream(vector<char> &stream, vector<struct nlmsghdr *> &msgs)
+{
+    size_t pos = 0;
+    while (stream.size() - pos >= FPM_MSG_HDR_LEN)
+    {
+        auto *hdr = reinterpret_cast<fpm_msg_hdr_t *>(&stream[pos]);
+        size_t msg_len = fpm_msg_len(hdr);
+        if (!fpm_msg_ok(hdr, stream.size() - pos))
+        {
+            cerr << "Malformed FPM message at offset " << pos << endl;
+            return false;
+        }
+
+        if (hdr->msg_type == FPM_MSG_TYPE_NETLINK)
+        {
+            msgs.push_back(static_cast<struct nlmsghdr *>(fpm_msg_data(hdr)));
+        }
+        pos += msg_len;
+    }
+
+    return true;
+}
+
+static bool sameRoute(const RouteMsg &a, const RouteMsg &b)
+{
+    return a.nlmsg_type == b.nlmsg_type && a.family == b.family && a.type == b.type &&
+           a.table == b.table && !strcmp(a.dst, b.dst) && a.gateways == b.gateways &&
+           a.ifindexes == b.ifindexes;
+}
+
+static void addAttr(vector<char> &msg, unsigned short type, const void *data, size_t len)
+{
+    struct rtattr rta;
+    rta.rta_type = type;
+    rta.rta_len = (unsigned short)RTA_LENGTH(len);
+
+    msg.insert(msg.end(), (char *)&rta, (char *)&rta + sizeof(rta));
+    msg.insert(msg.end(), (const char *)data, (const char *)data + len);
+    msg.resize(NLMSG_ALIGN(msg.size()));
+}
+
+static void generate(ofstream &out, int routes, int ecmp)
+{
+    for (int i = 0; i < routes; i++)
+    {
+        vector<char> msg(NLMSG_LENGTH(sizeof(struct rtmsg)));
+
+        auto *rtm = static_cast<struct rtmsg *>(NLMSG_DATA((struct nlmsghdr *)msg.data()));
+        rtm->rtm_family = AF_INET;
+        rtm->rtm_dst_len = 24;
+        rtm->rtm_protocol = RTPROT_ZEBRA;
+        rtm->rtm_scope = RT_SCOPE_UNIVERSE;
+        rtm->rtm_type = RTN_UNICAST;
+
+        uint32_t dst = htonl(0x64000000 + ((uint32_t)i << 8));
+        addAttr(msg, RTA_DST, &dst, sizeof(dst));
+
+        vector<char> multipath;
+        for (int j = 0; j < ecmp; j++)
+        {
+            struct rtnexthop rtnh = {};
+            rtnh.rtnh_len = (unsigned short)(RTNH_LENGTH(RTA_LENGTH(sizeof(uint32_t))));
+            rtnh.rtnh_ifindex = GENERATED_OIF_BASE + j;
+
+            uint32_t gateway = htonl(0x0a000001 + (uint32_t)(j << 8));
+            struct rtattr rta;
+            rta.rta_type = RTA_GATEWAY;
+            rta.rta_len = (unsigned short)RTA_LENGTH(sizeof(gateway));
+
+            multipath.insert(multipath.end(), (char *)&rtnh, (char *)&rtnh + sizeof(rtnh));
+            multipath.insert(multipath.end(), (char *)&rta, (char *)&rta + sizeof(rta));
+            multipath.insert(multipath.end(), (char *)&gateway, (char *)&gateway + sizeof(gateway));
+        }
+        addAttr(msg, RTA_MULTIPATH, multipath.data(), multipath.size());
+
+        auto *h = (struct nlmsghdr *)msg.data();
+        h->nlmsg_len = (uint32_t)msg.size();
+        h->nlmsg_type = RTM_NEWROUTE;
+        h->nlmsg_flags = NLM_F_REQUEST | NLM_F_CREATE | NLM_F_REPLACE;
+
+        fpm_msg_hdr_t hdr;
+        hdr.version = FPM_PROTO_VERSION;
+        hdr.msg_type = FPM_MSG_TYPE_NETLINK;
+        hdr.msg_len = htons((uint16_t)(FPM_MSG_HDR_LEN + msg.size()));
+
+        out.write((char *)&hdr, sizeof(hdr));
+        out.write(msg.data(), msg.size());
+    }
+}
+
+template <typename Decode>
+static double run(const vector<struct nlmsghdr *> &msgs, int iterations, vector<RouteMsg> &routes, Decode decode)
+{
+    RouteMsg route;
+    size_t failed = 0;
+
+    auto start = chrono::steady_clock::now();
+    for (int i = 0; i < iterations; i++)
+    {
+        for (auto *h : msgs)
+        {
+            if (!decode(h, route))
+            {
+                failed++;
+            }
+        }
+    }
+    double elapsed = chrono::duration<double>(chrono::steady_clock::now() - start).count();
+
+    if (failed)
+    {
+        cerr << failed / iterations << " messages could not be decoded" << endl;
+    }
+
+    /* Keep the results of one pass to compare the decoders */
+    for (auto *h : msgs)
+    {
+        decode(h, route);
+        routes.push_back(route);
+    }
+
+    return elapsed;
+}
+
+int main(int argc, char **argv)
+{
+    int iterations = DEFAULT_ITERATIONS;
+    int generated = 0;
+    int ecmp = 1;
+    int opt;
+
+    while ((opt = getopt(argc, argv, "n:g:e:h")) != -1)
+    {
+        switch (opt)
+        {
+            case 'n':
+                iterations = atoi(optarg);
+                break;
+            case 'g':
+                generated = atoi(optarg);
+                break;
+            case 'e':
+                ecmp = atoi(optarg);
+                break;
+            case 'h':
+                usage();
+                return EXIT_SUCCESS;
+            default:
+                usage();
+                return EXIT_FAILURE;
+        }
+    }
+
+    if (optind != argc - 1 || iterations <= 0 || ecmp <= 0 || generated < 0)
+    {
+        usage();
+        return EXIT_FAILURE;
+    }
+
+    if (generated)
+    {
+        ofstream out(argv[optind], ofstream::binary);
+        if (!out.is_open())
+        {
+            cerr << "Failed to open " << argv[optind] << endl;
+            return EXIT_FAILURE;
+        }
+        generate(out, generated, ecmp);
+        return EXIT_SUCCESS;
+    }
+
+    ifstream in(argv[optind], ifstream::binary);
+    if (!in.is_open())
+    {
+        cerr << "Failed to open " << argv[optind] << endl;
+        return EXIT_FAILURE;
+    }
+    vector<char> stream((istreambuf_iterator<char>(in)), istreambuf_iterator<char>());
+
+    vector<struct nlmsghdr *> msgs;
+    if (!splitStream(stream, msgs))
+    {
+        return EXIT_FAILURE;
+    }
+
+    vector<RouteMsg> libnlRoutes, rawRoutes;
+    double libnl = run(msgs, iterations, libnlRoutes, parseRouteMsg);
+    double raw = run(msgs, iterations, rawRoutes, decodeRouteMsg);
+
+    size_t mismatches = 0;
+    for (size_t i = 0; i < msgs.size(); i++)
+    {
+        if (!sameRoute(libnlRoutes[i], rawRoutes[i]))
+        {
+            if (mismatches++ < 10)
+            {
+                cerr << "Mismatch: libnl " << libnlRoutes[i].dst << " " << libnlRoutes[i].gateways
+                     << ", decoder " << rawRoutes[i].dst << " " << rawRoutes[i].gateways << endl;
+            }
+        }
+    }
+
+    double count = (double)msgs.size() * iterations;
+    cout << msgs.size() << " messages, " << iterations << " iterations" << endl;
+    cout << "libnl:   " << libnl << " s, " << (uint64_t)(count / libnl) << " messages/s" << endl;
+    cout << "decoder: " << raw << " s, " << (uint64_t)(count / raw) << " messages/s" << endl;
+    cout << mismatches << " mismatches" << endl;
+
+    return mismatches ? EXIT_FAILURE : EXIT_SUCCESS;
+}
@@ -0,0 +1,256 @@
+#include <stdio.h>
+#include <string.h>
+#include <netlink/msg.h>
+#include <netlink/route/nexthop.h>
+#include "fpmsyncd/fpmdecoder.h"
+
+using namespace std;
+using namespace swss;
+
+static size_t addrLen(unsigned char family)
+{
+    return family == AF_INET ? sizeof(struct in_addr) : sizeof(struct in6_addr);
+}
+
+/* Format a destination prefix like nl_addr2str() */
+static void formatPrefix(unsigned char family, const void *addr, unsigned char prefixlen, char *buf, size_t size)
+{
+    /* libnl gives an empty address to a route without RTA_DST */
+    size_t len = addr ? addrLen(family) : 0;
+
+    if (addr)
+    {
+        inet_ntop(family, addr, buf, (socklen_t)size);
+    }
+    else
+    {
+        snprintf(buf, size, "none");
+    }
+
+    if (prefixlen != 8 * len)
+    {
+        size_t pos = strlen(buf);
+        snprintf(buf + pos, size - pos, "/%u", prefixlen);
+    }
+}
+
+struct ParseContext
+{
+    int nlmsg_type;
+    RouteMsg *route;
+    bool parsed;
+};
+
+static void parseCallback(struct nl_object *obj, void *arg)
+{
+    auto *ctx = static_cast<ParseContext *>(arg);
+    convertRouteMsg(ctx->nlmsg_type, (struct rtnl_route *)obj, *ctx->route);
+    ctx->parsed = true;
+}
+
+static bool addNextHop(RouteMsg &route, const struct rtattr *gateway, int ifindex)
+{
+    char buf[INET6_ADDRSTRLEN];
+
+    if (!route.ifindexes.empty())
+    {
+        route.gateways += ',';
+    }
+
+    if (gateway)
+    {
+        if (RTA_PAYLOAD(gateway) != addrLen(route.family))
+        {
+            return false;
+        }
+        inet_ntop(route.family, RTA_DATA(gateway), buf, sizeof(buf));
+        route.gateways += buf;
+    }
+    else
+    {
+        route.gateways += route.family == AF_INET ? "0.0.0.0" : "::";
+    }
+
+    route.ifindexes.push_back(ifindex);
+    return true;
+}
+
+static bool decodeMultipath(RouteMsg &route, struct rtattr *multipath)
+{
+    auto *rtnh = static_cast<struct rtnexthop *>(RTA_DATA(multipath));
+    int len = (int)RTA_PAYLOAD(multipath);
+
+    while (RTNH_OK(rtnh, len))
+    {
+        struct rtattr *gateway = NULL;
+        int attrlen = rtnh->rtnh_len - (int)sizeof(*rtnh);
+
+        for (auto *rta = RTNH_DATA(rtnh); RTA_OK(rta, attrlen); rta = RTA_NEXT(rta, attrlen))
+        {
+            if (rta->rta_type == RTA_GATEWAY)
+            {
+                gateway = rta;
+            }
+        }
+
+        if (!addNextHop(route, gateway, rtnh->rtnh_ifindex))
+        {
+            return false;
+        }
+
+        len -= RTNH_ALIGN(rtnh->rtnh_len);
+        rtnh = RTNH_NEXT(rtnh);
+    }
+
+    return true;
+}
+
+bool swss::decodeRouteMsg(struct nlmsghdr *h, RouteMsg &route)
+{
+    if (h->nlmsg_type != RTM_NEWROUTE && h->nlmsg_type != RTM_DELROUTE)
+    {
+        return false;
+    }
+
+    if (h->nlmsg_len < NLMSG_LENGTH(sizeof(struct rtmsg)))
+    {
+        return false;
+    }
+
+    auto *rtm = static_cast<struct rtmsg *>(NLMSG_DATA(h));
+
+    route.nlmsg_type = h->nlmsg_type;
+    route.family = rtm->rtm_family;
+    route.type = rtm->rtm_type;
+    route.table = rtm->rtm_table;
+    route.dst[0] = '\0';
+    route.gateways.clear();
+    route.ifindexes.clear();
+
+    /* The caller ignores the other families, no need to look at their addresses */
+    if (route.family != AF_INET && route.family != AF_INET6)
+    {
+        return true;
+    }
+
+    struct rtattr *dst = NULL;
+    struct rtattr *gateway = NULL;
+    struct rtattr *multipath = NULL;
+    int oif = 0;
+
+    int len = (int)RTM_PAYLOAD(h);
+    for (auto *rta = RTM_RTA(rtm); RTA_OK(rta, len); rta = RTA_NEXT(rta, len))
+    {
+        switch (rta->rta_type)
+        {
+            case RTA_DST:
+                dst = rta;
+                break;
+            case RTA_GATEWAY:
+                gateway = rta;
+                break;
+            case RTA_OIF:
+                if (RTA_PAYLOAD(rta) < sizeof(int))
+                {
+                    return false;
+                }
+                oif = *static_cast<int *>(RTA_DATA(rta));
+                break;
+            case RTA_MULTIPATH:
+                multipath = rta;
+                break;
+            case RTA_TABLE:
+                if (RTA_PAYLOAD(rta) < sizeof(uint32_t))
+                {
+                    return false;
+                }
+                route.table = *static_cast<uint32_t *>(RTA_DATA(rta));
+                break;
+            default:
+                break;
+        }
+    }
+
+    if (dst && RTA_PAYLOAD(dst) != addrLen(route.family))
+    {
+        return false;
+    }
+    formatPrefix(route.family, dst ? RTA_DATA(dst) : NULL, rtm->rtm_dst_len, route.dst, sizeof(route.dst));
+
+    /* Like libnl, RTA_GATEWAY and RTA_OIF are only used when there is no RTA_MULTIPATH */
+    if (multipath)
+    {
+        return decodeMultipath(route, multipath);
+    }
+
+    if (gateway || oif)
+    {
+        return addNextHop(route, gateway, oif);
+    }
+
+    return true;
+}
+
+void swss::convertRouteMsg(int nlmsg_type, struct rtnl_route *route_obj, RouteMsg &route)
+{
+    route.nlmsg_type = nlmsg_type;
+    route.family = (unsigned char)rtnl_route_get_family(route_obj);
+    route.type = rtnl_route_get_type(route_obj);
+    route.table = rtnl_route_get_table(route_obj);
+    route.dst[0] = '\0';
+    route.gateways.clear();
+    route.ifindexes.clear();
+
+    if (route.family != AF_INET && route.family != AF_INET6)
+    {
+        return;
+    }
+
+    nl_addr2str(rtnl_route_get_dst(route_obj), route.dst, sizeof(route.dst));
+
+    for (int i = 0; i < rtnl_route_get_nnexthops(route_obj); i++)
+    {
+        struct rtnl_nexthop *nexthop = rtnl_route_nexthop_n(route_obj, i);
+        struct nl_addr *addr = rtnl_route_nh_get_gateway(nexthop);
+
+        if (i)
+        {
+            route.gateways += ',';
+        }
+
+        /* Next hop gateway is not empty */
+        if (addr)
+        {
+            char gw_ip[INET6_ADDRSTRLEN + 5] = {0};
+            nl_addr2str(addr, gw_ip, sizeof(gw_ip));
+            route.gateways += gw_ip;
+        }
+        else
+        {
+            route.gateways += route.family == AF_INET ? "0.0.0.0" : "::";
+        }
+
+        route.ifindexes.push_back(rtnl_route_nh_get_ifindex(nexthop));
+    }
+}
+
+bool swss::parseRouteMsg(struct nlmsghdr *h, RouteMsg &route)
+{
+    if (h->nlmsg_type != RTM_NEWROUTE && h->nlmsg_type != RTM_DELROUTE)
+    {
+        return false;
+    }
+
+    nl_msg *msg = nlmsg_convert(h);
+    if (msg == NULL)
+    {
+        return false;
+    }
+
+    ParseContext ctx = { h->nlmsg_type, &route, false };
+    nlmsg_set_proto(msg, NETLINK_ROUTE);
+    int err = nl_msg_parse(msg, parseCallback, &ctx);
+    nlmsg_free(msg);
+
+    return err == 0 && ctx.parsed;
+}
@@ -0,0 +1,55 @@
+#ifndef __FPMDECODER__
+#define __FPMDECODER__
+
+#include <arpa/inet.h>
+#include <linux/netlink.h>
+#include <linux/rtnetlink.h>
+#include <netlink/route/route.h>
+
+#include <string>
+#include <vector>
+
+namespace swss {
+
+/*
+ * Route decoded from a RTM_NEWROUTE/RTM_DELROUTE netlink message.
+ *
+ * The strings are formatted the same way as libnl's nl_addr2str(), so routes decoded
+ * here and routes parsed by libnl are written identically to APPL_DB. A RouteMsg is
+ * meant to be reused from one message to the next, so that decoding a route doesn't
+ * allocate once the buffers have grown.
+ */
+struct RouteMsg
+{
+    int nlmsg_type;
+    unsigned char family;
+    /* RTN_UNICAST, RTN_BLACKHOLE, ... */
+    unsigned char type;
+    /* Routing table, i.e. the ifindex of the VRF master device, 0 for the default VRF */
+    unsigned int table;
+    /* Destination prefix, without the prefix length for host routes */
+    char dst[INET6_ADDRSTRLEN + 5];
+    /* Gateways separated by commas, "0.0.0.0" or "::" for a next hop without gateway */
+    std::string gateways;
+    /* Interface index of each next hop */
+    std::vector<int> ifindexes;
+};
+
+/*
+ * Decode a route message in place, walking its rtattrs without converting it to a
+ * libnl object. Returns false if the message is not a route message or is malformed.
+ */
+bool decodeRouteMsg(struct nlmsghdr *h, RouteMsg &route);
+
+/* Get the same fields from a route parsed by libnl */
+void convertRouteMsg(int nlmsg_type, struct rtnl_route *route_obj, RouteMsg &route);
+
+/*
+ * Decode a route message with libnl, for the messages decodeRouteMsg() doesn't handle.
+ * Returns false if libnl couldn't parse a route from the message.
+ */
+bool parseRouteMsg(struct nlmsghdr *h, RouteMsg &route);
+
+}
+
+#endif
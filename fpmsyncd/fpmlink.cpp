@@ -9,32 +9,27 @@
 using namespace swss;
 using namespace std;
 
-FpmLink::FpmLink(unsigned short port) :
-    MSG_BATCH_SIZE(256),
-    m_bufSize(FPM_MAX_MSG_LEN * MSG_BATCH_SIZE),
-    m_messageBuffer(NULL),
-    m_pos(0),
-    m_connected(false),
-    m_server_up(false)
+int FpmLink::openServerSocket(unsigned short port, int backlog)
 {
     struct sockaddr_in addr;
     int true_val = 1;
+    int server_socket;
 
-    m_server_socket = socket(PF_INET, SOCK_STREAM, IPPROTO_TCP);
-    if (m_server_socket < 0)
+    server_socket = socket(PF_INET, SOCK_STREAM, IPPROTO_TCP);
+    if (server_socket < 0)
         throw system_error(errno, system_category());
 
-    if (setsockopt(m_server_socket, SOL_SOCKET, SO_REUSEADDR, &true_val,
+    if (setsockopt(server_socket, SOL_SOCKET, SO_REUSEADDR, &true_val,
                    sizeof(true_val)) < 0)
     {
-        close(m_server_socket);
+        close(server_socket);
         throw system_error(errno, system_category());
     }
 
-    if (setsockopt(m_server_socket, SOL_SOCKET, SO_KEEPALIVE, &true_val,
+    if (setsockopt(server_socket, SOL_SOCKET, SO_KEEPALIVE, &true_val,
                    sizeof(true_val)) < 0)
     {
-        close(m_server_socket);
+        close(server_socket);
         throw system_error(errno, system_category());
     }
 
@@ -43,18 +38,32 @@ FpmLink::FpmLink(unsigned short port) :
     addr.sin_port = htons(port);
     addr.sin_addr.s_addr = htonl(INADDR_LOOPBACK);
 
-    if (bind(m_server_socket, (struct sockaddr *)&addr, sizeof(addr)) < 0)
+    if (bind(server_socket, (struct sockaddr *)&addr, sizeof(addr)) < 0)
     {
-        close(m_server_socket);
+        close(server_socket);
         throw system_error(errno, system_category());
     }
 
-    if (listen(m_server_socket, 2) != 0)
+    if (listen(server_socket, backlog) != 0)
     {
-        close(m_server_socket);
+        close(server_socket);
         throw system_error(errno, system_category());
     }
 
+    return server_socket;
+}
+
+FpmLink::FpmLink(RouteSync *rsync, unsigned short port) :
+    MSG_BATCH_SIZE(256),
+    m_routesync(rsync),
+    m_bufSize(FPM_MAX_MSG_LEN * MSG_BATCH_SIZE),
+    m_messageBuffer(NULL),
+    m_pos(0),
+    m_connected(false),
+    m_server_up(false)
+{
+    m_server_socket = openServerSocket(port, 2);
+
     m_server_up = true;
     m_messageBuffer = new char[m_bufSize];
 }
@@ -91,9 +100,7 @@ int FpmLink::getFd()
 
 uint64_t FpmLink::readData()
 {
-    fpm_msg_hdr_t *hdr;
-    size_t msg_len;
-    size_t start = 0, left;
+    size_t start;
     ssize_t read;
 
     read = ::read(m_connection_socket, m_messageBuffer + m_pos, m_bufSize - m_pos);
@@ -103,33 +110,19 @@ uint64_t FpmLink::readData()
         throw system_error(errno, system_category());
     m_pos+= (uint32_t)read;
 
-    /* Check for complete messages */
-    while (true)
-    {
-        hdr = reinterpret_cast<fpm_msg_hdr_t *>(static_cast<void *>(m_messageBuffer + start));
-        left = m_pos - start;
-        if (left < FPM_MSG_HDR_LEN)
-            break;
-        /* fpm_msg_len includes header size */
-        msg_len = fpm_msg_len(hdr);
-        if (left < msg_len)
-            break;
-
-        if (!fpm_msg_ok(hdr, left))
-            throw system_error(make_error_code(errc::bad_message), "Malformed FPM message received");
-
-        if (hdr->msg_type == FPM_MSG_TYPE_NETLINK)
-        {
-            nl_msg *msg = nlmsg_convert((nlmsghdr *)fpm_msg_data(hdr));
-            if (msg == NULL)
-                throw system_error(make_error_code(errc::bad_message), "Unable to convert nlmsg");
-
-            nlmsg_set_proto(msg, NETLINK_ROUTE);
-            NetDispatcher::getInstance().onNetlinkMessage(msg);
-            nlmsg_free(msg);
-        }
-        start += msg_len;
-    }
+    start = forEachMessage(m_messageBuffer, m_pos, [this](nlmsghdr *nl_hdr) {
+        /* Route messages are decoded in place, without copying them to a libnl object */
+        if (m_routesync->onMsgRaw(nl_hdr))
+            return;
+
+        nl_msg *msg = nlmsg_convert(nl_hdr);
+        if (msg == NULL)
+            throw system_error(make_error_code(errc::bad_message), "Unable to convert nlmsg");
+
+        nlmsg_set_proto(msg, NETLINK_ROUTE);
+        NetDispatcher::getInstance().onNetlinkMessage(msg);
+        nlmsg_free(msg);
+    });
 
     memmove(m_messageBuffer, m_messageBuffer + start, m_pos - start);
     m_pos = m_pos - (uint32_t)start;
@@ -10,18 +10,30 @@
 #include <assert.h>
 #include <unistd.h>
 #include <exception>
+#include <system_error>
 
 #include "selectable.h"
 #include "fpm/fpm.h"
+#include "fpmsyncd/routesync.h"
 
 namespace swss {
 
 class FpmLink : public Selectable {
 public:
     const int MSG_BATCH_SIZE;
-    FpmLink(unsigned short port = FPM_DEFAULT_PORT);
+    FpmLink(RouteSync *rsync, unsigned short port = FPM_DEFAULT_PORT);
     virtual ~FpmLink();
 
+    /* Open the socket the FPM clients connect to, listening on the loopback address */
+    static int openServerSocket(unsigned short port, int backlog);
+
+    /*
+     * Call handler with the netlink message of each complete FPM message in buf,
+     * and return the number of bytes used. Throws if a message is malformed.
+     */
+    template <typename Handler>
+    static size_t forEachMessage(char *buf, size_t len, Handler handler);
+
     /* Wait for connection (blocking) */
     void accept();
 
@@ -33,6 +45,7 @@ public:
     };
 
 private:
+    RouteSync *m_routesync;
     unsigned int m_bufSize;
     char *m_messageBuffer;
     unsigned int m_pos;
@@ -43,6 +56,42 @@ private:
     int m_connection_socket;
 };
 
+template <typename Handler>
+size_t FpmLink::forEachMessage(char *buf, size_t len, Handler handler)
+{
+    fpm_msg_hdr_t *hdr;
+    size_t msg_len;
+    size_t start = 0, left;
+
+    /* Check for complete messages */
+    while (true)
+    {
+        hdr = reinterpret_cast<fpm_msg_hdr_t *>(static_cast<void *>(buf + start));
+        left = len - start;
+        if (left < FPM_MSG_HDR_LEN)
+            break;
+        /* fpm_msg_len includes header size */
+        msg_len = fpm_msg_len(hdr);
+        if (left < msg_len)
+            break;
+
+        if (!fpm_msg_ok(hdr, left))
+            throw std::system_error(make_error_code(std::errc::bad_message), "Malformed FPM message received");
+
+        if (hdr->msg_type == FPM_MSG_TYPE_NETLINK)
+        {
+            nlmsghdr *nl_hdr = (nlmsghdr *)fpm_msg_data(hdr);
+            if (nl_hdr->nlmsg_len > msg_len - FPM_MSG_HDR_LEN)
+                throw std::system_error(make_error_code(std::errc::bad_message), "Malformed netlink message received");
+
+            handler(nl_hdr);
+        }
+        start += msg_len;
+    }
+
+    return start;
+}
+
 }
 
 #endif
@@ -0,0 +1,205 @@
+#include <arpa/inet.h>
+#include <sys/socket.h>
+#include <string.h>
+#include <errno.h>
+#include <unistd.h>
+#include <system_error>
+#include "logger.h"
+#include "fpmsyncd/fpmlink.h"
+#include "fpmsyncd/fpmserver.h"
+
+using namespace std;
+using namespace swss;
+
+FpmServer::FpmServer(RouteQueue *queue, size_t maxConnections, unsigned short port) :
+    MSG_BATCH_SIZE(256),
+    m_queue(queue),
+    m_maxConnections(maxConnections),
+    m_bufSize(FPM_MAX_MSG_LEN * MSG_BATCH_SIZE)
+{
+    m_server_socket = FpmLink::openServerSocket(port, (int)maxConnections + 1);
+}
+
+FpmServer::~FpmServer()
+{
+    stop();
+    close(m_server_socket);
+}
+
+void FpmServer::start()
+{
+    m_running = true;
+    m_acceptor = thread(&FpmServer::acceptConnections, this);
+}
+
+void FpmServer::stop()
+{
+    if (!m_running.exchange(false))
+    {
+        return;
+    }
+
+    /* Wake up accept(), the readers blocked in read() and the ones waiting for the queue */
+    shutdown(m_server_socket, SHUT_RDWR);
+    m_acceptor.join();
+
+    m_queue->close();
+
+    lock_guard<mutex> lock(m_mutex);
+    for (auto &conn : m_connections)
+    {
+        shutdown(conn->socket, SHUT_RDWR);
+    }
+    for (auto &conn : m_connections)
+    {
+        conn->reader.join();
+        close(conn->socket);
+    }
+    m_connections.clear();
+}
+
+void FpmServer::acceptConnections()
+{
+    while (m_running)
+    {
+        struct sockaddr_in client_addr;
+        socklen_t client_len = sizeof(struct sockaddr_in);
+
+        int connection_socket = ::accept(m_server_socket, (struct sockaddr *)&client_addr, &client_len);
+        if (connection_socket < 0)
+        {
+            if (errno == EINTR || errno == ECONNABORTED)
+            {
+                continue;
+            }
+            if (m_running)
+            {
+                SWSS_LOG_ERROR("Failed to accept FPM connections: %s", strerror(errno));
+            }
+            return;
+        }
+
+        lock_guard<mutex> lock(m_mutex);
+        reapConnections();
+
+        string peer = inet_ntoa(client_addr.sin_addr);
+        if (m_connections.size() >= m_maxConnections)
+        {
+            SWSS_LOG_ERROR("Refused connection from %s, %zu FPM connections already open",
+                           peer.c_str(), m_connections.size());
+            close(connection_socket);
+            m_refused++;
+            continue;
+        }
+
+        SWSS_LOG_NOTICE("New connection accepted from: %s", peer.c_str());
+        m_accepted++;
+
+        auto *conn = new Connection();
+        conn->socket = connection_socket;
+        conn->peer = peer;
+        m_connections.emplace_back(conn);
+        conn->reader = thread(&FpmServer::readConnection, this, conn);
+    }
+}
+
+void FpmServer::readConnection(Connection *conn)
+{
+    vector<char> buffer(m_bufSize);
+    size_t pos = 0;
+    uint64_t messages = 0, undecoded = 0;
+    auto batch = m_queue->getBatch();
+
+    while (m_running)
+    {
+        ssize_t read = ::read(conn->socket, buffer.data() + pos, m_bufSize - pos);
+        if (read == 0)
+        {
+            SWSS_LOG_NOTICE("Connection from %s closed", conn->peer.c_str());
+            break;
+        }
+        if (read < 0)
+        {
+            if (errno == EINTR)
+            {
+                continue;
+            }
+            SWSS_LOG_ERROR("Failed to read from %s: %s", conn->peer.c_str(), strerror(errno));
+            break;
+        }
+        pos += (size_t)read;
+
+        size_t start;
+        try
+        {
+            start = FpmLink::forEachMessage(buffer.data(), pos, [&](nlmsghdr *nl_hdr) {
+                messages++;
+
+                RouteMsg &route = batch->next();
+                if (!decodeRouteMsg(nl_hdr, route) && !parseRouteMsg(nl_hdr, route))
+                {
+                    /* Not a route, or nothing libnl can make sense of either */
+                    batch->count--;
+                    undecoded++;
+                }
+            });
+        }
+        catch (const exception &e)
+        {
+            SWSS_LOG_ERROR("Closing connection from %s: %s", conn->peer.c_str(), e.what());
+            break;
+        }
+
+        memmove(buffer.data(), buffer.data() + start, pos - start);
+        pos -= start;
+
+        m_messages += messages;
+        m_undecoded += undecoded;
+        messages = undecoded = 0;
+
+        if (batch->count)
+        {
+            if (!m_queue->push(move(batch)))
+            {
+                break;
+            }
+            batch = m_queue->getBatch();
+        }
+    }
+
+    /* The socket is closed once the thread is joined */
+    conn->done = true;
+}
+
+void FpmServer::reapConnections()
+{
+    for (auto it = m_connections.begin(); it != m_connections.end();)
+    {
+        auto &conn = *it;
+        if (!conn->done)
+        {
+            it++;
+            continue;
+        }
+
+        conn->reader.join();
+        close(conn->socket);
+        it = m_connections.erase(it);
+    }
+}
+
+void FpmServer::dump(vector<FieldValueTuple> &fvs)
+{
+    size_t active;
+    {
+        lock_guard<mutex> lock(m_mutex);
+        reapConnections();
+        active = m_connections.size();
+    }
+
+    fvs.emplace_back("connections", to_string(active));
+    fvs.emplace_back("accepted", to_string(m_accepted));
+    fvs.emplace_back("refused", to_string(m_refused));
+    fvs.emplace_back("messages", to_string(m_messages));
+    fvs.emplace_back("undecoded", to_string(m_undecoded));
+}
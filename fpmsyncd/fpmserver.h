@@ -0,0 +1,76 @@
+#ifndef __FPMSERVER__
+#define __FPMSERVER__
+
+#include <atomic>
+#include <list>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "table.h"
+#include "fpm/fpm.h"
+#include "fpmsyncd/routequeue.h"
+
+namespace swss {
+
+/*
+ * Threaded FPM ingestion: accept up to maxConnections FPM clients, e.g. one zebra per
+ * VRF or namespace, and read each of them on its own thread.
+ *
+ * The reader threads decode the route messages into RouteBatches and push them to the
+ * RouteQueue, so that reading the sockets and decoding overlap with the redis writes
+ * done by the main thread. The routes of a connection are handed over in the order
+ * they were received.
+ */
+class FpmServer
+{
+public:
+    const int MSG_BATCH_SIZE;
+
+    FpmServer(RouteQueue *queue, size_t maxConnections, unsigned short port = FPM_DEFAULT_PORT);
+    ~FpmServer();
+
+    /* Start accepting connections on a thread of its own */
+    void start();
+    /* Close all the connections and stop the threads */
+    void stop();
+
+    /* Counters since fpmsyncd started */
+    void dump(std::vector<FieldValueTuple> &fvs);
+
+private:
+    struct Connection
+    {
+        int socket;
+        std::string peer;
+        std::thread reader;
+        std::atomic<bool> done{false};
+    };
+
+    RouteQueue *m_queue;
+    size_t m_maxConnections;
+    unsigned int m_bufSize;
+    int m_server_socket;
+
+    std::atomic<bool> m_running{false};
+    std::thread m_acceptor;
+
+    std::mutex m_mutex;
+    std::list<std::unique_ptr<Connection>> m_connections;
+
+    std::atomic<uint64_t> m_accepted{0};
+    std::atomic<uint64_t> m_refused{0};
+    std::atomic<uint64_t> m_messages{0};
+    std::atomic<uint64_t> m_undecoded{0};
+
+    void acceptConnections();
+    void readConnection(Connection *conn);
+    /* Join the readers of the closed connections, with m_mutex held */
+    void reapConnections();
+};
+
+}
+
+#endif
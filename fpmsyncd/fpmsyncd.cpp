@@ -1,11 +1,16 @@
+#include <getopt.h>
 #include <iostream>
 #include <inttypes.h>
+#include <memory>
 #include "logger.h"
 #include "select.h"
 #include "selectabletimer.h"
 #include "netdispatcher.h"
+#include "netlink.h"
 #include "warmRestartHelper.h"
 #include "fpmsyncd/fpmlink.h"
+#include "fpmsyncd/fpmserver.h"
+#include "fpmsyncd/routequeue.h"
 #include "fpmsyncd/routesync.h"
 
 
@@ -23,6 +28,46 @@ const uint32_t DEFAULT_ROUTING_RESTART_INTERVAL = 120;
 // TODO: support eoiu hold interval config
 const uint32_t DEFAULT_EOIU_HOLD_INTERVAL = 3;
 
+/* Route coalescing is disabled unless a window is given with -w */
+const size_t DEFAULT_COALESCING_MAX_ROUTES = 10000;
+
+/* Interval at which the coalescing and interface name counters are written to COUNTERS_DB, in seconds */
+const time_t ROUTE_STATS_INTERVAL = 10;
+#define ROUTE_STATS_TABLE "FPMSYNCD_ROUTE_STATS"
+#define IFNAME_CACHE_STATS_KEY "IFNAME_CACHE"
+#define FPM_INGEST_STATS_KEY "FPM_INGEST"
+
+void usage()
+{
+    cout << "Usage: fpmsyncd [-w window_ms] [-s max_routes] [-t max_connections]" << endl;
+    cout << "       -w window_ms: coalesce the updates of a prefix received within window_ms" << endl;
+    cout << "                     milliseconds, only writing the last one (default: disabled)" << endl;
+    cout << "       -s max_routes: write the coalesced updates as soon as max_routes prefixes" << endl;
+    cout << "                      are pending (default: " << DEFAULT_COALESCING_MAX_ROUTES << ")" << endl;
+    cout << "       -t max_connections: accept up to max_connections FPM clients, reading and" << endl;
+    cout << "                           decoding their messages on other threads (default: a single" << endl;
+    cout << "                           client read by the main thread)" << endl;
+}
+
+static void publishRouteStats(Table &statsTable, RouteSync &sync, RouteQueue *queue, FpmServer *server)
+{
+    vector<FieldValueTuple> fvs;
+    sync.m_routeCoalescer.dump(fvs);
+    statsTable.set(APP_ROUTE_TABLE_NAME, fvs);
+
+    fvs.clear();
+    sync.m_ifNameCache.dump(fvs);
+    statsTable.set(IFNAME_CACHE_STATS_KEY, fvs);
+
+    if (server)
+    {
+        fvs.clear();
+        server->dump(fvs);
+        queue->dump(fvs);
+        statsTable.set(FPM_INGEST_STATS_KEY, fvs);
+    }
+}
+
 // Check if eoiu state reached by both ipv4 and ipv6
 static bool eoiuFlagsSet(Table &bgpStateTable)
 {
@@ -46,6 +91,44 @@ static bool eoiuFlagsSet(Table &bgpStateTable)
 
 int main(int argc, char **argv)
 {
+    long coalescingWindow = 0;
+    size_t coalescingMaxRoutes = DEFAULT_COALESCING_MAX_ROUTES;
+    long maxConnections = 0;
+    int opt;
+
+    while ((opt = getopt(argc, argv, "w:s:t:h")) != -1)
+    {
+        switch (opt)
+        {
+            case 'w':
+                coalescingWindow = atol(optarg);
+                break;
+            case 's':
+                coalescingMaxRoutes = (size_t)atol(optarg);
+                break;
+            case 't':
+                maxConnections = atol(optarg);
+                if (maxConnections <= 0)
+                {
+                    usage();
+                    return EXIT_FAILURE;
+                }
+                break;
+            case 'h':
+                usage();
+                return 1;
+            default: /* '?' */
+                usage();
+                return EXIT_FAILURE;
+        }
+    }
+
+    if (coalescingWindow < 0 || coalescingMaxRoutes == 0)
+    {
+        usage();
+        return EXIT_FAILURE;
+    }
+
     swss::Logger::linkToDbNative("fpmsyncd");
     DBConnector db("APPL_DB", 0);
     RedisPipeline pipeline(&db);
@@ -54,31 +137,86 @@ int main(int argc, char **argv)
     DBConnector stateDb("STATE_DB", 0);
     Table bgpStateTable(&stateDb, STATE_BGP_TABLE_NAME);
 
+    DBConnector countersDb("COUNTERS_DB", 0);
+    Table routeStatsTable(&countersDb, ROUTE_STATS_TABLE);
+
+    if (coalescingWindow)
+    {
+        sync.m_routeCoalescer.setMaxPending(coalescingMaxRoutes);
+        SWSS_LOG_NOTICE("Coalescing route updates within %ld ms, up to %zu routes",
+                        coalescingWindow, coalescingMaxRoutes);
+    }
+
     NetDispatcher::getInstance().registerMessageHandler(RTM_NEWROUTE, &sync);
     NetDispatcher::getInstance().registerMessageHandler(RTM_DELROUTE, &sync);
+    /* Keep the interface names of the next hops up to date */
+    NetDispatcher::getInstance().registerMessageHandler(RTM_NEWLINK, &sync);
+    NetDispatcher::getInstance().registerMessageHandler(RTM_DELLINK, &sync);
+
+    /*
+     * With -t, the FPM clients are read by the threads of the FpmServer, and the main
+     * thread only writes the routes they decoded.
+     */
+    unique_ptr<RouteQueue> queue;
+    unique_ptr<FpmServer> server;
+    if (maxConnections)
+    {
+        queue.reset(new RouteQueue(&sync));
+        server.reset(new FpmServer(queue.get(), (size_t)maxConnections));
+        server->start();
+        SWSS_LOG_NOTICE("Accepting up to %ld FPM connections", maxConnections);
+    }
 
     while (true)
     {
         try
         {
-            FpmLink fpm;
+            unique_ptr<FpmLink> fpm;
             Select s;
             SelectableTimer warmStartTimer(timespec{0, 0});
             // Before eoiu flags detected, check them periodically. It also stop upon detection of reconciliation done.
             SelectableTimer eoiuCheckTimer(timespec{0, 0});
             // After eoiu flags are detected, start a hold timer before starting reconciliation.
             SelectableTimer eoiuHoldTimer(timespec{0, 0});
+            // Writes the coalesced route updates at the end of each window.
+            SelectableTimer coalescingTimer(timespec{coalescingWindow / 1000, (coalescingWindow % 1000) * 1000000});
+            SelectableTimer statsTimer(timespec{ROUTE_STATS_INTERVAL, 0});
             /*
              * Pipeline should be flushed right away to deal with state pending
-             * from previous try/catch iterations.
+             * from previous try/catch iterations, including the coalesced routes.
              */
+            sync.m_routeCoalescer.flush();
             pipeline.flush();
 
-            cout << "Waiting for fpm-client connection..." << endl;
-            fpm.accept();
-            cout << "Connected!" << endl;
+            if (server)
+            {
+                s.addSelectable(queue.get());
+            }
+            else
+            {
+                fpm.reset(new FpmLink(&sync));
+
+                cout << "Waiting for fpm-client connection..." << endl;
+                fpm->accept();
+                cout << "Connected!" << endl;
 
-            s.addSelectable(&fpm);
+                s.addSelectable(fpm.get());
+            }
+
+            NetLink netlink;
+            netlink.registerGroup(RTNLGRP_LINK);
+            netlink.dumpRequest(RTM_GETLINK);
+            s.addSelectable(&netlink);
+            sync.m_ifNameCache.setNetLink(&netlink);
+
+            statsTimer.start();
+            s.addSelectable(&statsTimer);
+
+            if (sync.m_routeCoalescer.isEnabled())
+            {
+                coalescingTimer.start();
+                s.addSelectable(&coalescingTimer);
+            }
 
             /* If warm-restart feature is enabled, execute 'restoration' logic */
             bool warmStartEnabled = sync.m_warmStartHelper.checkAndStart();
@@ -135,6 +273,7 @@ int main(int argc, char **argv)
                     }
                     if (sync.m_warmStartHelper.inProgress())
                     {
+                        sync.m_routeCoalescer.flush();
                         sync.m_warmStartHelper.reconcile();
                         SWSS_LOG_NOTICE("Warm-Restart reconciliation processed.");
                     }
@@ -143,6 +282,16 @@ int main(int argc, char **argv)
                     pipeline.flush();
                     SWSS_LOG_DEBUG("Pipeline flushed");
                 }
+                else if (temps == &coalescingTimer)
+                {
+                    sync.m_routeCoalescer.flush();
+                    pipeline.flush();
+                    SWSS_LOG_DEBUG("Coalesced routes flushed");
+                }
+                else if (temps == &statsTimer)
+                {
+                    publishRouteStats(routeStatsTable, sync, queue.get(), server.get());
+                }
                 else if (temps == &eoiuCheckTimer)
                 {
                     if (sync.m_warmStartHelper.inProgress())
@@ -185,6 +334,8 @@ int main(int argc, char **argv)
         }
         catch (FpmLink::FpmConnectionClosedException &e)
         {
+            /* The socket is closed with the try block */
+            sync.m_ifNameCache.setNetLink(NULL);
             cout << "Connection lost, reconnecting..." << endl;
         }
         catch (const exception& e)
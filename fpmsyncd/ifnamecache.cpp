@@ -0,0 +1,185 @@
+#include <poll.h>
+#include <string.h>
+#include "logger.h"
+#include "fpmsyncd/ifnamecache.h"
+
+using namespace std;
+using namespace swss;
+
+constexpr chrono::milliseconds IfNameCache::REFILL_INTERVAL;
+constexpr chrono::milliseconds IfNameCache::NEGATIVE_TTL;
+
+IfNameCache::IfNameCache() :
+    m_nl_sock(NULL), m_link_cache(NULL)
+{
+    m_nl_sock = nl_socket_alloc();
+    nl_connect(m_nl_sock, NETLINK_ROUTE);
+    rtnl_link_alloc_cache(m_nl_sock, AF_UNSPEC, &m_link_cache);
+
+    load();
+}
+
+IfNameCache::~IfNameCache()
+{
+    if (m_link_cache)
+    {
+        nl_cache_free(m_link_cache);
+    }
+    nl_socket_free(m_nl_sock);
+}
+
+void IfNameCache::onLinkMsg(int nlmsg_type, struct rtnl_link *link)
+{
+    int if_index = rtnl_link_get_ifindex(link);
+    const char *name = rtnl_link_get_name(link);
+
+    if (nlmsg_type == RTM_DELLINK)
+    {
+        SWSS_LOG_DEBUG("Interface %d removed", if_index);
+        m_names.erase(if_index);
+        return;
+    }
+
+    if (nlmsg_type != RTM_NEWLINK || !name)
+    {
+        return;
+    }
+
+    SWSS_LOG_DEBUG("Interface %d is %s", if_index, name);
+    m_names[if_index] = name;
+    m_unknown.erase(if_index);
+}
+
+bool IfNameCache::getName(int if_index, char *if_name, size_t name_len)
+{
+    if (!if_name || name_len == 0)
+    {
+        return false;
+    }
+
+    memset(if_name, 0, name_len);
+
+    auto it = m_names.find(if_index);
+    if (it == m_names.end())
+    {
+        m_misses++;
+
+        auto now = clock::now();
+        auto unknown = m_unknown.find(if_index);
+        if (unknown != m_unknown.end() && now - unknown->second < NEGATIVE_TTL)
+        {
+            m_negativeHits++;
+            return false;
+        }
+
+        /*
+         * The message of an interface created just before the route may not be read yet,
+         * as the routes are handled first.
+         */
+        readLinkMsgs();
+
+        it = m_names.find(if_index);
+        if (it == m_names.end())
+        {
+            /*
+             * Only a lost message leaves the map out of date, one refill recovers every
+             * index missing. The index isn't remembered as unknown until it's refilled.
+             */
+            if (now - m_lastRefill < REFILL_INTERVAL)
+            {
+                m_limitedRefills++;
+                return false;
+            }
+
+            refill();
+
+            it = m_names.find(if_index);
+            if (it == m_names.end())
+            {
+                SWSS_LOG_INFO("Unknown interface %d", if_index);
+                m_unknown[if_index] = now;
+                return false;
+            }
+        }
+    }
+    else
+    {
+        m_hits++;
+    }
+
+    strncpy(if_name, it->second.c_str(), name_len - 1);
+    return true;
+}
+
+void IfNameCache::readLinkMsgs()
+{
+    if (!m_netlink)
+    {
+        return;
+    }
+
+    /* The messages are handled by RouteSync::onMsg(), which calls onLinkMsg() */
+    struct pollfd pfd = { m_netlink->getFd(), POLLIN, 0 };
+    for (int i = 0; i < MAX_LINK_READS && poll(&pfd, 1, 0) > 0; i++)
+    {
+        m_netlink->readData();
+        m_linkReads++;
+    }
+}
+
+void IfNameCache::refill()
+{
+    m_lastRefill = clock::now();
+    m_refills++;
+
+    if (!m_link_cache)
+    {
+        return;
+    }
+
+    nl_cache_refill(m_nl_sock, m_link_cache);
+    load();
+}
+
+void IfNameCache::load()
+{
+    if (!m_link_cache)
+    {
+        return;
+    }
+
+    m_names.clear();
+    for (auto *obj = nl_cache_get_first(m_link_cache); obj; obj = nl_cache_get_next(obj))
+    {
+        auto *link = (struct rtnl_link *)obj;
+        const char *name = rtnl_link_get_name(link);
+        if (name)
+        {
+            m_names[rtnl_link_get_ifindex(link)] = name;
+        }
+    }
+
+    /* Only forget the indexes found since, so two unknown ones don't keep refilling in turn */
+    for (auto it = m_unknown.begin(); it != m_unknown.end();)
+    {
+        if (m_names.count(it->first))
+        {
+            it = m_unknown.erase(it);
+        }
+        else
+        {
+            it++;
+        }
+    }
+}
+
+void IfNameCache::dump(vector<FieldValueTuple> &fvs) const
+{
+    fvs.emplace_back("interfaces", to_string(m_names.size()));
+    fvs.emplace_back("hits", to_string(m_hits));
+    fvs.emplace_back("misses", to_string(m_misses));
+    fvs.emplace_back("negative_hits", to_string(m_negativeHits));
+    fvs.emplace_back("refills", to_string(m_refills));
+    fvs.emplace_back("limited_refills", to_string(m_limitedRefills));
+    fvs.emplace_back("link_reads", to_string(m_linkReads));
+}
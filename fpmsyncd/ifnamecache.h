@@ -0,0 +1,93 @@
+#ifndef __IFNAMECACHE__
+#define __IFNAMECACHE__
+
+#include <net/if.h>
+#include <netlink/route/link.h>
+
+#include <chrono>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+#include "table.h"
+#include "netlink.h"
+
+namespace swss {
+
+/*
+ * Interface index to name map for the next hops and VRFs of the routes.
+ *
+ * The map is kept up to date by the RTM_NEWLINK/RTM_DELLINK messages of the kernel,
+ * so a lookup doesn't need to query the kernel. An unknown index first reads the link
+ * messages pending on the netlink socket, then refills the map from the kernel at most
+ * once every REFILL_INTERVAL, so the unknown indexes of a burst of routes share a single
+ * refill. An index still missing after a refill is remembered as unknown for NEGATIVE_TTL.
+ */
+class IfNameCache
+{
+public:
+    typedef std::chrono::steady_clock clock;
+
+    static constexpr std::chrono::milliseconds REFILL_INTERVAL{1000};
+    static constexpr std::chrono::milliseconds NEGATIVE_TTL{5000};
+    /* Bound the reads of a lookup while interfaces keep changing */
+    static const int MAX_LINK_READS = 16;
+
+    IfNameCache();
+    ~IfNameCache();
+
+    /*
+     * Socket the RTM_NEWLINK/RTM_DELLINK messages are received on, read for the pending
+     * messages of an unknown index. NULL while there is none.
+     */
+    void setNetLink(NetLink *netlink) { m_netlink = netlink; }
+
+    /* Update the map from a RTM_NEWLINK/RTM_DELLINK message */
+    void onLinkMsg(int nlmsg_type, struct rtnl_link *link);
+
+    /*
+     * Copy the name of the interface to if_name, a buffer of name_len bytes.
+     * Returns false if the interface is unknown.
+     */
+    bool getName(int if_index, char *if_name, size_t name_len);
+
+    /* Counters since fpmsyncd started */
+    uint64_t getHits() const { return m_hits; }
+    uint64_t getMisses() const { return m_misses; }
+    uint64_t getNegativeHits() const { return m_negativeHits; }
+    uint64_t getRefills() const { return m_refills; }
+    uint64_t getLimitedRefills() const { return m_limitedRefills; }
+    uint64_t getLinkReads() const { return m_linkReads; }
+
+    void dump(std::vector<FieldValueTuple> &fvs) const;
+
+private:
+    struct nl_sock *m_nl_sock;
+    struct nl_cache *m_link_cache;
+    NetLink *m_netlink = NULL;
+
+    std::unordered_map<int, std::string> m_names;
+    /* Unknown interface index to the time it was found unknown */
+    std::unordered_map<int, clock::time_point> m_unknown;
+    clock::time_point m_lastRefill;
+
+    uint64_t m_hits = 0;
+    uint64_t m_misses = 0;
+    uint64_t m_negativeHits = 0;
+    uint64_t m_refills = 0;
+    uint64_t m_limitedRefills = 0;
+    uint64_t m_linkReads = 0;
+
+    /* Handle the link messages pending on m_netlink */
+    void readLinkMsgs();
+
+    /* Rebuild the map from the kernel */
+    void refill();
+
+    /* Rebuild the map from m_link_cache */
+    void load();
+};
+
+}
+
+#endif
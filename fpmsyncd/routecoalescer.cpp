@@ -0,0 +1,160 @@
+#include <algorithm>
+
+#include "logger.h"
+#include "fpmsyncd/routecoalescer.h"
+
+using namespace std;
+using namespace swss;
+
+RouteCoalescer::RouteCoalescer(ProducerStateTable *table, size_t maxPending) :
+    m_table(table),
+    m_maxPending(maxPending)
+{
+}
+
+void RouteCoalescer::setMaxPending(size_t maxPending)
+{
+    /* Don't leave anything behind when coalescing gets disabled */
+    if (maxPending == 0)
+    {
+        flush();
+    }
+
+    m_maxPending = maxPending;
+}
+
+void RouteCoalescer::set(const string &key, const vector<FieldValueTuple> &values)
+{
+    if (!isEnabled())
+    {
+        m_updates++;
+        m_written++;
+        m_table->set(key, values);
+        return;
+    }
+
+    add(key, SET_COMMAND, values);
+}
+
+void RouteCoalescer::del(const string &key)
+{
+    if (!isEnabled())
+    {
+        m_updates++;
+        m_written++;
+        m_table->del(key);
+        return;
+    }
+
+    add(key, DEL_COMMAND, {});
+}
+
+void RouteCoalescer::add(const string &key, const string &op, const vector<FieldValueTuple> &values)
+{
+    m_updates++;
+
+    auto it = m_index.find(key);
+    if (it != m_index.end())
+    {
+        auto &pending = m_pending[it->second];
+        if (op == DEL_COMMAND)
+        {
+            /* The delete supersedes the pending update, and a delete pending before it */
+            if (m_deleted.erase(key))
+            {
+                m_suppressed++;
+            }
+
+            kfvFieldsValues(pending).clear();
+            m_suppressed++;
+        }
+        else if (kfvOp(pending) == DEL_COMMAND)
+        {
+            /*
+             * The table merges the fields of a set into the existing entry, so
+             * the delete is still written first to drop the fields of the old
+             * route which the new one doesn't have.
+             */
+            m_deleted.insert(key);
+            kfvFieldsValues(pending) = values;
+        }
+        else
+        {
+            /* Merge the fields the same way the table would */
+            mergeFieldValues(kfvFieldsValues(pending), values);
+            m_suppressed++;
+        }
+
+        kfvOp(pending) = op;
+        return;
+    }
+
+    m_index.emplace(key, m_pending.size());
+    m_pending.emplace_back(key, op, values);
+
+    if (m_pending.size() >= m_maxPending)
+    {
+        SWSS_LOG_INFO("%zu routes pending, flushing before the end of the window", m_pending.size());
+        m_sizeFlushes++;
+        flush();
+    }
+}
+
+void RouteCoalescer::mergeFieldValues(vector<FieldValueTuple> &values, const vector<FieldValueTuple> &update)
+{
+    for (const auto &fv : update)
+    {
+        auto it = find_if(values.begin(), values.end(),
+                          [&](const FieldValueTuple &v) { return fvField(v) == fvField(fv); });
+        if (it != values.end())
+        {
+            fvValue(*it) = fvValue(fv);
+        }
+        else
+        {
+            values.push_back(fv);
+        }
+    }
+}
+
+void RouteCoalescer::flush()
+{
+    if (m_pending.empty())
+    {
+        return;
+    }
+
+    for (const auto &pending : m_pending)
+    {
+        if (kfvOp(pending) == SET_COMMAND)
+        {
+            if (m_deleted.count(kfvKey(pending)))
+            {
+                m_table->del(kfvKey(pending));
+            }
+
+            m_table->set(kfvKey(pending), kfvFieldsValues(pending));
+        }
+        else
+        {
+            m_table->del(kfvKey(pending));
+        }
+    }
+
+    m_written += m_pending.size() + m_deleted.size();
+    m_flushes++;
+
+    m_pending.clear();
+    m_index.clear();
+    m_deleted.clear();
+}
+
+void RouteCoalescer::dump(vector<FieldValueTuple> &fvs) const
+{
+    fvs.emplace_back("updates", to_string(m_updates));
+    fvs.emplace_back("suppressed", to_string(m_suppressed));
+    fvs.emplace_back("written", to_string(m_written));
+    fvs.emplace_back("pending", to_string(m_pending.size()));
+    fvs.emplace_back("flushes", to_string(m_flushes));
+    fvs.emplace_back("size_flushes", to_string(m_sizeFlushes));
+}
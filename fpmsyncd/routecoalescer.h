@@ -0,0 +1,72 @@
+#ifndef __ROUTECOALESCER__
+#define __ROUTECOALESCER__
+
+#include <string>
+#include <unordered_map>
+#include <unordered_set>
+#include <vector>
+
+#include "producerstatetable.h"
+
+namespace swss {
+
+/*
+ * Coalesce the route updates written to a ProducerStateTable.
+ *
+ * Updates are held per prefix until flush(), and only the last update of each
+ * prefix is written, so a route which flaps within the window costs a single
+ * write instead of one per add and delete. The table ends up as if every update
+ * had been written: the fields of consecutive sets are merged, and a set after
+ * a delete is written after that delete. The caller flushes every time window;
+ * the coalescer flushes by itself once maxPending prefixes are pending. A
+ * maxPending of 0 disables coalescing, updates are then written right away.
+ */
+class RouteCoalescer
+{
+public:
+    RouteCoalescer(ProducerStateTable *table, size_t maxPending = 0);
+
+    void setMaxPending(size_t maxPending);
+    bool isEnabled() const { return m_maxPending != 0; }
+
+    void set(const std::string &key, const std::vector<FieldValueTuple> &values);
+    void del(const std::string &key);
+
+    /* Write the pending updates to the table */
+    void flush();
+
+    size_t getPendingCount() const { return m_pending.size(); }
+
+    /* Counters since fpmsyncd started */
+    uint64_t getUpdates() const { return m_updates; }
+    uint64_t getSuppressed() const { return m_suppressed; }
+    uint64_t getWritten() const { return m_written; }
+    uint64_t getFlushes() const { return m_flushes; }
+    uint64_t getSizeFlushes() const { return m_sizeFlushes; }
+
+    void dump(std::vector<FieldValueTuple> &fvs) const;
+
+private:
+    ProducerStateTable *m_table;
+    size_t m_maxPending;
+
+    /* Pending updates in the order their prefix was first updated */
+    std::vector<KeyOpFieldsValuesTuple> m_pending;
+    /* Prefix to its index in m_pending */
+    std::unordered_map<std::string, size_t> m_index;
+    /* Prefixes deleted before their pending set */
+    std::unordered_set<std::string> m_deleted;
+
+    uint64_t m_updates = 0;
+    uint64_t m_suppressed = 0;
+    uint64_t m_written = 0;
+    uint64_t m_flushes = 0;
+    uint64_t m_sizeFlushes = 0;
+
+    void add(const std::string &key, const std::string &op, const std::vector<FieldValueTuple> &values);
+    static void mergeFieldValues(std::vector<FieldValueTuple> &values, const std::vector<FieldValueTuple> &update);
+};
+
+}
+
+#endif
@@ -0,0 +1,133 @@
+#include <sys/eventfd.h>
+#include <string.h>
+#include <unistd.h>
+#include <system_error>
+#include "logger.h"
+#include "fpmsyncd/routequeue.h"
+
+using namespace std;
+using namespace swss;
+
+RouteQueue::RouteQueue(RouteSync *rsync, size_t maxBatches) :
+    m_routesync(rsync),
+    m_maxBatches(maxBatches)
+{
+    m_eventFd = eventfd(0, EFD_CLOEXEC);
+    if (m_eventFd < 0)
+        throw system_error(errno, system_category());
+}
+
+RouteQueue::~RouteQueue()
+{
+    close();
+    ::close(m_eventFd);
+}
+
+unique_ptr<RouteBatch> RouteQueue::getBatch()
+{
+    lock_guard<mutex> lock(m_mutex);
+
+    if (m_free.empty())
+    {
+        return unique_ptr<RouteBatch>(new RouteBatch());
+    }
+
+    auto batch = move(m_free.back());
+    m_free.pop_back();
+    return batch;
+}
+
+bool RouteQueue::push(unique_ptr<RouteBatch> batch)
+{
+    unique_lock<mutex> lock(m_mutex);
+
+    if (m_ready.size() >= m_maxBatches && !m_closed)
+    {
+        m_fullWaits++;
+        m_notFull.wait(lock, [this] { return m_ready.size() < m_maxBatches || m_closed; });
+    }
+
+    if (m_closed)
+    {
+        return false;
+    }
+
+    m_ready.push_back(move(batch));
+    m_batches++;
+    m_maxDepth = max(m_maxDepth, m_ready.size());
+
+    /* Wake up the main thread, the counter may already be set by an earlier batch */
+    uint64_t one = 1;
+    if (write(m_eventFd, &one, sizeof(one)) < 0)
+    {
+        SWSS_LOG_ERROR("Failed to signal the route queue: %s", strerror(errno));
+    }
+
+    return true;
+}
+
+void RouteQueue::close()
+{
+    lock_guard<mutex> lock(m_mutex);
+    m_closed = true;
+    m_notFull.notify_all();
+}
+
+int RouteQueue::getFd()
+{
+    return m_eventFd;
+}
+
+uint64_t RouteQueue::readData()
+{
+    uint64_t count;
+    if (read(m_eventFd, &count, sizeof(count)) < 0 && errno != EAGAIN)
+    {
+        throw system_error(errno, system_category());
+    }
+
+    {
+        lock_guard<mutex> lock(m_mutex);
+        for (auto &batch : m_ready)
+        {
+            m_processing.push_back(move(batch));
+        }
+        m_ready.clear();
+        m_notFull.notify_all();
+    }
+
+    /* The readers can decode the next batches while these ones are written */
+    for (auto &batch : m_processing)
+    {
+        for (size_t i = 0; i < batch->count; i++)
+        {
+            m_routesync->onRouteMsg(batch->routes[i]);
+        }
+        m_routes += batch->count;
+        batch->count = 0;
+    }
+
+    lock_guard<mutex> lock(m_mutex);
+    for (auto &batch : m_processing)
+    {
+        /* Keep enough batches for a full queue and the ones being decoded */
+        if (m_free.size() < 2 * m_maxBatches)
+        {
+            m_free.push_back(move(batch));
+        }
+    }
+    m_processing.clear();
+
+    return 0;
+}
+
+void RouteQueue::dump(vector<FieldValueTuple> &fvs) const
+{
+    lock_guard<mutex> lock(m_mutex);
+
+    fvs.emplace_back("batches", to_string(m_batches));
+    fvs.emplace_back("routes", to_string(m_routes));
+    fvs.emplace_back("depth", to_string(m_ready.size()));
+    fvs.emplace_back("max_depth", to_string(m_maxDepth));
+    fvs.emplace_back("full_waits", to_string(m_fullWaits));
+}
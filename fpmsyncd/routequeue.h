@@ -0,0 +1,91 @@
+#ifndef __ROUTEQUEUE__
+#define __ROUTEQUEUE__
+
+#include <condition_variable>
+#include <deque>
+#include <memory>
+#include <mutex>
+#include <vector>
+
+#include "selectable.h"
+#include "table.h"
+#include "fpmsyncd/fpmdecoder.h"
+#include "fpmsyncd/routesync.h"
+
+namespace swss {
+
+/*
+ * Routes decoded from the FPM messages of one read. The RouteMsgs are kept when the
+ * batch is recycled, so decoding into a recycled batch doesn't allocate.
+ */
+struct RouteBatch
+{
+    std::vector<RouteMsg> routes;
+    size_t count = 0;
+
+    /* Get the RouteMsg to decode the next route into */
+    RouteMsg &next()
+    {
+        if (count == routes.size())
+        {
+            routes.emplace_back();
+        }
+        return routes[count++];
+    }
+};
+
+/*
+ * Bounded queue handing the route batches decoded by the FPM reader threads to the
+ * main thread, which owns RouteSync and the RedisPipeline.
+ *
+ * push() blocks while the queue is full, so a slow redis pushes back on the readers
+ * and then on zebra through TCP. The queue is a Selectable which becomes readable
+ * when batches are queued; readData() passes their routes to RouteSync.
+ */
+class RouteQueue : public Selectable
+{
+public:
+    static const size_t DEFAULT_MAX_BATCHES = 64;
+
+    RouteQueue(RouteSync *rsync, size_t maxBatches = DEFAULT_MAX_BATCHES);
+    virtual ~RouteQueue();
+
+    /* Called by the reader threads */
+    std::unique_ptr<RouteBatch> getBatch();
+    /* Returns false if the queue is closed, the batch is then dropped */
+    bool push(std::unique_ptr<RouteBatch> batch);
+
+    /* Wake up and refuse the readers, e.g. before stopping them */
+    void close();
+
+    int getFd() override;
+    uint64_t readData() override;
+
+    /* Counters since fpmsyncd started, only the main thread should read them */
+    void dump(std::vector<FieldValueTuple> &fvs) const;
+
+private:
+    RouteSync *m_routesync;
+    size_t m_maxBatches;
+    int m_eventFd;
+
+    mutable std::mutex m_mutex;
+    std::condition_variable m_notFull;
+    bool m_closed = false;
+    std::deque<std::unique_ptr<RouteBatch>> m_ready;
+    /* Batches handed to RouteSync, to be reused */
+    std::vector<std::unique_ptr<RouteBatch>> m_free;
+
+    /* Only used by the main thread */
+    std::deque<std::unique_ptr<RouteBatch>> m_processing;
+
+    /* Updated by the readers under m_mutex, except m_routes */
+    uint64_t m_batches = 0;
+    uint64_t m_routes = 0;
+    uint64_t m_fullWaits = 0;
+    size_t m_maxDepth = 0;
+};
+
+}
+
+#endif
@@ -23,27 +23,44 @@ RouteSync::RouteSync(RedisPipeline *pipeline) :
     m_vnet_routeTable(pipeline, APP_VNET_RT_TABLE_NAME, true),
     m_vnet_tunnelTable(pipeline, APP_VNET_RT_TUNNEL_TABLE_NAME, true),
     m_warmStartHelper(pipeline, &m_routeTable, APP_ROUTE_TABLE_NAME, "bgp", "bgp"),
-    m_nl_sock(NULL), m_link_cache(NULL)
+    m_routeCoalescer(&m_routeTable)
 {
-    m_nl_sock = nl_socket_alloc();
-    nl_connect(m_nl_sock, NETLINK_ROUTE);
-    rtnl_link_alloc_cache(m_nl_sock, AF_UNSPEC, &m_link_cache);
 }
 
 void RouteSync::onMsg(int nlmsg_type, struct nl_object *obj)
 {
-    struct rtnl_route *route_obj = (struct rtnl_route *)obj;
+    if (nlmsg_type == RTM_NEWLINK || nlmsg_type == RTM_DELLINK)
+    {
+        m_ifNameCache.onLinkMsg(nlmsg_type, (struct rtnl_link *)obj);
+        return;
+    }
+
+    convertRouteMsg(nlmsg_type, (struct rtnl_route *)obj, m_routeMsg);
+    onRouteMsg(m_routeMsg);
+}
 
+bool RouteSync::onMsgRaw(struct nlmsghdr *h)
+{
+    if (!decodeRouteMsg(h, m_routeMsg))
+    {
+        return false;
+    }
+
+    onRouteMsg(m_routeMsg);
+    return true;
+}
+
+void RouteSync::onRouteMsg(const RouteMsg &route)
+{
     /* Supports IPv4 or IPv6 address, otherwise return immediately */
-    auto family = rtnl_route_get_family(route_obj);
-    if (family != AF_INET && family != AF_INET6)
+    if (route.family != AF_INET && route.family != AF_INET6)
     {
-        SWSS_LOG_INFO("Unknown route family support (object: %s)", nl_object_get_type(obj));
+        SWSS_LOG_INFO("Unknown route family support (family: %u)", route.family);
         return;
     }
 
     /* Get the index of the master device */
-    unsigned int master_index = rtnl_route_get_table(route_obj);
+    unsigned int master_index = route.table;
     char master_name[IFNAMSIZ] = {0};
 
     /* if the table_id is not set in the route obj then route is for default vrf. */
@@ -56,31 +73,28 @@ void RouteSync::onMsg(int nlmsg_type, struct nl_object *obj)
            The VNET name is exactly the name of the associated master device. */
         if (string(master_name).find(VNET_PREFIX) == 0)
         {
-            onVnetRouteMsg(nlmsg_type, obj, string(master_name));
+            onVnetRouteMsg(route, string(master_name));
         }
         /* Otherwise, it is a regular route (include VRF route). */
         else
         {
-            onRouteMsg(nlmsg_type, obj, master_name);
+            onRouteMsg(route, master_name);
         }
 
     }
     else
     {
-        onRouteMsg(nlmsg_type, obj, NULL);
+        onRouteMsg(route, NULL);
     }
 }
 
 /* 
  * Handle regular route (include VRF route) 
- * @arg nlmsg_type      Netlink message type
- * @arg obj             Netlink object
+ * @arg route           Decoded route
  * @arg vrf             Vrf name
  */
-void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
+void RouteSync::onRouteMsg(const RouteMsg &route, char *vrf)
 {
-    struct rtnl_route *route_obj = (struct rtnl_route *)obj;
-    struct nl_addr *dip;
     char destipprefix[IFNAMSIZ + MAX_ADDR_SIZE + 2] = {0};
 
     if (vrf)
@@ -91,15 +105,14 @@ void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
          */
         if (memcmp(vrf, VRF_PREFIX, strlen(VRF_PREFIX)))
         {
-            SWSS_LOG_ERROR("Invalid VRF name %s (ifindex %u)", vrf, rtnl_route_get_table(route_obj));
+            SWSS_LOG_ERROR("Invalid VRF name %s (ifindex %u)", vrf, route.table);
             return;
         }
         memcpy(destipprefix, vrf, strlen(vrf));
         destipprefix[strlen(vrf)] = ':';
     }
 
-    dip = rtnl_route_get_dst(route_obj);
-    nl_addr2str(dip, destipprefix + strlen(destipprefix), MAX_ADDR_SIZE);
+    strcat(destipprefix, route.dst);
     SWSS_LOG_DEBUG("Receive new route message dest ip prefix: %s", destipprefix);
 
     /*
@@ -108,11 +121,11 @@ void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
      */
     bool warmRestartInProgress = m_warmStartHelper.inProgress();
 
-    if (nlmsg_type == RTM_DELROUTE)
+    if (route.nlmsg_type == RTM_DELROUTE)
     {
         if (!warmRestartInProgress)
         {
-            m_routeTable.del(destipprefix);
+            m_routeCoalescer.del(destipprefix);
             return;
         }
         else
@@ -128,20 +141,20 @@ void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
             return;
         }
     }
-    else if (nlmsg_type != RTM_NEWROUTE)
+    else if (route.nlmsg_type != RTM_NEWROUTE)
     {
-        SWSS_LOG_INFO("Unknown message-type: %d for %s", nlmsg_type, destipprefix);
+        SWSS_LOG_INFO("Unknown message-type: %d for %s", route.nlmsg_type, destipprefix);
         return;
     }
 
-    switch (rtnl_route_get_type(route_obj))
+    switch (route.type)
     {
         case RTN_BLACKHOLE:
         {
             vector<FieldValueTuple> fvVector;
             FieldValueTuple fv("blackhole", "true");
             fvVector.push_back(fv);
-            m_routeTable.set(destipprefix, fvVector);
+            m_routeCoalescer.set(destipprefix, fvVector);
             return;
         }
         case RTN_UNICAST:
@@ -157,16 +170,9 @@ void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
             return;
     }
 
-    struct nl_list_head *nhs = rtnl_route_get_nexthops(route_obj);
-    if (!nhs)
-    {
-        SWSS_LOG_INFO("Nexthop list is empty for %s", destipprefix);
-        return;
-    }
-
     /* Get nexthop lists */
-    string nexthops = getNextHopGw(route_obj);
-    string ifnames = getNextHopIf(route_obj);
+    const string &nexthops = route.gateways;
+    string ifnames = getNextHopIf(route);
 
     vector<FieldValueTuple> fvVector;
     FieldValueTuple nh("nexthop", nexthops);
@@ -177,7 +183,7 @@ void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
 
     if (!warmRestartInProgress)
     {
-        m_routeTable.set(destipprefix, fvVector);
+        m_routeCoalescer.set(destipprefix, fvVector);
         SWSS_LOG_DEBUG("RouteTable set msg: %s %s %s",
                        destipprefix, nexthops.c_str(), ifnames.c_str());
     }
@@ -200,36 +206,28 @@ void RouteSync::onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf)
 
 /* 
  * Handle vnet route 
- * @arg nlmsg_type      Netlink message type
- * @arg obj             Netlink object
+ * @arg route           Decoded route
  * @arg vnet            Vnet name
  */     
-void RouteSync::onVnetRouteMsg(int nlmsg_type, struct nl_object *obj, string vnet)
+void RouteSync::onVnetRouteMsg(const RouteMsg &route, string vnet)
 {
-    struct rtnl_route *route_obj = (struct rtnl_route *)obj;
-
-    /* Get the destination IP prefix */
-    struct nl_addr *dip = rtnl_route_get_dst(route_obj);
-    char destipprefix[MAX_ADDR_SIZE + 1] = {0};
-    nl_addr2str(dip, destipprefix, MAX_ADDR_SIZE);
-
-    string vnet_dip =  vnet + string(":") + destipprefix;
+    string vnet_dip =  vnet + string(":") + route.dst;
     SWSS_LOG_DEBUG("Receive new vnet route message %s", vnet_dip.c_str());
 
-    if (nlmsg_type == RTM_DELROUTE)
+    if (route.nlmsg_type == RTM_DELROUTE)
     {
         /* Duplicated delete as we do not know if it is a VXLAN tunnel route*/
         m_vnet_routeTable.del(vnet_dip);
         m_vnet_tunnelTable.del(vnet_dip);
         return;
     }
-    else if (nlmsg_type != RTM_NEWROUTE)
+    else if (route.nlmsg_type != RTM_NEWROUTE)
     {
-        SWSS_LOG_INFO("Unknown message-type: %d for %s", nlmsg_type, vnet_dip.c_str());
+        SWSS_LOG_INFO("Unknown message-type: %d for %s", route.nlmsg_type, vnet_dip.c_str());
         return;
     }
 
-    switch (rtnl_route_get_type(route_obj))
+    switch (route.type)
     {
         case RTN_UNICAST:
             break;
@@ -249,16 +247,9 @@ void RouteSync::onVnetRouteMsg(int nlmsg_type, struct nl_object *obj, string vne
             return;
     }
 
-    struct nl_list_head *nhs = rtnl_route_get_nexthops(route_obj);
-    if (!nhs)
-    {
-        SWSS_LOG_INFO("Nexthop list is empty for %s", vnet_dip.c_str());
-        return;
-    }
-
     /* Get nexthop lists */
-    string nexthops = getNextHopGw(route_obj);
-    string ifnames = getNextHopIf(route_obj);
+    const string &nexthops = route.gateways;
+    string ifnames = getNextHopIf(route);
 
     /* If the the first interface name starts with VXLAN_IF_NAME_PREFIX,
        the route is a VXLAN tunnel route. */
@@ -281,7 +272,7 @@ void RouteSync::onVnetRouteMsg(int nlmsg_type, struct nl_object *obj, string vne
         fvVector.push_back(idx);
 
         /* If the route has at least one next hop gateway, e.g., nexthops does not only have ',' */
-        if (nexthops.length() + 1 > (unsigned int)rtnl_route_get_nnexthops(route_obj))
+        if (nexthops.length() + 1 > route.ifindexes.size())
         {
             FieldValueTuple nh("nexthop", nexthops);
             fvVector.push_back(nh);
@@ -308,96 +299,32 @@ void RouteSync::onVnetRouteMsg(int nlmsg_type, struct nl_object *obj, string vne
  */
 bool RouteSync::getIfName(int if_index, char *if_name, size_t name_len)
 {
-    if (!if_name || name_len == 0)
-    {
-        return false;
-    }
-
-    memset(if_name, 0, name_len);
-
-    /* Cannot get interface name. Possibly the interface gets re-created. */
-    if (!rtnl_link_i2name(m_link_cache, if_index, if_name, name_len))
-    {
-        /* Trying to refill cache */
-        nl_cache_refill(m_nl_sock, m_link_cache);
-        if (!rtnl_link_i2name(m_link_cache, if_index, if_name, name_len))
-        {
-            return false;
-        }
-    }
-
-    return true;
-}
-
-/*
- * Get next hop gateway IP addresses
- * @arg route_obj     route object
- *
- * Return concatenation of IP addresses: gw0 + "," + gw1 + .... + "," + gwN
- */
-string RouteSync::getNextHopGw(struct rtnl_route *route_obj)
-{
-    string result = "";
-
-    for (int i = 0; i < rtnl_route_get_nnexthops(route_obj); i++)
-    {
-        struct rtnl_nexthop *nexthop = rtnl_route_nexthop_n(route_obj, i);
-        struct nl_addr *addr = rtnl_route_nh_get_gateway(nexthop);
-
-        /* Next hop gateway is not empty */
-        if (addr)
-        {
-            char gw_ip[MAX_ADDR_SIZE + 1] = {0};
-            nl_addr2str(addr, gw_ip, MAX_ADDR_SIZE);
-            result += gw_ip;
-        }
-        else
-        {
-            if (rtnl_route_get_family(route_obj) == AF_INET)
-            {
-                result += "0.0.0.0";
-            }
-            else
-            {
-                result += "::";
-            }
-        }
-
-        if (i + 1 < rtnl_route_get_nnexthops(route_obj))
-        {
-            result += string(",");
-        }
-    }
-
-    return result;
+    return m_ifNameCache.getName(if_index, if_name, name_len);
 }
 
 /*
  * Get next hop interface names
- * @arg route_obj     route object
+ * @arg route         decoded route
  *
  * Return concatenation of interface names: if0 + "," + if1 + .... + "," + ifN
  */
-string RouteSync::getNextHopIf(struct rtnl_route *route_obj)
+string RouteSync::getNextHopIf(const RouteMsg &route)
 {
     string result = "";
 
-    for (int i = 0; i < rtnl_route_get_nnexthops(route_obj); i++)
+    for (size_t i = 0; i < route.ifindexes.size(); i++)
     {
-        struct rtnl_nexthop *nexthop = rtnl_route_nexthop_n(route_obj, i);
-        /* Get the ID of next hop interface */
-        unsigned if_index = rtnl_route_nh_get_ifindex(nexthop);
         char if_name[IFNAMSIZ] = "0";
 
         /* If we cannot get the interface name */
-        if (!getIfName(if_index, if_name, IFNAMSIZ))
+        if (!getIfName(route.ifindexes[i], if_name, IFNAMSIZ))
         {
             strcpy(if_name, "unknown");
         }
 
         result += if_name;
 
-        if (i + 1 < rtnl_route_get_nnexthops(route_obj))
+        if (i + 1 < route.ifindexes.size())
         {
             result += string(",");
         }
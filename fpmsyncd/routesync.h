@@ -5,6 +5,9 @@
 #include "producerstatetable.h"
 #include "netmsg.h"
 #include "warmRestartHelper.h"
+#include "fpmsyncd/fpmdecoder.h"
+#include "fpmsyncd/routecoalescer.h"
+#include "fpmsyncd/ifnamecache.h"
 #include <string.h>
 
 using namespace std;
@@ -20,8 +23,23 @@ public:
 
     virtual void onMsg(int nlmsg_type, struct nl_object *obj);
 
+    /*
+     * Handle a route message straight from the FPM buffer, without libnl.
+     * Returns false if the message couldn't be decoded.
+     */
+    bool onMsgRaw(struct nlmsghdr *h);
+
+    /* Handle a decoded route */
+    void onRouteMsg(const RouteMsg &route);
+
     WarmStartHelper  m_warmStartHelper;
 
+    /* Coalesces the updates of the regular route table, disabled by default */
+    RouteCoalescer   m_routeCoalescer;
+
+    /* Names of the next hop interfaces and VRFs, updated from RTM_NEWLINK/RTM_DELLINK */
+    IfNameCache      m_ifNameCache;
+
 private:
     /* regular route table */
     ProducerStateTable  m_routeTable;
@@ -29,23 +47,20 @@ private:
     ProducerStateTable  m_vnet_routeTable;
     /* vnet vxlan tunnel table */  
     ProducerStateTable  m_vnet_tunnelTable; 
-    struct nl_cache    *m_link_cache;
-    struct nl_sock     *m_nl_sock;
+    /* Reused for every message */
+    RouteMsg            m_routeMsg;
 
     /* Handle regular route (include VRF route) */
-    void onRouteMsg(int nlmsg_type, struct nl_object *obj, char *vrf);
+    void onRouteMsg(const RouteMsg &route, char *vrf);
 
     /* Handle vnet route */
-    void onVnetRouteMsg(int nlmsg_type, struct nl_object *obj, string vnet);
+    void onVnetRouteMsg(const RouteMsg &route, string vnet);
 
     /* Get interface name based on interface index */
     bool getIfName(int if_index, char *if_name, size_t name_len);
 
-    /* Get next hop gateway IP addresses */
-    string getNextHopGw(struct rtnl_route *route_obj);
-
     /* Get next hop interfaces */
-    string getNextHopIf(struct rtnl_route *route_obj);
+    string getNextHopIf(const RouteMsg &route);
 };
 
 }
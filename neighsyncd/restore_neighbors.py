@@ -17,15 +17,18 @@ import swsssdk
 import netifaces
 import time
 import monotonic
-from pyroute2 import IPRoute, NetlinkError
-from pyroute2.netlink.rtnl import ndmsg
-from socket import AF_INET,AF_INET6
+from pyroute2 import IPRoute, IPBatch
+from pyroute2.netlink import NLMSG_ERROR
+from pyroute2.netlink.rtnl import ndmsg, RTMGRP_LINK, RTMGRP_IPV4_IFADDR, RTMGRP_IPV6_IFADDR
+from socket import socket, inet_pton, AF_INET, AF_INET6, AF_PACKET, SOCK_RAW
 import logging
-logging.getLogger("scapy.runtime").setLevel(logging.ERROR)
-from scapy.all import conf, in6_getnsma, inet_pton, inet_ntop, in6_getnsmac, get_if_hwaddr, Ether, ARP, IPv6, ICMPv6ND_NS, ICMPv6NDOptSrcLLAddr
 from swsscommon import swsscommon
+import binascii
 import errno
+import select
+import struct
 import syslog
+import threading
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -55,9 +58,43 @@ def log_error(msg):
 # default timeout to 110 seconds.
 DEF_TIME_OUT = 110
 
-# every 5 seconds to check interfaces states
+# interfaces states are checked on every link/address change in kernel and on every
+# vlan member change in stateDB, and at least every 5 seconds
 CHECK_INTERVAL = 5
 
+# every 0.1 second to check stateDB keyspace notifications while waiting for netlink events
+EVENT_POLL_INTERVAL = 0.1
+
+# number of NEIGH_TABLE keys read from appDB per SCAN and per pipelined HGETALL batch
+NEIGH_READ_BATCH_SIZE = 1000
+
+# max number of neighbor entries packed into one netlink send
+NEIGH_BATCH_SIZE = 256
+
+# max number of interfaces restored in parallel
+MAX_RESTORE_WORKERS = 8
+
+# max number of arp/ns packets sent per second by all interfaces together, 0 means no limit.
+# The packets are not paced by default, as pacing makes the restore take longer (e.g.
+# 10k neighbors at 600 pps take about 17 seconds) and neighsyncd only waits so long for
+# it. Set a rate below the CoPP arp/nd rate if the trapped replies get dropped.
+ARP_NS_PKT_RATE = 0
+
+# pace the arp/ns packets every ARP_NS_PACE_BATCH packets
+ARP_NS_PACE_BATCH = 32
+
+ETH_P_IP = 0x0800
+ETH_P_ARP = 0x0806
+ETH_P_IPV6 = 0x86dd
+IPPROTO_ICMPV6 = 58
+ARPOP_REQUEST = 1
+ND_NEIGHBOR_SOLICIT = 135
+ND_OPT_SOURCE_LINKADDR = 1
+# ICMPv6 NS message (24 bytes) plus source link-layer address option (8 bytes)
+ICMPV6_NS_LEN = 32
+# solicited-node multicast prefix ff02::1:ff00:0/104
+SOLICITED_NODE_PREFIX = inet_pton(AF_INET6, 'ff02::1:ff00:0')[:13]
+
 ip_family = {"IPv4": AF_INET, "IPv6": AF_INET6}
 
 # return the first ipv4/ipv6 address assigned on intf
@@ -91,12 +128,23 @@ def is_intf_up(intf, db):
         if key is None:
             log_info ("Vlan member is not yet created")
             return False
-        if is_intf_up.counter == 0:
-            time.sleep(3*CHECK_INTERVAL)
-            is_intf_up.counter = 1
         log_info ("intf {} is up".format(intf))
     return True
 
+# block until a link/address changes in kernel or a vlan member changes in stateDB,
+# or until timeout
+def wait_for_intf_event(ipmon, pubsub, timeout):
+    mtime = monotonic.time.time
+    start_time = mtime()
+    while (mtime() - start_time) < timeout:
+        ready, _, _ = select.select([ipmon], [], [], EVENT_POLL_INTERVAL)
+        if ready:
+            # drain the pending netlink notifications
+            ipmon.get()
+            return
+        if pubsub.get_message() is not None:
+            return
+
 # read the neigh table from AppDB to memory, format as below
 # build map as below, this can efficiently access intf and family groups later
 #       { intf1 -> { { family1 -> [[ip1, mac1], [ip2, mac2] ...] }
@@ -116,12 +164,19 @@ def is_intf_up(intf, db):
 # These alternative solutions would have worse performance because:
 #  1, need iterate the whole list if only one family is up.
 #  2, need check interface state twice due to the split map
+#
+# The keys are iterated with SCAN (not KEYS, which blocks redis) and the entries are
+# fetched with pipelined HGETALL in batches of NEIGH_READ_BATCH_SIZE.
+# The (ip, mac) pairs are stored as tuples and the interface names are shared between
+# all entries of the same interface, to keep the map compact for large tables.
 
 def read_neigh_table_to_maps():
     db = swsssdk.SonicV2Connector(host='127.0.0.1')
     db.connect(db.APPL_DB, False)
+    client = db.get_redis_client(db.APPL_DB)
 
     intf_neigh_map = {}
+    intf_names = {}
     # Key format: "NEIGH_TABLE:intf-name:ipv4/ipv6", examples below:
     # "NEIGH_TABLE:Ethernet122:100.1.1.200"
     # "NEIGH_TABLE:Ethernet122:fe80::2e0:ecff:fe3b:d6ac"
@@ -130,81 +185,222 @@ def read_neigh_table_to_maps():
     # 2) "00:22:33:44:55:cc"
     # 3) "family"
     # 4) "IPv4" or "IPv6"
-    keys = db.keys(db.APPL_DB, 'NEIGH_TABLE:*')
-    keys = [] if keys is None else keys
-    for key in keys:
-        key_split = key.split(':', 2)
-        intf_name = key_split[1]
-        if intf_name == 'lo':
+    def add_entries(keys, values):
+        for key, value in zip(keys, values):
+            key_split = key.split(':', 2)
+            intf_name = key_split[1]
+            dst_ip = key_split[2]
+            if 'neigh' in value and 'family' in value:
+                dmac = value['neigh']
+                family = value['family']
+            else:
+                raise RuntimeError('Neigh table format is incorrect')
+
+            if family not in ip_family:
+                raise RuntimeError('Neigh table format is incorrect')
+
+            # build map like this:
+            #       { intf1 -> { { family1 -> [[ip1, mac1], [ip2, mac2] ...] }
+            #                    { family2 -> [[ipM, macM], [ipN, macN] ...] } },
+            #         intfX -> {...}
+            #       }
+            intf_name = intf_names.setdefault(intf_name, intf_name)
+            intf_neigh_map.setdefault(intf_name, {}).setdefault(family, []).append((dst_ip, dmac))
+
+    pipe = client.pipeline(transaction=False)
+    keys = []
+    for key in client.scan_iter(match='NEIGH_TABLE:*', count=NEIGH_READ_BATCH_SIZE):
+        # skip neighbors on loopback
+        if key.split(':', 2)[1] == 'lo':
             continue
-        dst_ip = key_split[2]
-        value = db.get_all(db.APPL_DB, key)
-        if 'neigh' in value and 'family' in value:
-            dmac = value['neigh']
-            family = value['family']
-        else:
-            raise RuntimeError('Neigh table format is incorrect')
-
-        if family not in ip_family:
-            raise RuntimeError('Neigh table format is incorrect')
-
-        # build map like this:
-        #       { intf1 -> { { family1 -> [[ip1, mac1], [ip2, mac2] ...] }
-        #                    { family2 -> [[ipM, macM], [ipN, macN] ...] } },
-        #         intfX -> {...}
-        #       }
-        ip_mac_pair = []
-        ip_mac_pair.append(dst_ip)
-        ip_mac_pair.append(dmac)
-
-        intf_neigh_map.setdefault(intf_name, {}).setdefault(family, []).append(ip_mac_pair)
+        keys.append(key)
+        pipe.hgetall(key)
+        if len(keys) >= NEIGH_READ_BATCH_SIZE:
+            add_entries(keys, pipe.execute())
+            keys = []
+    if keys:
+        add_entries(keys, pipe.execute())
     db.close(db.APPL_DB)
     return intf_neigh_map
 
 
 # Use netlink to set neigh table into kernel, not overwrite the existing ones
-def set_neigh_in_kernel(ipclass, family, intf_idx, dst_ip, dmac):
-    log_info('Add neighbor entries: family: {}, intf_idx: {}, ip: {}, mac: {}'.format(
-    family, intf_idx, dst_ip, dmac))
-
+# Up to NEIGH_BATCH_SIZE RTM_NEWNEIGH messages are compiled into one buffer and
+# sent to kernel with a single netlink send, the ACKs of the whole batch are
+# collected afterwards.
+# Return the number of entries added and the number of entries already in kernel
+def set_neigh_in_kernel_bulk(ipclass, family, intf_idx, neigh_list):
     if family not in ip_family:
-        return
+        return 0, 0
 
     family_af_inet = ip_family[family]
-    # Add neighbor to kernel with "stale" state, we will send arp/ns packet later
-    # so if the neighbor is active, it will become "reachable", otherwise, it will
-    # stay at "stale" state and get aged out by kernel.
-    try :
-        ipclass.neigh('add',
-            family=family_af_inet,
-            dst=dst_ip,
-            lladdr=dmac,
-            ifindex=intf_idx,
-            state=ndmsg.states['stale'])
-
-    # If neigh exists, log it but no exception raise, other exceptions, raise
-    except NetlinkError as e:
-        if e[0] == errno.EEXIST:
-            log_warning('Neigh exists in kernel with family: {}, intf_idx: {}, ip: {}, mac: {}'.format(
-            family, intf_idx, dst_ip, dmac))
-        else:
-            raise
-
-# build ARP or NS packets depending on family
-def build_arp_ns_pkt(family, smac, src_ip, dst_ip):
+    added = 0
+    existed = 0
+    ipbatch = IPBatch()
+    for start in range(0, len(neigh_list), NEIGH_BATCH_SIZE):
+        batch = neigh_list[start:start + NEIGH_BATCH_SIZE]
+        # Add neighbor to kernel with "stale" state, we will send arp/ns packet later
+        # so if the neighbor is active, it will become "reachable", otherwise, it will
+        # stay at "stale" state and get aged out by kernel.
+        for dst_ip, dmac in batch:
+            ipbatch.neigh('add',
+                family=family_af_inet,
+                dst=dst_ip,
+                lladdr=dmac,
+                ifindex=intf_idx,
+                state=ndmsg.states['stale'])
+        ipclass.sendto(ipbatch.batch, (0, 0))
+        ipbatch.reset()
+
+        # one ACK per message, if neigh exists, count it but no exception raise,
+        # other errors, raise
+        acks = 0
+        while acks < len(batch):
+            for msg in ipclass.get():
+                if msg['header']['type'] != NLMSG_ERROR:
+                    continue
+                acks += 1
+                error = msg['header'].get('error', None)
+                if error is None:
+                    added += 1
+                elif error.code == errno.EEXIST:
+                    existed += 1
+                else:
+                    raise error
+    return added, existed
+
+def mac_to_bytes(mac):
+    return binascii.unhexlify(mac.replace(':', ''))
+
+# sum of 16-bit words for internet checksum, data length must be even
+def sum16(data):
+    return sum(struct.unpack('!%dH' % (len(data) // 2), data))
+
+def fold_checksum(csum):
+    while csum >> 16:
+        csum = (csum & 0xffff) + (csum >> 16)
+    return ~csum & 0xffff
+
+# build ARP or NS frames depending on family
+# The frames are built from a byte template per interface and family, only the
+# target ip, and for NS the solicited-node multicast address and the checksum,
+# are patched per neighbor.
+def build_arp_ns_frames(family, smac, src_ip, dst_ips):
+    smac_bytes = mac_to_bytes(smac)
     if family == 'IPv4':
-        eth = Ether(src=smac, dst='ff:ff:ff:ff:ff:ff')
-        pkt = eth/ARP(op='who-has', pdst=dst_ip, psrc=src_ip, hwsrc=smac)
+        # everything except the target protocol address
+        template = (b'\xff' * 6 + smac_bytes + struct.pack('!H', ETH_P_ARP) +
+                    struct.pack('!HHBBH', 1, ETH_P_IP, 6, 4, ARPOP_REQUEST) +
+                    smac_bytes + inet_pton(AF_INET, src_ip) + b'\x00' * 6)
+        for dst_ip in dst_ips:
+            yield template + inet_pton(AF_INET, dst_ip)
     elif family == 'IPv6':
-        nsma = in6_getnsma(inet_pton(AF_INET6, dst_ip))
-        mcast_dst_ip = inet_ntop(AF_INET6, nsma)
-        dmac = in6_getnsmac(nsma)
-        eth = Ether(src=smac,dst=dmac)
-        ipv6 = IPv6(src=src_ip, dst=mcast_dst_ip)
-        ns = ICMPv6ND_NS(tgt=dst_ip)
-        ns_opt = ICMPv6NDOptSrcLLAddr(lladdr=smac)
-        pkt = eth/ipv6/ns/ns_opt
-    return pkt
+        src_ip_bytes = inet_pton(AF_INET6, src_ip)
+        eth_tail = smac_bytes + struct.pack('!H', ETH_P_IPV6)
+        ipv6_hdr = struct.pack('!IHBB', 0x60000000, ICMPV6_NS_LEN, IPPROTO_ICMPV6, 255) + src_ip_bytes
+        ns_opt = struct.pack('!BB', ND_OPT_SOURCE_LINKADDR, 1) + smac_bytes
+        # checksum of pseudo header and ICMPv6 fields which are the same for all neighbors
+        base_csum = (sum16(src_ip_bytes) + ICMPV6_NS_LEN + IPPROTO_ICMPV6 +
+                     (ND_NEIGHBOR_SOLICIT << 8) + sum16(ns_opt))
+        for dst_ip in dst_ips:
+            tgt = inet_pton(AF_INET6, dst_ip)
+            nsma = SOLICITED_NODE_PREFIX + tgt[13:]
+            csum = fold_checksum(base_csum + sum16(tgt) + sum16(nsma))
+            yield (b'\x33\x33' + nsma[12:] + eth_tail + ipv6_hdr + nsma +
+                   struct.pack('!BBH4x', ND_NEIGHBOR_SOLICIT, 0, csum) + tgt + ns_opt)
+
+# Pace packets sent by all restore workers together at rate packets per second
+class RateLimiter(object):
+    def __init__(self, rate):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.next_time = monotonic.time.time()
+
+    # reserve the time slot for count packets and wait until it starts
+    def acquire(self, count):
+        if not self.rate:
+            return
+        with self.lock:
+            now = monotonic.time.time()
+            start_time = max(self.next_time, now)
+            self.next_time = start_time + float(count) / self.rate
+        if start_time > now:
+            time.sleep(start_time - now)
+
+# send frames through the packet socket, paced by the rate limiter
+def send_frames(s, frames, limiter):
+    sent = 0
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) == ARP_NS_PACE_BATCH:
+            limiter.acquire(len(batch))
+            for pkt in batch:
+                s.send(pkt)
+            sent += len(batch)
+            batch = []
+    if batch:
+        limiter.acquire(len(batch))
+        for pkt in batch:
+            s.send(pkt)
+        sent += len(batch)
+    return sent
+
+# Restore the neighbors of one interface, for the families given in
+# family_neigh_map: { family -> (src_ip, [(ip1, mac1), (ip2, mac2) ...]) }
+# The progress is published in stateDB "NEIGH_RESTORE_TABLE|<intf>" until the whole
+# restore is done.
+class IntfRestoreWorker(threading.Thread):
+    def __init__(self, intf, family_neigh_map, limiter, slots):
+        super(IntfRestoreWorker, self).__init__(name='restore_{}'.format(intf))
+        self.daemon = True
+        self.intf = intf
+        self.family_neigh_map = family_neigh_map
+        self.limiter = limiter
+        self.slots = slots
+        self.restored = 0
+        self.error = None
+
+    @staticmethod
+    def progress_key(intf):
+        return 'NEIGH_RESTORE_TABLE|{}'.format(intf)
+
+    def set_progress(self, db, state):
+        key = self.progress_key(self.intf)
+        db.set(db.STATE_DB, key, 'state', state)
+        db.set(db.STATE_DB, key, 'restored', str(self.restored))
+
+    def run(self):
+        db = swsssdk.SonicV2Connector(host='127.0.0.1')
+        db.connect(db.STATE_DB, False)
+        # each worker has its own netlink socket, so the ACKs are not mixed up
+        ipclass = IPRoute()
+        # create socket per intf to send packets
+        s = socket(AF_PACKET, SOCK_RAW)
+        try:
+            self.set_progress(db, 'restoring')
+            src_mac = netifaces.ifaddresses(self.intf)[netifaces.AF_LINK][0]['addr']
+            intf_idx = ipclass.link_lookup(ifname=self.intf)[0]
+            s.bind((self.intf, 0))
+            for family, (src_ip, neigh_list) in self.family_neigh_map.items():
+                # use netlink to set neighbor entries
+                added, existed = set_neigh_in_kernel_bulk(ipclass, family, intf_idx, neigh_list)
+                # sending arp/ns packet to update kernel neigh info
+                send_frames(s, build_arp_ns_frames(family, src_mac, src_ip,
+                                                   [dst_ip for dst_ip, dmac in neigh_list]), self.limiter)
+                log_info('Restored neighbors on intf: {}, intf_idx: {}, family: {}, added: {}, existed: {}'.format(
+                self.intf, intf_idx, family, added, existed))
+                self.restored += len(neigh_list)
+                self.set_progress(db, 'restoring')
+            self.set_progress(db, 'restored')
+        except Exception as e:
+            self.error = e
+            log_error('Failed to restore neighbors on intf {}: {}'.format(self.intf, str(e)))
+        finally:
+            s.close()
+            ipclass.close()
+            db.close(db.STATE_DB)
+            self.slots.release()
 
 # Set the statedb "NEIGH_RESTORE_TABLE|Flags", so neighsyncd can start reconciliation
 def set_statedb_neigh_restore_done():
@@ -220,54 +416,72 @@ def set_statedb_neigh_restore_done():
 # it will restore the neighbors per family.
 # The restoring process is done by setting the neighbors in kernel from saved entries
 # first, then sending arp/nd packets to update the neighbors.
-# Once all the entries are restored, this function is returned.
-# The interfaces' states were checked in a loop with an interval (CHECK_INTERVAL)
+# Interfaces are restored in parallel by up to MAX_RESTORE_WORKERS workers, the arp/nd
+# packets of all workers together are paced at ARP_NS_PKT_RATE, if set.
+# Once all the entries are restored and all workers are done, this function is returned.
+# The interfaces' states were checked again on every link/address change in kernel
+# (netlink notifications) and on every vlan member change in stateDB (keyspace
+# notifications), or after CHECK_INTERVAL if nothing changed.
 # The function will timeout in case interfaces' states never meet the condition
 # after some time (DEF_TIME_OUT).
 def restore_update_kernel_neighbors(intf_neigh_map, timeout=DEF_TIME_OUT):
-    # create object for netlink calls to kernel
-    ipclass = IPRoute()
+    # subscribe to link and address changes in kernel
+    ipmon = IPRoute()
+    ipmon.bind(groups=RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR)
     mtime = monotonic.time.time
     start_time = mtime()
-    is_intf_up.counter = 0
+    limiter = RateLimiter(ARP_NS_PKT_RATE)
+    slots = threading.Semaphore(MAX_RESTORE_WORKERS)
+    workers = []
     db = swsssdk.SonicV2Connector(host='127.0.0.1')
     db.connect(db.STATE_DB, False)
+    # subscribe to vlan member changes in stateDB
+    pubsub = db.get_redis_client(db.STATE_DB).pubsub()
+    pubsub.psubscribe('__keyspace@{}__:VLAN_MEMBER_TABLE|*'.format(db.get_dbid(db.STATE_DB)))
     while (mtime() - start_time) < timeout:
         for intf, family_neigh_map in intf_neigh_map.items():
             # only try to restore to kernel when link is up
             if is_intf_up(intf, db):
-                src_mac = get_if_hwaddr(intf)
-                intf_idx = ipclass.link_lookup(ifname=intf)[0]
-                # create socket per intf to send packets
-                s = conf.L2socket(iface=intf)
-
+                ready_neigh_map = {}
                 # Only two families: 'IPv4' and 'IPv6'
                 for family in ip_family.keys():
                     # if ip address assigned and if we have neighs in this family, restore them
                     src_ip = first_ip_on_intf(intf, family)
                     if src_ip and (family in family_neigh_map):
-                        neigh_list = family_neigh_map[family]
-                        for dst_ip, dmac in neigh_list:
-                            # use netlink to set neighbor entries
-                            set_neigh_in_kernel(ipclass, family, intf_idx, dst_ip, dmac)
-
-                            log_info('Sending Neigh with family: {}, intf_idx: {}, ip: {}, mac: {}'.format(
-                            family, intf_idx, dst_ip, dmac))
-                            # sending arp/ns packet to update kernel neigh info
-                            s.send(build_arp_ns_pkt(family, src_mac, src_ip, dst_ip))
+                        ready_neigh_map[family] = (src_ip, family_neigh_map[family])
                         # delete this family on the intf
                         del intf_neigh_map[intf][family]
-                # close the pkt socket
-                s.close()
+
+                if ready_neigh_map:
+                    slots.acquire()
+                    worker = IntfRestoreWorker(intf, ready_neigh_map, limiter, slots)
+                    worker.start()
+                    workers.append(worker)
 
                 # if all families are deleted, remove the key
                 if len(intf_neigh_map[intf]) == 0:
                     del intf_neigh_map[intf]
-        # map is empty, all neigh entries are restored
+        # map is empty, all neigh entries are handed to the workers
         if not intf_neigh_map:
             break
-        time.sleep(CHECK_INTERVAL)
+        wait_for_intf_event(ipmon, pubsub, min(CHECK_INTERVAL, timeout - (mtime() - start_time)))
+    pubsub.close()
+    ipmon.close()
+
+    restored = 0
+    for worker in workers:
+        worker.join()
+        restored += worker.restored
+    # the progress is only meaningful while restoring, don't leave it across warm reboots
+    for intf in set(worker.intf for worker in workers):
+        db.delete(db.STATE_DB, IntfRestoreWorker.progress_key(intf))
     db.close(db.STATE_DB)
+    elapsed = mtime() - start_time
+    log_info('Restored {} neighbors in {:.2f} seconds'.format(restored, elapsed))
+
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
 
 
 def main():
@@ -0,0 +1,142 @@
+#include <math.h>
+
+#include <algorithm>
+
+#include "consumerstats.h"
+
+using namespace std;
+using namespace swss;
+
+size_t LatencyHistogram::getBucket(uint64_t usec)
+{
+    if (usec == 0)
+    {
+        return 0;
+    }
+
+    size_t bucket = 64 - __builtin_clzll(usec);
+    return min(bucket, BUCKETS - 1);
+}
+
+void LatencyHistogram::add(uint64_t usec)
+{
+    m_count++;
+    m_total += usec;
+    m_max = max(m_max, usec);
+    m_buckets[getBucket(usec)]++;
+}
+
+uint64_t LatencyHistogram::getPercentile(double percentile) const
+{
+    if (m_count == 0)
+    {
+        return 0;
+    }
+
+    /* Nearest rank of the percentile, at least the first sample */
+    uint64_t rank = max<uint64_t>((uint64_t)ceil(percentile / 100 * m_count), 1);
+
+    uint64_t seen = 0;
+    for (size_t i = 0; i < BUCKETS - 1; i++)
+    {
+        seen += m_buckets[i];
+        if (seen >= rank)
+        {
+            return min<uint64_t>(1ULL << i, m_max);
+        }
+    }
+
+    return m_max;
+}
+
+string LatencyHistogram::dumpBuckets() const
+{
+    size_t size = BUCKETS;
+    while (size > 1 && m_buckets[size - 1] == 0)
+    {
+        size--;
+    }
+
+    string s;
+    for (size_t i = 0; i < size; i++)
+    {
+        if (i)
+        {
+            s += ",";
+        }
+        s += to_string(m_buckets[i]);
+    }
+
+    return s;
+}
+
+void ConsumerStats::addPops(clock::time_point start, size_t count)
+{
+    m_pops.add(elapsed(start));
+    m_popped += count;
+}
+
+void ConsumerStats::addToSync(clock::time_point start, size_t count, size_t depth)
+{
+    m_addToSync.add(elapsed(start));
+    m_added += count;
+    m_depth = depth;
+    m_maxDepth = max(m_maxDepth, depth);
+}
+
+void ConsumerStats::addDoTask(clock::time_point start, size_t before, size_t after, uint64_t parkedBefore)
+{
+    m_doTask.add(elapsed(start));
+
+    /*
+     * doTask() may also add tasks, only count the ones that went away. The tasks parked by
+     * doTask() went away without being done, the ones unparked into m_toSync were added.
+     */
+    uint64_t total = before + parkedBefore;
+    uint64_t left = after + getParkedDepth();
+    if (total > left)
+    {
+        m_done += total - left;
+    }
+    m_retries += after;
+    m_depth = after;
+    m_maxDepth = max(m_maxDepth, after);
+}
+
+void ConsumerStats::addParked()
+{
+    m_parked++;
+}
+
+void ConsumerStats::addUnparked(size_t count)
+{
+    m_unparked += count;
+    m_added += count;
+}
+
+void ConsumerStats::dumpLatency(vector<FieldValueTuple> &fvs, const string &name,
+                                const LatencyHistogram &histogram)
+{
+    fvs.emplace_back(name + "_count", to_string(histogram.getCount()));
+    fvs.emplace_back(name + "_total_us", to_string(histogram.getTotal()));
+    fvs.emplace_back(name + "_max_us", to_string(histogram.getMax()));
+    fvs.emplace_back(name + "_p50_us", to_string(histogram.getPercentile(50)));
+    fvs.emplace_back(name + "_p99_us", to_string(histogram.getPercentile(99)));
+    fvs.emplace_back(name + "_histogram", histogram.dumpBuckets());
+}
+
+void ConsumerStats::dump(vector<FieldValueTuple> &fvs) const
+{
+    fvs.emplace_back("popped", to_string(m_popped));
+    fvs.emplace_back("added", to_string(m_added));
+    fvs.emplace_back("done", to_string(m_done));
+    fvs.emplace_back("retries", to_string(m_retries));
+    fvs.emplace_back("parked_total", to_string(m_parked));
+    fvs.emplace_back("unparked_total", to_string(m_unparked));
+    fvs.emplace_back("depth", to_string(m_depth));
+    fvs.emplace_back("max_depth", to_string(m_maxDepth));
+
+    dumpLatency(fvs, "pops", m_pops);
+    dumpLatency(fvs, "add_to_sync", m_addToSync);
+    dumpLatency(fvs, "do_task", m_doTask);
+}
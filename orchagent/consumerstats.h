@@ -0,0 +1,168 @@
+#ifndef SWSS_CONSUMERSTATS_H
+#define SWSS_CONSUMERSTATS_H
+
+#include <stdint.h>
+
+#include <chrono>
+#include <string>
+#include <vector>
+
+#include "table.h"
+
+/*
+ * Latency histogram with power of two buckets in microseconds.
+ *
+ * Bucket 0 counts samples below 1us, bucket i counts samples in [2^(i-1), 2^i) us and the
+ * last bucket counts everything above. Adding a sample is a few integer operations, so the
+ * histograms can stay enabled on the hot path.
+ */
+class LatencyHistogram
+{
+public:
+    static const size_t BUCKETS = 24;
+
+    void add(uint64_t usec);
+
+    uint64_t getCount() const
+    {
+        return m_count;
+    }
+
+    uint64_t getTotal() const
+    {
+        return m_total;
+    }
+
+    uint64_t getMax() const
+    {
+        return m_max;
+    }
+
+    /* Upper bound of the bucket containing the given percentile, 0 when empty */
+    uint64_t getPercentile(double percentile) const;
+
+    /* Bucket counts separated by commas, trailing empty buckets are omitted */
+    std::string dumpBuckets() const;
+
+    static size_t getBucket(uint64_t usec);
+
+private:
+    uint64_t m_count = 0;
+    uint64_t m_total = 0;
+    uint64_t m_max = 0;
+    uint64_t m_buckets[BUCKETS] = {};
+};
+
+/*
+ * Hot path statistics of a Consumer: how many tasks went through it, how long pops(),
+ * addToSync() and doTask() took, how deep m_toSync grew and how often tasks were left in
+ * m_toSync to be retried.
+ *
+ * A parked task leaves m_toSync without being done and is added again when it is unparked,
+ * so once doTask() returns, added == done + parked_total + depth.
+ */
+class ConsumerStats
+{
+public:
+    typedef std::chrono::steady_clock clock;
+
+    static uint64_t elapsed(clock::time_point start)
+    {
+        return std::chrono::duration_cast<std::chrono::microseconds>(clock::now() - start).count();
+    }
+
+    void addPops(clock::time_point start, size_t count);
+    void addToSync(clock::time_point start, size_t count, size_t depth);
+    /* parkedBefore is getParkedDepth() before doTask() ran */
+    void addDoTask(clock::time_point start, size_t before, size_t after, uint64_t parkedBefore);
+    void addParked();
+    void addUnparked(size_t count);
+
+    uint64_t getPopped() const
+    {
+        return m_popped;
+    }
+
+    uint64_t getAdded() const
+    {
+        return m_added;
+    }
+
+    uint64_t getDone() const
+    {
+        return m_done;
+    }
+
+    uint64_t getRetries() const
+    {
+        return m_retries;
+    }
+
+    uint64_t getParked() const
+    {
+        return m_parked;
+    }
+
+    uint64_t getUnparked() const
+    {
+        return m_unparked;
+    }
+
+    /* Tasks parked and not unparked yet */
+    uint64_t getParkedDepth() const
+    {
+        return m_parked - m_unparked;
+    }
+
+    size_t getDepth() const
+    {
+        return m_depth;
+    }
+
+    size_t getMaxDepth() const
+    {
+        return m_maxDepth;
+    }
+
+    const LatencyHistogram &getPopsLatency() const
+    {
+        return m_pops;
+    }
+
+    const LatencyHistogram &getAddToSyncLatency() const
+    {
+        return m_addToSync;
+    }
+
+    const LatencyHistogram &getDoTaskLatency() const
+    {
+        return m_doTask;
+    }
+
+    void dump(std::vector<swss::FieldValueTuple> &fvs) const;
+
+private:
+    static void dumpLatency(std::vector<swss::FieldValueTuple> &fvs, const std::string &name,
+                            const LatencyHistogram &histogram);
+
+    /* Tasks popped from the table */
+    uint64_t m_popped = 0;
+    /* Tasks added to m_toSync, including the ones refilled from the table and the unparked ones */
+    uint64_t m_added = 0;
+    /* Tasks removed from m_toSync by doTask(), not counting the parked ones */
+    uint64_t m_done = 0;
+    /* Tasks moved out of m_toSync by Consumer::park(), and moved back */
+    uint64_t m_parked = 0;
+    uint64_t m_unparked = 0;
+    /* Tasks left in m_toSync by doTask(), summed over every doTask() */
+    uint64_t m_retries = 0;
+
+    size_t m_depth = 0;
+    size_t m_maxDepth = 0;
+
+    LatencyHistogram m_pops;
+    LatencyHistogram m_addToSync;
+    LatencyHistogram m_doTask;
+};
+
+#endif /* SWSS_CONSUMERSTATS_H */
@@ -975,6 +975,8 @@ bool IntfsOrch::addRouterIntfs(sai_object_id_t vrf_id, Port &port)
 
     SWSS_LOG_NOTICE("Create router interface %s MTU %u", port.m_alias.c_str(), port.m_mtu);
 
+    Orch::resolveDependency(rif_dependency_prefix + port.m_alias);
+
     return true;
 }
 
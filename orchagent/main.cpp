@@ -29,6 +29,7 @@ extern "C" {
 #include <signal.h>
 #include "warm_restart.h"
 #include "gearboxutils.h"
+#include "swssrecorder.h"
 
 using namespace std;
 using namespace swss;
@@ -59,12 +60,11 @@ char *gAsicInstance = NULL;
 
 extern bool gIsNatSupported;
 
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 
 void usage()
 {
-    cout << "usage: orchagent [-h] [-r record_type] [-d record_location] [-b batch_size] [-m MAC] [-i INST_ID] [-s]" << endl;
+    cout << "usage: orchagent [-h] [-r record_type] [-d record_location] [-f record_format] [-b batch_size] [-m MAC] [-i INST_ID] [-s]" << endl;
     cout << "    -h: display this message" << endl;
     cout << "    -r record_type: record orchagent logs with type (default 3)" << endl;
     cout << "                    0: do not record logs" << endl;
@@ -72,6 +72,9 @@ void usage()
     cout << "                    2: record SwSS task sequence as swss.rec" << endl;
     cout << "                    3: enable both above two records" << endl;
     cout << "    -d record_location: set record logs folder location (default .)" << endl;
+    cout << "    -f record_format: set SwSS task sequence record format (default text)" << endl;
+    cout << "                      text: record as swss.rec" << endl;
+    cout << "                      binary: record as swss.rec.bin, convert it to text with swssrec2text" << endl;
     cout << "    -b batch_size: set consumer table pop operation batch size (default 128)" << endl;
     cout << "    -m MAC: set switch MAC address" << endl;
     cout << "    -i INST_ID: set the ASIC instance_id in multi-asic platform" << endl;
@@ -159,8 +162,9 @@ int main(int argc, char **argv)
     sai_status_t status;
 
     string record_location = ".";
+    SwssRecorder::Format record_format = SwssRecorder::Format::TEXT;
 
-    while ((opt = getopt(argc, argv, "b:m:r:d:i:hs")) != -1)
+    while ((opt = getopt(argc, argv, "b:m:r:d:f:i:hs")) != -1)
     {
         switch (opt)
         {
@@ -206,6 +210,21 @@ int main(int argc, char **argv)
                 exit(EXIT_FAILURE);
             }
             break;
+        case 'f':
+            if (!strcmp(optarg, "text"))
+            {
+                record_format = SwssRecorder::Format::TEXT;
+            }
+            else if (!strcmp(optarg, "binary"))
+            {
+                record_format = SwssRecorder::Format::BINARY;
+            }
+            else
+            {
+                usage();
+                exit(EXIT_FAILURE);
+            }
+            break;
         case 'h':
             usage();
             exit(EXIT_SUCCESS);
@@ -237,14 +256,14 @@ int main(int argc, char **argv)
     /* Disable/enable SwSS recording */
     if (gSwssRecord)
     {
-        gRecordFile = record_location + "/" + "swss.rec";
-        gRecordOfs.open(gRecordFile, std::ofstream::out | std::ofstream::app);
-        if (!gRecordOfs.is_open())
+        string record_file = record_location + "/" +
+                             (record_format == SwssRecorder::Format::BINARY ? "swss.rec.bin" : "swss.rec");
+        if (!gSwssRecorder.start(record_file, record_format))
         {
-            SWSS_LOG_ERROR("Failed to open SwSS recording file %s", gRecordFile.c_str());
+            SWSS_LOG_ERROR("Failed to open SwSS recording file %s", record_file.c_str());
             exit(EXIT_FAILURE);
         }
-        gRecordOfs << getTimestamp() << "|recording started" << endl;
+        gSwssRecorder.recordLine("recording started");
     }
 
     attr.id = SAI_SWITCH_ATTR_PORT_STATE_CHANGE_NOTIFY;
@@ -77,6 +77,8 @@ bool NeighOrch::addNextHop(const IpAddress &ipAddress, const string &alias)
 
     m_intfsOrch->increaseRouterIntfsRefCount(alias);
 
+    Orch::resolveDependency(nexthop_dependency_prefix + nexthop.to_string());
+
     if (ipAddress.isV4())
     {
         gCrmOrch->incCrmResUsedCounter(CrmResourceType::CRM_IPV4_NEXTHOP);
@@ -324,17 +326,18 @@ void NeighOrch::doTask(Consumer &consumer)
         if (op == SET_COMMAND)
         {
             Port p;
+            /* Wait for IntfsOrch to add the router interface */
             if (!gPortsOrch->getPort(alias, p))
             {
                 SWSS_LOG_INFO("Port %s doesn't exist", alias.c_str());
-                it++;
+                it = consumer.park(it, rif_dependency_prefix + alias);
                 continue;
             }
 
             if (!p.m_rif_id)
             {
                 SWSS_LOG_INFO("Router interface doesn't exist on %s", alias.c_str());
-                it++;
+                it = consumer.park(it, rif_dependency_prefix + alias);
                 continue;
             }
 
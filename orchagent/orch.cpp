@@ -1,5 +1,6 @@
 #include <fstream>
 #include <iostream>
+#include <set>
 #include <inttypes.h>
 #include <sys/time.h>
 #include "timestamp.h"
@@ -10,15 +11,18 @@
 #include "tokenize.h"
 #include "logger.h"
 #include "consumerstatetable.h"
+#include "swssrecorder.h"
 
 using namespace swss;
 
 extern int gBatchSize;
 
 extern bool gSwssRecord;
-extern ofstream gRecordOfs;
+extern SwssRecorder gSwssRecorder;
 extern bool gLogRotate;
-extern string gRecordFile;
+
+/* Consumers which have parked tasks */
+static std::set<Consumer *> parkingConsumers;
 
 Orch::Orch(DBConnector *db, const string tableName, int pri)
 {
@@ -51,10 +55,6 @@ Orch::Orch(const vector<TableConnector>& tables)
 
 Orch::~Orch()
 {
-    if (gRecordOfs.is_open())
-    {
-        gRecordOfs.close();
-    }
 }
 
 vector<Selectable *> Orch::getSelectables()
@@ -67,6 +67,11 @@ vector<Selectable *> Orch::getSelectables()
     return selectables;
 }
 
+Consumer::~Consumer()
+{
+    parkingConsumers.erase(this);
+}
+
 void Consumer::addToSync(const KeyOpFieldsValuesTuple &entry)
 {
     SWSS_LOG_ENTER();
@@ -81,6 +86,12 @@ void Consumer::addToSync(const KeyOpFieldsValuesTuple &entry)
         Orch::recordTuple(*this, entry);
     }
 
+    /* The new task has to be merged with the parked one */
+    if (!m_parkedKeys.empty())
+    {
+        unparkKey(key);
+    }
+
     /*
     * m_toSync is a multimap which will allow one key with multiple values,
     * Also, the order of the key-value pairs whose keys compare equivalent
@@ -158,11 +169,15 @@ size_t Consumer::addToSync(const std::deque<KeyOpFieldsValuesTuple> &entries)
 {
     SWSS_LOG_ENTER();
 
+    auto start = ConsumerStats::clock::now();
+
     for (auto& entry: entries)
     {
         addToSync(entry);
     }
 
+    m_stats.addToSync(start, entries.size(), m_toSync.size());
+
     return entries.size();
 }
 
@@ -215,7 +230,10 @@ void Consumer::execute()
     SWSS_LOG_ENTER();
 
     std::deque<KeyOpFieldsValuesTuple> entries;
+
+    auto start = ConsumerStats::clock::now();
     getConsumerTable()->pops(entries);
+    m_stats.addPops(start, entries.size());
 
     addToSync(entries);
 
@@ -224,8 +242,115 @@ void Consumer::execute()
 
 void Consumer::drain()
 {
-    if (!m_toSync.empty())
-        m_orch->doTask(*this);
+    if (m_toSync.empty())
+        return;
+
+    size_t pending = m_toSync.size();
+    uint64_t parked = m_stats.getParkedDepth();
+    auto start = ConsumerStats::clock::now();
+
+    m_orch->doTask(*this);
+
+    m_stats.addDoTask(start, pending, m_toSync.size(), parked);
+}
+
+SyncMap::iterator Consumer::park(SyncMap::iterator it, const string &dependency)
+{
+    SWSS_LOG_ENTER();
+
+    const string &key = it->first;
+
+    /* Keep all the parked tasks of a key together so that their order is kept */
+    auto parked = m_parkedKeys.emplace(key, dependency).first;
+
+    SWSS_LOG_INFO("Park task %s:%s until %s is resolved",
+                  getTableName().c_str(), key.c_str(), parked->second.c_str());
+
+    m_parked[parked->second].emplace(key, std::move(it->second));
+    parkingConsumers.insert(this);
+    m_stats.addParked();
+
+    return m_toSync.erase(it);
+}
+
+size_t Consumer::unpark(const string &dependency)
+{
+    auto parked = m_parked.find(dependency);
+    if (parked == m_parked.end())
+    {
+        return 0;
+    }
+
+    size_t count = parked->second.size();
+    for (auto &task : parked->second)
+    {
+        m_parkedKeys.erase(task.first);
+        m_toSync.emplace(task.first, std::move(task.second));
+    }
+
+    m_parked.erase(parked);
+    if (m_parked.empty())
+    {
+        parkingConsumers.erase(this);
+    }
+
+    m_stats.addUnparked(count);
+    return count;
+}
+
+size_t Consumer::unparkAll()
+{
+    size_t count = 0;
+    while (!m_parked.empty())
+    {
+        string dependency = m_parked.begin()->first;
+        count += unpark(dependency);
+    }
+
+    return count;
+}
+
+void Consumer::unparkKey(const string &key)
+{
+    auto parkedKey = m_parkedKeys.find(key);
+    if (parkedKey == m_parkedKeys.end())
+    {
+        return;
+    }
+
+    auto parked = m_parked.find(parkedKey->second);
+    auto range = parked->second.equal_range(key);
+    size_t count = 0;
+    for (auto it = range.first; it != range.second; it++)
+    {
+        m_toSync.emplace(key, std::move(it->second));
+        count++;
+    }
+
+    parked->second.erase(range.first, range.second);
+    if (parked->second.empty())
+    {
+        m_parked.erase(parked);
+    }
+    m_parkedKeys.erase(parkedKey);
+
+    if (m_parked.empty())
+    {
+        parkingConsumers.erase(this);
+    }
+
+    m_stats.addUnparked(count);
+}
+
+size_t Consumer::getParkedCount() const
+{
+    size_t count = 0;
+    for (const auto &parked : m_parked)
+    {
+        count += parked.second.size();
+    }
+
+    return count;
 }
 
 string Consumer::dumpTuple(const KeyOpFieldsValuesTuple &tuple)
@@ -250,6 +375,14 @@ void Consumer::dumpPendingTasks(vector<string> &ts)
 
         ts.push_back(s);
     }
+
+    for (auto &parked : m_parked)
+    {
+        for (auto &tm : parked.second)
+        {
+            ts.push_back(dumpTuple(tm.second));
+        }
+    }
 }
 
 size_t Orch::addExistingData(const string& tableName)
@@ -435,30 +568,67 @@ void Orch::dumpPendingTasks(vector<string> &ts)
     }
 }
 
-void Orch::logfileReopen()
+void Orch::dumpConsumerStats(vector<KeyOpFieldsValuesTuple> &stats)
+{
+    for (auto &it : m_consumerMap)
+    {
+        Consumer* consumer = dynamic_cast<Consumer *>(it.second.get());
+        if (consumer == NULL)
+        {
+            continue;
+        }
+
+        KeyOpFieldsValuesTuple tuple;
+        kfvKey(tuple) = consumer->getDbName() + delimiter + consumer->getTableName();
+        kfvOp(tuple) = SET_COMMAND;
+        consumer->getStats().dump(kfvFieldsValues(tuple));
+        kfvFieldsValues(tuple).emplace_back("parked", to_string(consumer->getParkedCount()));
+        stats.push_back(tuple);
+    }
+}
+
+void Orch::resolveDependency(const string &dependency)
 {
-    gRecordOfs.close();
+    SWSS_LOG_ENTER();
 
-    /*
-     * On log rotate we will use the same file name, we are assuming that
-     * logrotate deamon move filename to filename.1 and we will create new
-     * empty file here.
-     */
+    /* Unparking may remove the consumer from the set */
+    for (auto it = parkingConsumers.begin(); it != parkingConsumers.end();)
+    {
+        Consumer *consumer = *it++;
+
+        size_t count = consumer->unpark(dependency);
+        if (count)
+        {
+            SWSS_LOG_INFO("Retry %zu tasks of %s, %s is resolved",
+                          count, consumer->getTableName().c_str(), dependency.c_str());
+        }
+    }
+}
 
-    gRecordOfs.open(gRecordFile);
+void Orch::retryParkedTasks()
+{
+    SWSS_LOG_ENTER();
 
-    if (!gRecordOfs.is_open())
+    for (auto it = parkingConsumers.begin(); it != parkingConsumers.end();)
     {
-        SWSS_LOG_ERROR("failed to open gRecordOfs file %s: %s", gRecordFile.c_str(), strerror(errno));
-        return;
+        Consumer *consumer = *it++;
+
+        size_t count = consumer->unparkAll();
+        SWSS_LOG_INFO("Retry %zu parked tasks of %s", count, consumer->getTableName().c_str());
     }
 }
 
-void Orch::recordTuple(Consumer &consumer, const KeyOpFieldsValuesTuple &tuple)
+void Orch::logfileReopen()
 {
-    string s = consumer.dumpTuple(tuple);
+    /* The file is reopened by the recorder's writer thread */
+    gSwssRecorder.reopen();
+}
 
-    gRecordOfs << getTimestamp() << "|" << s << endl;
+void Orch::recordTuple(Consumer &consumer, const KeyOpFieldsValuesTuple &tuple)
+{
+    /* Formatting and writing the record is done by the recorder's writer thread */
+    gSwssRecorder.record(consumer.getTableName() + consumer.getConsumerTable()->getTableNameSeparator(),
+                         tuple);
 
     if (gLogRotate)
     {
@@ -19,6 +19,7 @@ extern "C" {
 #include "notificationconsumer.h"
 #include "selectabletimer.h"
 #include "macaddress.h"
+#include "consumerstats.h"
 
 const char delimiter           = ':';
 const char list_item_delimiter = ',';
@@ -29,6 +30,11 @@ const char range_specifier     = '-';
 const char config_db_key_delimiter = '|';
 const char state_db_key_delimiter  = '|';
 
+/* Prefixes of the dependencies tasks can be parked on, see Consumer::park() */
+const std::string nexthop_dependency_prefix = "NEXTHOP:";
+const std::string vrf_dependency_prefix     = "VRF:";
+const std::string rif_dependency_prefix     = "RIF:";
+
 #define INVM_PLATFORM_SUBSTRING "innovium"
 #define MLNX_PLATFORM_SUBSTRING "mellanox"
 #define BRCM_PLATFORM_SUBSTRING "broadcom"
@@ -121,6 +127,8 @@ public:
     {
     }
 
+    ~Consumer();
+
     swss::ConsumerTableBase *getConsumerTable() const
     {
         return static_cast<swss::ConsumerTableBase *>(getSelectable());
@@ -157,6 +165,35 @@ public:
 
     // Returns: the number of entries added to m_toSync
     size_t addToSync(const std::deque<swss::KeyOpFieldsValuesTuple> &entries);
+
+    const ConsumerStats &getStats() const
+    {
+        return m_stats;
+    }
+
+    /*
+     * Move a task which can't be done before a dependency is resolved, e.g. a route waiting
+     * for its next hop, out of m_toSync. Parked tasks are not retried by doTask() until
+     * Orch::resolveDependency() is called for the dependency or Orch::retryParkedTasks()
+     * runs. A new task for a parked key moves the parked task back first.
+     * Returns the iterator following the parked task, like m_toSync.erase().
+     */
+    SyncMap::iterator park(SyncMap::iterator it, const std::string &dependency);
+
+    // Returns: the number of tasks moved back to m_toSync
+    size_t unpark(const std::string &dependency);
+    size_t unparkAll();
+
+    size_t getParkedCount() const;
+
+private:
+    void unparkKey(const std::string &key);
+
+    ConsumerStats m_stats;
+
+    /* Parked tasks by dependency, and the dependency of each parked key */
+    std::map<std::string, SyncMap> m_parked;
+    std::unordered_map<std::string, std::string> m_parkedKeys;
 };
 
 typedef std::map<std::string, std::shared_ptr<Executor>> ConsumerMap;
@@ -206,7 +243,13 @@ public:
     /* TODO: refactor recording */
     static void recordTuple(Consumer &consumer, const swss::KeyOpFieldsValuesTuple &tuple);
 
+    /* Move the tasks parked on the dependency back to their consumer, see Consumer::park() */
+    static void resolveDependency(const std::string &dependency);
+    /* Move every parked task back, in case a dependency was resolved without notification */
+    static void retryParkedTasks();
+
     void dumpPendingTasks(std::vector<std::string> &ts);
+    void dumpConsumerStats(std::vector<swss::KeyOpFieldsValuesTuple> &stats);
 protected:
     ConsumerMap m_consumerMap;
 
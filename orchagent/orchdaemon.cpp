@@ -16,6 +16,11 @@ using namespace swss;
 /* select() function timeout retry time */
 #define SELECT_TIMEOUT 1000
 #define PFC_WD_POLL_MSECS 100
+/* How often the Consumer statistics are written to COUNTERS_DB, in seconds */
+#define CONSUMER_STATS_INTERVAL 10
+#define CONSUMER_STATS_TABLE "ORCH_CONSUMER_STATS"
+/* How often the tasks parked on a dependency are retried anyway, in seconds */
+#define PARKED_TASKS_RETRY_INTERVAL 5
 
 extern sai_switch_api_t*           sai_switch_api;
 extern sai_object_id_t             gSwitchId;
@@ -42,7 +47,9 @@ bool gIsNatSupported = false;
 OrchDaemon::OrchDaemon(DBConnector *applDb, DBConnector *configDb, DBConnector *stateDb) :
         m_applDb(applDb),
         m_configDb(configDb),
-        m_stateDb(stateDb)
+        m_stateDb(stateDb),
+        m_countersDb(NULL),
+        m_consumerStatsTable(NULL)
 {
     SWSS_LOG_ENTER();
 }
@@ -64,6 +71,9 @@ OrchDaemon::~OrchDaemon()
     for(; it != m_orchList.rend(); ++it) {
         delete(*it);
     }
+
+    delete m_consumerStatsTable;
+    delete m_countersDb;
 }
 
 bool OrchDaemon::init()
@@ -436,6 +446,55 @@ void OrchDaemon::flush()
     }
 }
 
+/*
+ * Write the hot path statistics of every Consumer to COUNTERS_DB, at most once per
+ * CONSUMER_STATS_INTERVAL. Keys are "<db name>:<table name>".
+ */
+void OrchDaemon::publishConsumerStats()
+{
+    auto now = chrono::steady_clock::now();
+    if (now - m_consumerStatsPublished < chrono::seconds(CONSUMER_STATS_INTERVAL))
+    {
+        return;
+    }
+    m_consumerStatsPublished = now;
+
+    if (m_consumerStatsTable == NULL)
+    {
+        m_countersDb = new DBConnector("COUNTERS_DB", 0);
+        m_consumerStatsTable = new Table(m_countersDb, CONSUMER_STATS_TABLE);
+    }
+
+    vector<KeyOpFieldsValuesTuple> stats;
+    for (Orch *o : m_orchList)
+    {
+        o->dumpConsumerStats(stats);
+    }
+
+    for (const auto &tuple : stats)
+    {
+        m_consumerStatsTable->set(kfvKey(tuple), kfvFieldsValues(tuple));
+    }
+}
+
+/*
+ * Fallback for the tasks parked on a dependency: move all of them back to their consumer
+ * every PARKED_TASKS_RETRY_INTERVAL, in case the dependency was resolved by a path which
+ * doesn't call Orch::resolveDependency(). Returns true if the tasks were moved.
+ */
+bool OrchDaemon::retryParkedTasks()
+{
+    auto now = chrono::steady_clock::now();
+    if (now - m_parkedTasksRetried < chrono::seconds(PARKED_TASKS_RETRY_INTERVAL))
+    {
+        return false;
+    }
+    m_parkedTasksRetried = now;
+
+    Orch::retryParkedTasks();
+    return true;
+}
+
 void OrchDaemon::start()
 {
     SWSS_LOG_ENTER();
@@ -460,14 +519,27 @@ void OrchDaemon::start()
 
         if (ret == Select::TIMEOUT)
         {
+            if (retryParkedTasks())
+            {
+                for (Orch *o : m_orchList)
+                    o->doTask();
+
+                flush();
+            }
+
+            publishConsumerStats();
             continue;
         }
 
         auto *c = (Executor *)s;
         c->execute();
 
+        retryParkedTasks();
+
         /* After each iteration, periodically check all m_toSync map to
-         * execute all the remaining tasks that need to be retried. */
+         * execute all the remaining tasks that need to be retried.
+         * Tasks parked on a missing dependency are not in m_toSync, they
+         * are moved back when the dependency is resolved. */
 
         /* TODO: Abstract Orch class to have a specific todo list */
         for (Orch *o : m_orchList)
@@ -481,6 +553,8 @@ void OrchDaemon::start()
          */
         flush();
 
+        publishConsumerStats();
+
         /*
          * Asked to check warm restart readiness.
          * Not doing this under Select::TIMEOUT condition because of
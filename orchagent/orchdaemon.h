@@ -6,6 +6,8 @@
 #include "consumertable.h"
 #include "select.h"
 
+#include <chrono>
+
 #include "portsorch.h"
 #include "intfsorch.h"
 #include "neighorch.h"
@@ -55,7 +57,14 @@ private:
     std::vector<Orch *> m_orchList;
     Select *m_select;
 
+    DBConnector *m_countersDb;
+    Table *m_consumerStatsTable;
+    std::chrono::steady_clock::time_point m_consumerStatsPublished;
+    std::chrono::steady_clock::time_point m_parkedTasksRetried;
+
     void flush();
+    void publishConsumerStats();
+    bool retryParkedTasks();
 };
 
 #endif /* SWSS_ORCHDAEMON_H */
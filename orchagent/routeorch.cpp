@@ -463,7 +463,7 @@ void RouteOrch::doTask(Consumer& consumer)
 
                 if (!m_vrfOrch->isVRFexists(vrf_name))
                 {
-                    it++;
+                    it = consumer.park(it, vrf_dependency_prefix + vrf_name);
                     continue;
                 }
                 vrf_id = m_vrfOrch->getVRFid(vrf_name);
@@ -589,7 +589,11 @@ void RouteOrch::doTask(Consumer& consumer)
                     m_syncdRoutes.at(vrf_id).find(ip_prefix) == m_syncdRoutes.at(vrf_id).end() ||
                     m_syncdRoutes.at(vrf_id).at(ip_prefix) != nhg)
                 {
-                    if (addRoute(ctx, nhg))
+                    string dependency;
+                    if (isNextHopMissing(nhg, dependency))
+                        /* Wait for NeighOrch to add the next hop */
+                        it = consumer.park(it, dependency);
+                    else if (addRoute(ctx, nhg))
                         it = consumer.m_toSync.erase(it);
                     else
                         it++;
@@ -1061,6 +1065,28 @@ void RouteOrch::addTempRoute(RouteBulkContext& ctx, const NextHopGroupKey &nextH
     addRoute(ctx, tmp_next_hop);
 }
 
+/*
+ * Check if a route pointing to a single next hop can't be added because NeighOrch doesn't
+ * have the next hop yet, and get the dependency to park the route on. Next hop groups are
+ * not parked since a temporary route may be added while some members are missing.
+ */
+bool RouteOrch::isNextHopMissing(const NextHopGroupKey &nextHops, string &dependency)
+{
+    if (nextHops.getSize() != 1)
+    {
+        return false;
+    }
+
+    NextHopKey nexthop(nextHops.to_string());
+    if (nexthop.ip_address.isZero() || nexthop.alias.empty() || m_neighOrch->hasNextHop(nexthop))
+    {
+        return false;
+    }
+
+    dependency = nexthop_dependency_prefix + nexthop.to_string();
+    return true;
+}
+
 bool RouteOrch::addRoute(RouteBulkContext& ctx, const NextHopGroupKey &nextHops)
 {
     SWSS_LOG_ENTER();
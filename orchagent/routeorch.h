@@ -125,6 +125,7 @@ private:
     ObjectBulker<sai_next_hop_group_api_t>  gNextHopGroupMemberBulker;
 
     void addTempRoute(RouteBulkContext& ctx, const NextHopGroupKey&);
+    bool isNextHopMissing(const NextHopGroupKey&, string &dependency);
     bool addRoute(RouteBulkContext& ctx, const NextHopGroupKey&);
     bool addRoutePost(const RouteBulkContext& ctx, const NextHopGroupKey &nextHops);
     bool removeRoute(RouteBulkContext& ctx);
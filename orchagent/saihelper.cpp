@@ -55,8 +55,6 @@ sai_nat_api_t*              sai_nat_api;
 extern sai_object_id_t gSwitchId;
 extern bool gSairedisRecord;
 extern bool gSwssRecord;
-extern ofstream gRecordOfs;
-extern string gRecordFile;
 
 static map<string, sai_switch_hardware_access_bus_t> hardware_access_map =
 {
@@ -0,0 +1,41 @@
+#include <fstream>
+#include <iostream>
+
+#include "swssrecorder.h"
+
+using namespace std;
+
+void usage()
+{
+    cout << "Usage: swssrec2text [FILE]" << endl;
+    cout << "       Convert a binary swss.rec recording (or standard input) to the text format" << endl;
+}
+
+int main(int argc, char **argv)
+{
+    if (argc > 2 || (argc == 2 && string(argv[1]) == "-h"))
+    {
+        usage();
+        return argc == 2 ? EXIT_SUCCESS : EXIT_FAILURE;
+    }
+
+    if (argc == 1)
+    {
+        return SwssRecorder::convertToText(cin, cout) ? EXIT_SUCCESS : EXIT_FAILURE;
+    }
+
+    ifstream in(argv[1], ifstream::binary);
+    if (!in)
+    {
+        cerr << "Failed to open file " << argv[1] << endl;
+        return EXIT_FAILURE;
+    }
+
+    if (!SwssRecorder::convertToText(in, cout))
+    {
+        cerr << "Invalid or truncated binary recording " << argv[1] << endl;
+        return EXIT_FAILURE;
+    }
+
+    return EXIT_SUCCESS;
+}
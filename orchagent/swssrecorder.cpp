@@ -0,0 +1,374 @@
+#include <inttypes.h>
+#include <string.h>
+#include <time.h>
+
+#include <chrono>
+#include <istream>
+#include <ostream>
+
+#include "logger.h"
+#include "swssrecorder.h"
+
+using namespace std;
+using namespace swss;
+
+/* How long the writer thread sleeps when the ring is empty */
+#define RECORDER_IDLE_INTERVAL_MS 10
+
+/* Frame types of the binary format */
+#define FRAME_TUPLE 0
+#define FRAME_LINE  1
+
+const char SwssRecorder::BINARY_MAGIC[8] = { 'S', 'W', 'S', 'S', 'R', 'E', 'C', '1' };
+
+SwssRecorder::~SwssRecorder()
+{
+    stop();
+}
+
+bool SwssRecorder::start(const string &file, Format format, size_t capacity)
+{
+    SWSS_LOG_ENTER();
+
+    if (m_running)
+    {
+        return true;
+    }
+
+    m_file = file;
+    m_format = format;
+
+    if (!openFile())
+    {
+        return false;
+    }
+
+    /* Round the capacity up to a power of two so that slots can be found with a mask */
+    size_t size = 1;
+    while (size < capacity)
+    {
+        size <<= 1;
+    }
+    m_ring.assign(size, Record());
+    m_mask = size - 1;
+    m_head = 0;
+    m_tail = 0;
+
+    m_running = true;
+    m_writer = thread(&SwssRecorder::run, this);
+
+    return true;
+}
+
+void SwssRecorder::stop()
+{
+    if (!m_running)
+    {
+        return;
+    }
+
+    m_running = false;
+    m_writer.join();
+    m_ofs.close();
+}
+
+SwssRecorder::Record *SwssRecorder::reserve()
+{
+    if (!m_running)
+    {
+        return NULL;
+    }
+
+    size_t head = m_head.load(memory_order_relaxed);
+    if (head - m_tail.load(memory_order_acquire) > m_mask)
+    {
+        m_dropped++;
+        return NULL;
+    }
+
+    Record *record = &m_ring[head & m_mask];
+    gettimeofday(&record->tv, NULL);
+    return record;
+}
+
+void SwssRecorder::commit()
+{
+    m_head.store(m_head.load(memory_order_relaxed) + 1, memory_order_release);
+    m_recorded++;
+}
+
+void SwssRecorder::record(const string &prefix, const KeyOpFieldsValuesTuple &tuple)
+{
+    Record *record = reserve();
+    if (!record)
+    {
+        return;
+    }
+
+    record->is_line = false;
+    record->prefix = prefix;
+    record->tuple = tuple;
+    commit();
+}
+
+void SwssRecorder::recordLine(const string &line)
+{
+    Record *record = reserve();
+    if (!record)
+    {
+        return;
+    }
+
+    record->is_line = true;
+    record->line = line;
+    commit();
+}
+
+void SwssRecorder::reopen()
+{
+    m_reopen = true;
+}
+
+bool SwssRecorder::openFile()
+{
+    SWSS_LOG_ENTER();
+
+    m_ofs.close();
+    m_ofs.clear();
+
+    ios_base::openmode mode = ofstream::out | ofstream::app;
+    if (m_format == Format::BINARY)
+    {
+        mode |= ofstream::binary;
+    }
+
+    m_ofs.open(m_file, mode);
+    if (!m_ofs.is_open())
+    {
+        SWSS_LOG_ERROR("Failed to open SwSS recording file %s: %s", m_file.c_str(), strerror(errno));
+        return false;
+    }
+
+    /* Appending to an existing binary recording must not repeat the magic */
+    m_ofs.seekp(0, ios_base::end);
+    if (m_format == Format::BINARY && m_ofs.tellp() == 0)
+    {
+        m_ofs.write(BINARY_MAGIC, sizeof(BINARY_MAGIC));
+    }
+
+    return true;
+}
+
+void SwssRecorder::run()
+{
+    uint64_t reported_dropped = 0;
+
+    while (true)
+    {
+        /* Read the flag first so that every record committed before stop() is written */
+        bool running = m_running;
+
+        if (m_reopen.exchange(false))
+        {
+            /*
+             * On log rotate we will use the same file name, we are assuming that
+             * logrotate deamon move filename to filename.1 and we will create new
+             * empty file here.
+             */
+            openFile();
+        }
+
+        size_t tail = m_tail.load(memory_order_relaxed);
+        size_t head = m_head.load(memory_order_acquire);
+
+        uint64_t dropped = m_dropped;
+        if (dropped != reported_dropped)
+        {
+            SWSS_LOG_WARN("SwSS recorder dropped %" PRIu64 " records, ring is full",
+                          dropped - reported_dropped);
+            writeDropped(dropped - reported_dropped);
+            reported_dropped = dropped;
+        }
+
+        if (tail == head)
+        {
+            if (!running)
+            {
+                break;
+            }
+
+            m_ofs.flush();
+            this_thread::sleep_for(chrono::milliseconds(RECORDER_IDLE_INTERVAL_MS));
+            continue;
+        }
+
+        for (; tail != head; tail++)
+        {
+            write(m_ring[tail & m_mask]);
+            m_tail.store(tail + 1, memory_order_release);
+        }
+    }
+
+    m_ofs.flush();
+}
+
+string SwssRecorder::formatTimestamp(const struct timeval &tv)
+{
+    char buffer[64];
+    struct tm tm;
+
+    localtime_r(&tv.tv_sec, &tm);
+    size_t size = strftime(buffer, 32, "%Y-%m-%d.%T.", &tm);
+    snprintf(&buffer[size], 32, "%06ld", (long)tv.tv_usec);
+
+    return string(buffer);
+}
+
+static void writeU32(ostream &out, uint32_t value)
+{
+    out.write(reinterpret_cast<const char *>(&value), sizeof(value));
+}
+
+static void writeString(ostream &out, const string &s)
+{
+    writeU32(out, (uint32_t)s.size());
+    out.write(s.data(), s.size());
+}
+
+static bool readU32(istream &in, uint32_t &value)
+{
+    return (bool)in.read(reinterpret_cast<char *>(&value), sizeof(value));
+}
+
+static bool readString(istream &in, string &s)
+{
+    uint32_t size;
+    if (!readU32(in, size))
+    {
+        return false;
+    }
+
+    s.resize(size);
+    return (bool)in.read(&s[0], size);
+}
+
+/*
+ * Binary frame: timestamp seconds (int64), microseconds (uint32), frame type (uint32), then
+ * - FRAME_LINE: the line
+ * - FRAME_TUPLE: table prefix + key, operation, number of fields, field/value pairs
+ * Strings are written as their length (uint32) followed by their bytes. Integers are in host
+ * byte order.
+ */
+void SwssRecorder::write(const Record &record)
+{
+    if (m_format == Format::TEXT)
+    {
+        m_ofs << formatTimestamp(record.tv) << "|";
+        if (record.is_line)
+        {
+            m_ofs << record.line << "\n";
+            return;
+        }
+
+        m_ofs << record.prefix << kfvKey(record.tuple) << "|" << kfvOp(record.tuple);
+        for (const auto &fv : kfvFieldsValues(record.tuple))
+        {
+            m_ofs << "|" << fvField(fv) << ":" << fvValue(fv);
+        }
+        m_ofs << "\n";
+        return;
+    }
+
+    int64_t sec = record.tv.tv_sec;
+    m_ofs.write(reinterpret_cast<const char *>(&sec), sizeof(sec));
+    writeU32(m_ofs, (uint32_t)record.tv.tv_usec);
+
+    if (record.is_line)
+    {
+        writeU32(m_ofs, FRAME_LINE);
+        writeString(m_ofs, record.line);
+        return;
+    }
+
+    writeU32(m_ofs, FRAME_TUPLE);
+    writeString(m_ofs, record.prefix + kfvKey(record.tuple));
+    writeString(m_ofs, kfvOp(record.tuple));
+    writeU32(m_ofs, (uint32_t)kfvFieldsValues(record.tuple).size());
+    for (const auto &fv : kfvFieldsValues(record.tuple))
+    {
+        writeString(m_ofs, fvField(fv));
+        writeString(m_ofs, fvValue(fv));
+    }
+}
+
+void SwssRecorder::writeDropped(uint64_t dropped)
+{
+    Record record;
+    gettimeofday(&record.tv, NULL);
+    record.is_line = true;
+    record.line = "recording dropped " + to_string(dropped) + " records";
+    write(record);
+}
+
+bool SwssRecorder::convertToText(istream &in, ostream &out)
+{
+    char magic[sizeof(BINARY_MAGIC)];
+    if (!in.read(magic, sizeof(magic)) || memcmp(magic, BINARY_MAGIC, sizeof(magic)))
+    {
+        return false;
+    }
+
+    while (true)
+    {
+        int64_t sec;
+        if (!in.read(reinterpret_cast<char *>(&sec), sizeof(sec)))
+        {
+            /* A clean end of file is only allowed between frames */
+            return in.gcount() == 0;
+        }
+
+        uint32_t usec, type;
+        if (!readU32(in, usec) || !readU32(in, type))
+        {
+            return false;
+        }
+
+        struct timeval tv;
+        tv.tv_sec = (time_t)sec;
+        tv.tv_usec = usec;
+
+        string s;
+        if (!readString(in, s))
+        {
+            return false;
+        }
+        out << formatTimestamp(tv) << "|" << s;
+
+        if (type == FRAME_TUPLE)
+        {
+            string op;
+            uint32_t count;
+            if (!readString(in, op) || !readU32(in, count))
+            {
+                return false;
+            }
+            out << "|" << op;
+
+            for (uint32_t i = 0; i < count; i++)
+            {
+                string field, value;
+                if (!readString(in, field) || !readString(in, value))
+                {
+                    return false;
+                }
+                out << "|" << field << ":" << value;
+            }
+        }
+        else if (type != FRAME_LINE)
+        {
+            return false;
+        }
+
+        out << "\n";
+    }
+}
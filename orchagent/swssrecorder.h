@@ -0,0 +1,107 @@
+#ifndef SWSS_SWSSRECORDER_H
+#define SWSS_SWSSRECORDER_H
+
+#include <sys/time.h>
+
+#include <atomic>
+#include <fstream>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "table.h"
+
+/*
+ * Records the tasks received by orchagent in swss.rec without blocking the main loop.
+ *
+ * record() copies the task into a single producer, single consumer ring buffer and returns.
+ * A writer thread drains the ring, formats the records and writes them to the file. If the
+ * ring is full the record is dropped and counted, the main loop never waits for the disk.
+ *
+ * The records are written either as the usual text lines, or with a compact binary framing
+ * which can be converted back to text with swssrec2text.
+ */
+class SwssRecorder
+{
+public:
+    enum class Format
+    {
+        TEXT,
+        BINARY,
+    };
+
+    static const size_t DEFAULT_CAPACITY = 65536;
+
+    /* Binary recordings start with this magic, followed by the frames */
+    static const char BINARY_MAGIC[8];
+
+    SwssRecorder() = default;
+    ~SwssRecorder();
+
+    bool start(const std::string &file, Format format, size_t capacity = DEFAULT_CAPACITY);
+    void stop();
+
+    /* Called from the main loop only */
+    void record(const std::string &prefix, const swss::KeyOpFieldsValuesTuple &tuple);
+    void recordLine(const std::string &line);
+
+    /* Reopen the file from the writer thread, e.g. after logrotate */
+    void reopen();
+
+    bool isRunning() const
+    {
+        return m_running;
+    }
+
+    uint64_t getRecorded() const
+    {
+        return m_recorded;
+    }
+
+    uint64_t getDropped() const
+    {
+        return m_dropped;
+    }
+
+    /* Convert a binary recording to the text format, returns false if the input is invalid */
+    static bool convertToText(std::istream &in, std::ostream &out);
+
+private:
+    struct Record
+    {
+        struct timeval tv;
+        /* Only the line is used by records made with recordLine() */
+        bool is_line;
+        std::string line;
+        std::string prefix;
+        swss::KeyOpFieldsValuesTuple tuple;
+    };
+
+    Record *reserve();
+    void commit();
+
+    void run();
+    bool openFile();
+    void write(const Record &record);
+    void writeDropped(uint64_t dropped);
+
+    static std::string formatTimestamp(const struct timeval &tv);
+
+    std::string m_file;
+    Format m_format = Format::TEXT;
+    std::ofstream m_ofs;
+
+    std::vector<Record> m_ring;
+    size_t m_mask = 0;
+    /* Next slot written by the main loop, and next slot read by the writer thread */
+    std::atomic<size_t> m_head{0};
+    std::atomic<size_t> m_tail{0};
+
+    std::atomic<bool> m_running{false};
+    std::atomic<bool> m_reopen{false};
+    std::atomic<uint64_t> m_recorded{0};
+    std::atomic<uint64_t> m_dropped{0};
+    std::thread m_writer;
+};
+
+#endif /* SWSS_SWSSRECORDER_H */
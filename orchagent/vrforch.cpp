@@ -86,6 +86,8 @@ bool VRFOrch::addOperation(const Request& request)
         vrf_id_table_[router_id] = vrf_name;
         m_stateVrfObjectTable.hset(vrf_name, "state", "ok");
         SWSS_LOG_NOTICE("VRF '%s' was added", vrf_name.c_str());
+
+        Orch::resolveDependency(vrf_dependency_prefix + vrf_name);
     }
     else
     {
@@ -1,14 +1,19 @@
 #include <dirent.h>
+#include <getopt.h>
 #include <stdlib.h>
 #include <string.h>
 
+#include <chrono>
 #include <fstream>
 #include <iostream>
+#include <map>
+#include <memory>
 #include <vector>
 
 #include "logger.h"
 #include "dbconnector.h"
 #include "producerstatetable.h"
+#include "redispipeline.h"
 #include "json.hpp"
 
 using namespace std;
@@ -21,10 +26,15 @@ const int el_count = 2;
 
 const string SWSS_CONFIG_DIR    = "/etc/swss/config.d/";
 
+/* Number of items sent to redis in one round trip */
+const size_t DEFAULT_BATCH_SIZE = 128;
+
 void usage()
 {
-    cout << "Usage: swssconfig [FILE...]" << endl;
+    cout << "Usage: swssconfig [-b BATCH_SIZE] [-s] [FILE...]" << endl;
     cout << "       (default config folder is /etc/swss/config.d/)" << endl;
+    cout << "       -b BATCH_SIZE: number of items written per round trip (default " << DEFAULT_BATCH_SIZE << ")" << endl;
+    cout << "       -s: stream large files, writing each item as soon as it is parsed" << endl;
 }
 
 void dump_db_item(KeyOpFieldsValuesTuple &db_item)
@@ -39,10 +49,20 @@ void dump_db_item(KeyOpFieldsValuesTuple &db_item)
     SWSS_LOG_DEBUG("]");
 }
 
-bool write_db_data(vector<KeyOpFieldsValuesTuple> &db_items)
+/*
+ * Writes items with one producer per table over a shared pipeline. The items are written in
+ * order, but they only reach redis every batch_size items and on flush().
+ */
+class DbWriter
 {
-    DBConnector db("APPL_DB", 0, true);
-    for (auto &db_item : db_items)
+public:
+    DbWriter(size_t batch_size) :
+        m_db("APPL_DB", 0, true),
+        m_pipeline(&m_db, batch_size)
+    {
+    }
+
+    bool write(KeyOpFieldsValuesTuple &db_item)
     {
         dump_db_item(db_item);
 
@@ -55,17 +75,99 @@ bool write_db_data(vector<KeyOpFieldsValuesTuple> &db_items)
         }
         string table_name = key.substr(0, pos);
         string key_name = key.substr(pos + 1);
-        ProducerStateTable producer(&db, table_name);
+
+        auto &producer = m_producers[table_name];
+        if (!producer)
+        {
+            producer.reset(new ProducerStateTable(&m_pipeline, table_name, true));
+        }
 
         if (kfvOp(db_item) == SET_COMMAND)
-            producer.set(key_name, kfvFieldsValues(db_item), SET_COMMAND);
+            producer->set(key_name, kfvFieldsValues(db_item), SET_COMMAND);
         else if (kfvOp(db_item) == DEL_COMMAND)
-            producer.del(key_name, DEL_COMMAND);
+            producer->del(key_name, DEL_COMMAND);
         else
         {
             SWSS_LOG_ERROR("Invalid operation: %s\n", kfvOp(db_item).c_str());
             return false;
         }
+
+        m_count++;
+        return true;
+    }
+
+    void flush()
+    {
+        m_pipeline.flush();
+    }
+
+    size_t count() const
+    {
+        return m_count;
+    }
+
+private:
+    DBConnector m_db;
+    RedisPipeline m_pipeline;
+    map<string, unique_ptr<ProducerStateTable>> m_producers;
+    size_t m_count = 0;
+};
+
+bool write_db_data(vector<KeyOpFieldsValuesTuple> &db_items, DbWriter &writer)
+{
+    for (auto &db_item : db_items)
+    {
+        if (!writer.write(db_item))
+        {
+            return false;
+        }
+    }
+
+    writer.flush();
+    return true;
+}
+
+bool load_json_db_item(json &arr_item, KeyOpFieldsValuesTuple &cur_db_item)
+{
+    if (!arr_item.is_object())
+    {
+        SWSS_LOG_ERROR("Child elements must be objects. element:%s", arr_item.dump().c_str());
+        return false;
+    }
+
+    if (el_count != arr_item.size())
+    {
+        SWSS_LOG_ERROR("Chlid elements must have both key and op entry. %s",
+                       arr_item.dump().c_str());
+        return false;
+    }
+
+    for (json::iterator child_it = arr_item.begin(); child_it != arr_item.end(); child_it++) {
+        auto cur_obj_key = child_it.key();
+        auto &cur_obj = child_it.value();
+
+        if (cur_obj.is_object()) {
+            kfvKey(cur_db_item) = cur_obj_key;
+            for (json::iterator cur_obj_it = cur_obj.begin(); cur_obj_it != cur_obj.end(); cur_obj_it++)
+            {
+                string field_str = cur_obj_it.key();
+                string value_str;
+                if ((*cur_obj_it).is_number())
+                    value_str = to_string((*cur_obj_it).get<int>());
+                else if ((*cur_obj_it).is_string())
+                    value_str = (*cur_obj_it).get<string>();
+                kfvFieldsValues(cur_db_item).push_back(FieldValueTuple(field_str, value_str));
+            }
+        }
+        else
+        {
+            if (op_name != child_it.key())
+            {
+                SWSS_LOG_ERROR("Invalid entry. %s", arr_item.dump().c_str());
+                return false;
+            }
+            kfvOp(cur_db_item) = cur_obj.get<string>();
+        }
     }
     return true;
 }
@@ -83,58 +185,63 @@ bool load_json_db_data(ifstream &fs, vector<KeyOpFieldsValuesTuple> &db_items)
 
     for (size_t i = 0; i < json_array.size(); i++)
     {
-        auto &arr_item = json_array[i];
-
-        if (arr_item.is_object())
+        db_items.push_back(KeyOpFieldsValuesTuple());
+        if (!load_json_db_item(json_array[i], db_items.back()))
         {
-            if (el_count != arr_item.size())
-            {
-                SWSS_LOG_ERROR("Chlid elements must have both key and op entry. %s",
-                               arr_item.dump().c_str());
-                return false;
-            }
-
-            db_items.push_back(KeyOpFieldsValuesTuple());
-            auto &cur_db_item = db_items[db_items.size() - 1];
-
-            for (json::iterator child_it = arr_item.begin(); child_it != arr_item.end(); child_it++) {
-                auto cur_obj_key = child_it.key();
-                auto &cur_obj = child_it.value();
+            return false;
+        }
+    }
+    return true;
+}
 
-                string field_str;
-                string value_str;
+/*
+ * Parse the file one array element at a time and write each element as soon as it is complete.
+ * Written elements are discarded from the parsed tree, so memory use does not grow with the
+ * size of the file. Unlike load_json_db_data, the elements before an invalid one are written.
+ */
+bool stream_json_db_data(ifstream &fs, DbWriter &writer)
+{
+    bool root_is_array = false;
+    bool ok = true;
 
-                if (cur_obj.is_object()) {
-                    kfvKey(cur_db_item) = cur_obj_key;
-                    for (json::iterator cur_obj_it = cur_obj.begin(); cur_obj_it != cur_obj.end(); cur_obj_it++)
-                    {
-                        string field_str = cur_obj_it.key();
-                        string value_str;
-                        if ((*cur_obj_it).is_number())
-                            value_str = to_string((*cur_obj_it).get<int>());
-                        else if ((*cur_obj_it).is_string())
-                            value_str = (*cur_obj_it).get<string>();
-                        kfvFieldsValues(cur_db_item).push_back(FieldValueTuple(field_str, value_str));
-                    }
-                }
-                else
-                {
-                    if (op_name != child_it.key())
-                    {
-                        SWSS_LOG_ERROR("Invalid entry. %s", arr_item.dump().c_str());
-                        return false;
-                    }
-                    kfvOp(cur_db_item) = cur_obj.get<string>();
-                 }
+    json::parse(fs, [&](int depth, json::parse_event_t event, json &parsed)
+    {
+        if (depth == 0)
+        {
+            if (event == json::parse_event_t::array_start)
+            {
+                root_is_array = true;
             }
+            return root_is_array;
         }
-        else
+
+        if (!root_is_array || !ok)
         {
-            SWSS_LOG_ERROR("Child elements must be objects. element:%s", arr_item.dump().c_str());
             return false;
         }
+
+        /* Keep building the element until it is complete */
+        if (depth > 1 || event == json::parse_event_t::object_start ||
+            event == json::parse_event_t::array_start)
+        {
+            return true;
+        }
+
+        KeyOpFieldsValuesTuple db_item;
+        ok = load_json_db_item(parsed, db_item) && writer.write(db_item);
+
+        /* Drop the element from the root array */
+        return false;
+    });
+
+    if (!root_is_array)
+    {
+        SWSS_LOG_ERROR("Root element must be an array.");
+        return false;
     }
-    return true;
+
+    writer.flush();
+    return ok;
 }
 
 vector<string> read_directory(const string &path)
@@ -160,19 +267,43 @@ vector<string> read_directory(const string &path)
 
 int main(int argc, char **argv)
 {
-    vector<string> files;
-    if (argc == 1)
+    size_t batch_size = DEFAULT_BATCH_SIZE;
+    bool stream = false;
+    int opt;
+
+    while ((opt = getopt(argc, argv, "b:sh")) != -1)
     {
-        files = read_directory(SWSS_CONFIG_DIR);
+        switch (opt)
+        {
+        case 'b':
+            batch_size = strtoul(optarg, NULL, 10);
+            if (batch_size == 0)
+            {
+                cerr << "Invalid batch size: " << optarg << endl;
+                usage();
+                exit(EXIT_FAILURE);
+            }
+            break;
+        case 's':
+            stream = true;
+            break;
+        case 'h':
+            usage();
+            exit(EXIT_SUCCESS);
+        default:
+            usage();
+            exit(EXIT_FAILURE);
+        }
     }
-    if (argc == 2 && !strcmp(argv[1], "-h"))
+
+    vector<string> files;
+    if (optind == argc)
     {
-        usage();
-        exit(EXIT_SUCCESS);
+        files = read_directory(SWSS_CONFIG_DIR);
     }
     else
     {
-        for (auto i = 1; i < argc; i++)
+        for (auto i = optind; i < argc; i++)
         {
             files.push_back(string(argv[i]));
         }
@@ -193,17 +324,37 @@ int main(int argc, char **argv)
                 return EXIT_FAILURE;
             }
 
-            if (!load_json_db_data(fs, db_items))
+            DbWriter writer(batch_size);
+            auto start = chrono::steady_clock::now();
+
+            if (stream)
             {
-                SWSS_LOG_ERROR("Failed loading data from JSON file %s", i.c_str());
-                return EXIT_FAILURE;
+                if (!stream_json_db_data(fs, writer))
+                {
+                    SWSS_LOG_ERROR("Failed applying data from JSON file %s", i.c_str());
+                    return EXIT_FAILURE;
+                }
             }
-
-            if (!write_db_data(db_items))
+            else
             {
-                SWSS_LOG_ERROR("Failed applying data from JSON file %s", i.c_str());
-                return EXIT_FAILURE;
+                if (!load_json_db_data(fs, db_items))
+                {
+                    SWSS_LOG_ERROR("Failed loading data from JSON file %s", i.c_str());
+                    return EXIT_FAILURE;
+                }
+
+                start = chrono::steady_clock::now();
+                if (!write_db_data(db_items, writer))
+                {
+                    SWSS_LOG_ERROR("Failed applying data from JSON file %s", i.c_str());
+                    return EXIT_FAILURE;
+                }
             }
+            chrono::duration<double> elapsed = chrono::steady_clock::now() - start;
+
+            SWSS_LOG_NOTICE("Applied %zu items from JSON file %s in %.3f s (%.0f items/s)",
+                            writer.count(), i.c_str(), elapsed.count(),
+                            elapsed.count() > 0 ? writer.count() / elapsed.count() : 0);
         }
         catch(const exception &e)
         {
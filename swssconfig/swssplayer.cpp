@@ -1,20 +1,46 @@
+#include <getopt.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include <chrono>
 #include <fstream>
 #include <iostream>
+#include <map>
+#include <memory>
+#include <thread>
 
 #include <dbconnector.h>
 #include <producerstatetable.h>
+#include <redispipeline.h>
 #include <schema.h>
 #include <tokenize.h>
 
 using namespace std;
 using namespace swss;
 
+/* Number of operations sent to redis in one round trip */
+static const size_t DEFAULT_BATCH_SIZE = 128;
+
+enum class ReplayMode
+{
+	/* Replay the operations as fast as possible */
+	MaxThroughput,
+	/* Reproduce the recorded time between operations, scaled by a speed multiplier */
+	Faithful,
+};
+
 static int line_index = 0;
 static DBConnector db("APPL_DB", 0, true);
+static map<string, unique_ptr<ProducerStateTable>> producers;
 
 void usage()
 {
-	cout << "Usage: swssplayer <file>" << endl;
+	cout << "Usage: swssplayer [-m max|faithful] [-s SPEED] [-b BATCH_SIZE] <file>" << endl;
+	cout << "       -m max: replay the operations as fast as possible (default)" << endl;
+	cout << "       -m faithful: replay the operations with their recorded timing" << endl;
+	cout << "       -s SPEED: speed multiplier for the faithful mode (default 1.0)" << endl;
+	cout << "       -b BATCH_SIZE: number of operations written per round trip (default " << DEFAULT_BATCH_SIZE << ")" << endl;
 	/* TODO: Add sample input file */
 }
 
@@ -34,46 +60,191 @@ vector<FieldValueTuple> processFieldsValuesTuple(string s)
 	return result;
 }
 
-void processTokens(vector<string> tokens)
+/* Get the producer of a table, all the producers share the same pipeline */
+ProducerStateTable &getProducer(RedisPipeline &pipeline, const string &table_name)
+{
+	auto &producer = producers[table_name];
+	if (!producer)
+	{
+		producer.reset(new ProducerStateTable(&pipeline, table_name, true));
+	}
+
+	return *producer;
+}
+
+/* Parse a swss.rec timestamp, e.g. 2020-05-13.10:20:34.123456, into microseconds */
+bool parseTimestamp(const string &s, int64_t &usec)
+{
+	struct tm tm;
+	memset(&tm, 0, sizeof(tm));
+
+	const char *rest = strptime(s.c_str(), "%Y-%m-%d.%H:%M:%S", &tm);
+	if (rest == NULL || *rest != '.')
+	{
+		return false;
+	}
+
+	usec = (int64_t)timegm(&tm) * 1000000 + strtol(rest + 1, NULL, 10);
+	return true;
+}
+
+bool processTokens(vector<string> tokens, RedisPipeline &pipeline)
 {
 	auto key = tokens[1];
 
 	/* Process the key */
 	auto v_key = tokenize(key, ':', 1);
+	if (v_key.size() != 2)
+	{
+		cerr << "Invalid key at line " << line_index << ": " << key << endl;
+		return false;
+	}
 	auto table_name = v_key[0];
 	auto key_name = v_key[1];
 
-	ProducerStateTable producer(&db, table_name);
+	auto &producer = getProducer(pipeline, table_name);
 
 	/* Process the operation */
 	auto op = tokens[2];
 	if (op == SET_COMMAND)
 	{
-		auto tuples = processFieldsValuesTuple(tokens[3]);
+		auto tuples = processFieldsValuesTuple(tokens.size() > 3 ? tokens[3] : "");
 		producer.set(key_name, tuples, SET_COMMAND);
 	}
 	else if (op == DEL_COMMAND)
 	{
 		producer.del(key_name, DEL_COMMAND);
 	}
+	else
+	{
+		cerr << "Invalid operation at line " << line_index << ": " << op << endl;
+		return false;
+	}
+
+	return true;
 }
 
 int main(int argc, char **argv)
 {
-	if (argc != 2)
+	ReplayMode mode = ReplayMode::MaxThroughput;
+	double speed = 1.0;
+	size_t batch_size = DEFAULT_BATCH_SIZE;
+	int opt;
+
+	while ((opt = getopt(argc, argv, "m:s:b:h")) != -1)
+	{
+		switch (opt)
+		{
+		case 'm':
+			if (!strcmp(optarg, "max"))
+				mode = ReplayMode::MaxThroughput;
+			else if (!strcmp(optarg, "faithful"))
+				mode = ReplayMode::Faithful;
+			else
+			{
+				usage();
+				exit(EXIT_FAILURE);
+			}
+			break;
+		case 's':
+			speed = strtod(optarg, NULL);
+			if (speed <= 0)
+			{
+				usage();
+				exit(EXIT_FAILURE);
+			}
+			break;
+		case 'b':
+			batch_size = strtoul(optarg, NULL, 10);
+			if (batch_size == 0)
+			{
+				usage();
+				exit(EXIT_FAILURE);
+			}
+			break;
+		case 'h':
+			usage();
+			exit(EXIT_SUCCESS);
+		default:
+			usage();
+			exit(EXIT_FAILURE);
+		}
+	}
+
+	if (optind != argc - 1)
 	{
 		usage();
 		exit(EXIT_FAILURE);
 	}
 
-	ifstream file(argv[1]);
+	ifstream file(argv[optind]);
+	if (!file)
+	{
+		cerr << "Failed to open file " << argv[optind] << endl;
+		exit(EXIT_FAILURE);
+	}
+
+	RedisPipeline pipeline(&db, batch_size);
 	string line;
+	size_t ops = 0;
+	int64_t first_usec = -1;
+	int64_t last_usec = -1;
+	auto start = chrono::steady_clock::now();
 
 	while (getline(file, line))
 	{
+		line_index++;
+
 		auto tokens = tokenize(line, '|', 3);
-		processTokens(tokens);
 
-		line_index++;
+		/* Skip the lines that are not operations, e.g. "recording started" */
+		if (tokens.size() < 3)
+		{
+			continue;
+		}
+
+		if (mode == ReplayMode::Faithful)
+		{
+			int64_t usec;
+			if (!parseTimestamp(tokens[0], usec))
+			{
+				cerr << "Invalid timestamp at line " << line_index << ": " << tokens[0] << endl;
+				exit(EXIT_FAILURE);
+			}
+
+			if (first_usec < 0)
+			{
+				first_usec = usec;
+				start = chrono::steady_clock::now();
+			}
+			last_usec = usec;
+
+			auto due = start + chrono::microseconds((int64_t)((usec - first_usec) / speed));
+			if (due > chrono::steady_clock::now())
+			{
+				/* Send everything that is due before waiting for the next operation */
+				pipeline.flush();
+				this_thread::sleep_until(due);
+			}
+		}
+
+		if (!processTokens(tokens, pipeline))
+		{
+			exit(EXIT_FAILURE);
+		}
+
+		ops++;
 	}
+
+	pipeline.flush();
+
+	chrono::duration<double> elapsed = chrono::steady_clock::now() - start;
+	cout << "Replayed " << ops << " operations in " << elapsed.count() << " s ("
+	     << (elapsed.count() > 0 ? ops / elapsed.count() : 0) << " ops/s)" << endl;
+	if (mode == ReplayMode::Faithful && first_usec >= 0)
+	{
+		cout << "Recorded duration " << (last_usec - first_usec) / 1000000.0 << " s, speed x" << speed << endl;
+	}
+
+	return EXIT_SUCCESS;
 }
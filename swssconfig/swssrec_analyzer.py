@@ -0,0 +1,575 @@
+#!/usr/bin/env python
+
+"""
+Description: swssrec_analyzer.py -- query swss.rec and sairedis.rec recordings through an index.
+    The recordings in a directory (the current file and its rotated copies) are indexed once by
+    table, key and time. The index is kept next to the recordings and rebuilt when they change.
+    Queries memory-map the index and the recordings and stream their results, so the recordings
+    are never loaded in memory.
+
+    history KEY  -- every operation recorded on KEY, in swss.rec and sairedis.rec
+    rate         -- number of operations per table per second
+    gaps         -- slowest APPL_DB -> ASIC_DB programming gaps, for routes, neighbors and FDBs
+"""
+
+import argparse
+import calendar
+import glob
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import re
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+INDEX_MAGIC = b'SWSSRIDX'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('>8sIQQQQQQ')
+
+# Entries sorted by key, then table, then time: key hash, table id, time (us), file id, offset
+KEY_ENTRY = struct.Struct('>QIQHQ')
+# Entries of objects that can be matched between APPL_DB and ASIC_DB, sorted by match key
+# then time: match hash, time (us), kind, table id, file id, offset
+MATCH_ENTRY = struct.Struct('>QQBIHQ')
+
+KIND_SWSS = 0
+KIND_SAIREDIS = 1
+
+# Number of entries sorted in memory before they are spilled to a temporary file
+SORT_RUN_SIZE = 500000
+
+SWSS_OPS = (b'SET', b'DEL')
+SAIREDIS_OPS = (b'c', b'r', b's')
+SAIREDIS_BULK_OPS = (b'C', b'R', b'S')
+
+SAI_ROUTE_ENTRY = b'SAI_OBJECT_TYPE_ROUTE_ENTRY'
+SAI_NEIGHBOR_ENTRY = b'SAI_OBJECT_TYPE_NEIGHBOR_ENTRY'
+SAI_FDB_ENTRY = b'SAI_OBJECT_TYPE_FDB_ENTRY'
+
+ROTATED_RE = re.compile(r'\.(\d+)$')
+
+# orchagent -f binary records swss.rec.bin, which swssrec2text converts to the text format
+BINARY_SWSS_RECORDING = 'swss.rec.bin'
+RECORDING_NAMES = ('swss.rec', BINARY_SWSS_RECORDING, 'sairedis.rec')
+SWSSREC2TEXT = 'swssrec2text'
+
+
+def key_hash(data):
+    return struct.unpack('>Q', hashlib.md5(data).digest()[:8])[0]
+
+
+class TimestampParser(object):
+    """Parse recording timestamps, e.g. 2020-05-13.10:20:34.123456, into microseconds.
+
+    The recordings are in local time, the times are only compared with each other so they are
+    converted as if they were UTC. The conversion of the seconds is cached since consecutive
+    records are usually in the same second.
+    """
+
+    def __init__(self):
+        self.second = None
+        self.second_us = 0
+
+    def parse(self, ts):
+        if len(ts) < 26:
+            return None
+
+        second = ts[:19]
+        if second != self.second:
+            try:
+                t = (int(second[0:4]), int(second[5:7]), int(second[8:10]),
+                     int(second[11:13]), int(second[14:16]), int(second[17:19]))
+            except ValueError:
+                return None
+            self.second = second
+            self.second_us = calendar.timegm(t) * 1000000
+
+        try:
+            return self.second_us + int(ts[20:26])
+        except ValueError:
+            return None
+
+
+def format_time(us):
+    return time.strftime('%Y-%m-%d.%H:%M:%S', time.gmtime(us // 1000000)) + '.%06d' % (us % 1000000)
+
+
+def appl_match_key(table, key):
+    """Get the key that identifies an APPL_DB entry in ASIC_DB, or None if it is not matched."""
+    if table == b'ROUTE_TABLE':
+        prefix = key.split(b':', 1)
+        if len(prefix) == 2 and prefix[0].startswith((b'Vrf', b'Vnet')):
+            key = prefix[1]
+        if b'/' not in key:
+            key += b'/128' if b':' in key else b'/32'
+        return b'route|' + key
+
+    if table == b'NEIGH_TABLE':
+        fields = key.split(b':', 1)
+        return b'neigh|' + fields[1] if len(fields) == 2 else None
+
+    if table == b'FDB_TABLE':
+        fields = key.split(b':', 1)
+        return b'fdb|' + fields[1].replace(b'-', b':').upper() if len(fields) == 2 else None
+
+    return None
+
+
+def sai_match_key(object_type, key):
+    """Get the key that identifies an ASIC_DB entry in APPL_DB, or None if it is not matched."""
+    if object_type not in (SAI_ROUTE_ENTRY, SAI_NEIGHBOR_ENTRY, SAI_FDB_ENTRY):
+        return None
+
+    try:
+        fields = json.loads(key.decode('utf-8', 'replace'))
+        if object_type == SAI_ROUTE_ENTRY:
+            return b'route|' + fields['dest'].encode('utf-8')
+        if object_type == SAI_NEIGHBOR_ENTRY:
+            return b'neigh|' + fields['ip'].encode('utf-8')
+        return b'fdb|' + fields['mac'].upper().encode('utf-8')
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def parse_swss_line(line):
+    """Get the (table, key) of a swss.rec line, or None if it is not an operation."""
+    tokens = line.split(b'|')
+    if len(tokens) < 3:
+        return None
+
+    # The operation is the first SET/DEL after the table, the fields follow it
+    for op_index in range(2, len(tokens)):
+        if tokens[op_index] in SWSS_OPS:
+            break
+    else:
+        return None
+
+    # APPL_DB tables use ':' between the table and the key, CONFIG_DB tables use '|', also
+    # between the parts of their keys, e.g. VLAN_MEMBER|Vlan1000|Ethernet0
+    if op_index == 2:
+        table_key = tokens[1].split(b':', 1)
+        if len(table_key) == 1:
+            return table_key[0], b''
+        return table_key[0], table_key[1]
+
+    return tokens[1], b'|'.join(tokens[2:op_index])
+
+
+def parse_sairedis_line(line):
+    """Get the (object type, key) of the objects changed by a sairedis.rec line."""
+    tokens = line.split(b'|', 3)
+    if len(tokens) < 3:
+        return []
+
+    op = tokens[1]
+    if op in SAIREDIS_OPS:
+        object_type_key = tokens[2].split(b':', 1)
+        if len(object_type_key) != 2:
+            return []
+        return [(object_type_key[0], object_type_key[1])]
+
+    if op in SAIREDIS_BULK_OPS:
+        # Bulk operations: object type, then one "key|attributes" entry per object, separated by "||"
+        entries = line.split(b'||')
+        object_type = entries[0].split(b'|')[2]
+        return [(object_type, entry.split(b'|', 1)[0]) for entry in entries[1:] if entry]
+
+    return []
+
+
+def text_recording(path):
+    """Get a text copy of the binary swss.rec at `path`, converted with swssrec2text.
+
+    The copy is kept next to the recording as a hidden file and converted again when the
+    recording changes. Returns None if the recording cannot be converted.
+    """
+    text_path = os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.txt')
+    if os.path.exists(text_path) and os.path.getmtime(text_path) >= os.path.getmtime(path):
+        return text_path
+
+    tmp_path = text_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            returncode = subprocess.call([SWSSREC2TEXT, path], stdout=out)
+    except OSError as e:
+        sys.stderr.write('Skipping binary recording %s, %s failed: %s\n' % (path, SWSSREC2TEXT, e))
+        os.remove(tmp_path)
+        return None
+
+    # The recording being written may end with a truncated record, keep what comes before
+    if returncode != 0:
+        sys.stderr.write('Only indexing the first valid records of binary recording %s\n' % path)
+
+    os.rename(tmp_path, text_path)
+    return text_path
+
+
+def find_recordings(directory):
+    """Get the recordings in a directory, oldest first.
+
+    Compressed rotated recordings cannot be indexed in place and are skipped. Binary swss.rec
+    recordings are indexed through their text copy.
+    """
+    files = []
+    for name in RECORDING_NAMES:
+        for path in glob.glob(os.path.join(directory, name + '*')):
+            base = os.path.basename(path)
+            compressed = base.endswith('.gz')
+            if compressed:
+                base = base[:-len('.gz')]
+
+            rotation = ROTATED_RE.search(base)
+            if (base[:rotation.start()] if rotation else base) != name:
+                continue
+
+            if compressed:
+                sys.stderr.write('Skipping compressed recording %s, decompress it to index it\n' % path)
+                continue
+
+            if name == BINARY_SWSS_RECORDING:
+                path = text_recording(path)
+                if not path:
+                    continue
+
+            kind = KIND_SAIREDIS if name == 'sairedis.rec' else KIND_SWSS
+            files.append((kind, -int(rotation.group(1)) if rotation else 0, path))
+
+    files.sort()
+    return [(kind, path) for kind, _, path in files]
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_size, int(st.st_mtime)]
+
+
+class ExternalSorter(object):
+    """Sort fixed-size records that compare as raw bytes, with at most SORT_RUN_SIZE records in
+    memory. Full runs are sorted and spilled to temporary files, then merged."""
+
+    def __init__(self, record_size, tmpdir):
+        self.record_size = record_size
+        self.tmpdir = tmpdir
+        self.records = []
+        self.runs = []
+        self.count = 0
+
+    def add(self, record):
+        self.records.append(record)
+        self.count += 1
+        if len(self.records) >= SORT_RUN_SIZE:
+            self._spill()
+
+    def _spill(self):
+        self.records.sort()
+        run = tempfile.TemporaryFile(dir=self.tmpdir)
+        run.write(b''.join(self.records))
+        run.seek(0)
+        self.runs.append(run)
+        self.records = []
+
+    def _read_run(self, run):
+        while True:
+            data = run.read(self.record_size * 4096)
+            if not data:
+                break
+            for i in range(0, len(data), self.record_size):
+                yield data[i:i + self.record_size]
+
+    def write_sorted(self, out):
+        self.records.sort()
+        if not self.runs:
+            out.write(b''.join(self.records))
+        else:
+            sources = [self._read_run(run) for run in self.runs] + [iter(self.records)]
+            for record in heapq.merge(*sources):
+                out.write(record)
+            for run in self.runs:
+                run.close()
+
+        self.records = []
+        self.runs = []
+
+
+def build_index(directory, index_path):
+    files = find_recordings(directory)
+    tables = {}
+    parser = TimestampParser()
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    key_sorter = ExternalSorter(KEY_ENTRY.size, index_dir)
+    match_sorter = ExternalSorter(MATCH_ENTRY.size, index_dir)
+
+    def table_id(name):
+        if name not in tables:
+            tables[name] = len(tables)
+        return tables[name]
+
+    for file_id, (kind, path) in enumerate(files):
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                line_offset = offset
+                offset += len(line)
+
+                us = parser.parse(line)
+                if us is None:
+                    continue
+
+                if kind == KIND_SWSS:
+                    table_key = parse_swss_line(line.rstrip(b'\n'))
+                    entries = [table_key] if table_key else []
+                else:
+                    entries = parse_sairedis_line(line.rstrip(b'\n'))
+
+                for table, key in entries:
+                    tid = table_id(table)
+                    key_sorter.add(KEY_ENTRY.pack(key_hash(key), tid, us, file_id, line_offset))
+
+                    if kind == KIND_SWSS:
+                        match_key = appl_match_key(table, key)
+                    else:
+                        match_key = sai_match_key(table, key)
+                    if match_key:
+                        match_sorter.add(MATCH_ENTRY.pack(key_hash(match_key), us, kind, tid,
+                                                          file_id, line_offset))
+
+    metadata = {
+        'files': [[kind] + file_signature(path) for kind, path in files],
+        'tables': [name.decode('utf-8', 'replace') for name, _ in
+                   sorted(tables.items(), key=lambda item: item[1])],
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix='.swssrec_index.')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(b'\0' * INDEX_HEADER.size)
+
+        key_offset = out.tell()
+        key_sorter.write_sorted(out)
+        match_offset = out.tell()
+        match_sorter.write_sorted(out)
+
+        meta = json.dumps(metadata).encode('utf-8')
+        meta_offset = out.tell()
+        out.write(meta)
+
+        out.seek(0)
+        out.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, meta_offset, len(meta),
+                                    key_offset, key_sorter.count, match_offset, match_sorter.count))
+
+    os.rename(tmp_path, index_path)
+
+
+class RecordingIndex(object):
+    """A memory-mapped index over a set of recordings."""
+
+    def __init__(self, index_path):
+        self.f = open(index_path, 'rb')
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, meta_offset, meta_len, self.key_offset, self.key_count,
+         self.match_offset, self.match_count) = INDEX_HEADER.unpack_from(self.mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError('%s is not a recording index' % index_path)
+
+        metadata = json.loads(self.mm[meta_offset:meta_offset + meta_len].decode('utf-8'))
+        self.files = metadata['files']
+        self.tables = metadata['tables']
+        self.recordings = {}
+
+    def close(self):
+        for f, mm in self.recordings.values():
+            mm.close()
+            f.close()
+        self.mm.close()
+        self.f.close()
+
+    def is_current(self, files):
+        return [file_signature(path) for _, path in files] == [f[1:] for f in self.files]
+
+    def line(self, file_id, offset):
+        """Read the line of a recording at `offset`."""
+        if file_id not in self.recordings:
+            f = open(self.files[file_id][1], 'rb')
+            self.recordings[file_id] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        mm = self.recordings[file_id][1]
+        end = mm.find(b'\n', offset)
+        return mm[offset:end if end >= 0 else len(mm)]
+
+    def file_name(self, file_id):
+        return os.path.basename(self.files[file_id][1])
+
+    def key_entries(self, start=0):
+        for i in range(start, self.key_count):
+            yield KEY_ENTRY.unpack_from(self.mm, self.key_offset + i * KEY_ENTRY.size)
+
+    def match_entries(self, start=0):
+        for i in range(start, self.match_count):
+            yield MATCH_ENTRY.unpack_from(self.mm, self.match_offset + i * MATCH_ENTRY.size)
+
+    def _bisect(self, offset, count, size, h):
+        lo, hi = 0, count
+        target = struct.pack('>Q', h)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = offset + mid * size
+            if self.mm[pos:pos + 8] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_key(self, h):
+        """Get the position of the first key entry with key hash `h`."""
+        return self._bisect(self.key_offset, self.key_count, KEY_ENTRY.size, h)
+
+    def find_match(self, h):
+        """Get the position of the first match entry with match hash `h`."""
+        return self._bisect(self.match_offset, self.match_count, MATCH_ENTRY.size, h)
+
+
+def open_index(args):
+    files = find_recordings(args.dir)
+    index_path = args.index or os.path.join(args.dir, '.swssrec.idx')
+
+    if os.path.exists(index_path):
+        index = RecordingIndex(index_path)
+        if index.is_current(files):
+            return index
+        index.close()
+
+    sys.stderr.write('Indexing %d recordings in %s...\n' % (len(files), args.dir))
+    build_index(args.dir, index_path)
+    return RecordingIndex(index_path)
+
+
+def history(index, key, table=None):
+    """Print every operation recorded on `key`, in time order.
+
+    For route prefixes, neighbor IPs and FDB MACs, the sairedis operations on the matching
+    ASIC_DB entries are included as well.
+    """
+    matches = set()
+
+    h = key_hash(key.encode('utf-8'))
+    for entry_hash, tid, us, file_id, offset in index.key_entries(index.find_key(h)):
+        if entry_hash != h:
+            break
+        if not table or index.tables[tid] == table:
+            matches.add((us, file_id, offset))
+
+    # The key may be an APPL_DB key, e.g. Vlan1000:192.168.0.2, or the prefix, IP or MAC of the
+    # ASIC_DB entry, match both the APPL_DB and the sairedis operations on the entry either way
+    key_bytes = key.encode('utf-8')
+    candidates = set([appl_match_key(b'ROUTE_TABLE', key_bytes),
+                      appl_match_key(b'NEIGH_TABLE', key_bytes),
+                      appl_match_key(b'FDB_TABLE', key_bytes),
+                      b'neigh|' + key_bytes,
+                      b'fdb|' + key.replace('-', ':').upper().encode('utf-8')])
+    candidates.discard(None)
+    for match_key in candidates:
+        h = key_hash(match_key)
+        for entry_hash, us, kind, tid, file_id, offset in index.match_entries(index.find_match(h)):
+            if entry_hash != h:
+                break
+            if not table or index.tables[tid] == table:
+                matches.add((us, file_id, offset))
+
+    for us, file_id, offset in sorted(matches):
+        print('%s: %s' % (index.file_name(file_id), index.line(file_id, offset).decode('utf-8', 'replace')))
+
+
+def rate(index, table=None):
+    """Print the number of operations per table per second."""
+    counts = {}
+    for _, tid, us, _, _ in index.key_entries():
+        if table and index.tables[tid] != table:
+            continue
+        second = (tid, us // 1000000)
+        counts[second] = counts.get(second, 0) + 1
+
+    for (tid, second), count in sorted(counts.items(), key=lambda item: (index.tables[item[0][0]], item[0][1])):
+        print('%s %s %d' % (index.tables[tid], format_time(second * 1000000)[:19], count))
+
+
+def gaps(index, top):
+    """Print the slowest APPL_DB -> ASIC_DB gaps, in milliseconds.
+
+    Each APPL_DB operation on a route, neighbor or FDB entry is paired with the next sairedis
+    operation on the same prefix, IP or MAC.
+    """
+    slowest = []
+    group = None
+    pending = []
+
+    for h, us, kind, tid, file_id, offset in index.match_entries():
+        if h != group:
+            group = h
+            pending = []
+
+        if kind == KIND_SWSS:
+            pending.append((us, tid, file_id, offset))
+            continue
+
+        for appl_us, appl_tid, appl_file_id, appl_offset in pending:
+            gap = (us - appl_us, appl_us, appl_file_id, appl_offset, tid)
+            if len(slowest) < top:
+                heapq.heappush(slowest, gap)
+            elif gap > slowest[0]:
+                heapq.heapreplace(slowest, gap)
+        pending = []
+
+    for gap_us, appl_us, file_id, offset, tid in sorted(slowest, reverse=True):
+        line = index.line(file_id, offset).split(b'|', 2)
+        print('%.3f ms %s %s -> %s' % (gap_us / 1000.0, format_time(appl_us),
+                                       line[1].decode('utf-8', 'replace'), index.tables[tid]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query swss.rec and sairedis.rec recordings through an index')
+    parser.add_argument('-d', '--dir', default='/var/log/swss',
+                        help='directory of the recordings (default /var/log/swss)')
+    parser.add_argument('-i', '--index', default=None,
+                        help='index file (default .swssrec.idx in the recordings directory)')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('build', help='(re)build the index')
+
+    history_parser = subparsers.add_parser('history', help='history of a key')
+    history_parser.add_argument('key', help='key, e.g. 10.0.0.0/24 or oid:0x5000000000611')
+    history_parser.add_argument('-t', '--table', help='only show operations on this table or SAI object type')
+
+    rate_parser = subparsers.add_parser('rate', help='operations per table per second')
+    rate_parser.add_argument('-t', '--table', help='only show this table or SAI object type')
+
+    gaps_parser = subparsers.add_parser('gaps', help='slowest APPL_DB -> ASIC_DB gaps')
+    gaps_parser.add_argument('-n', '--top', type=int, default=20, help='number of gaps to show (default 20)')
+
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.command == 'build':
+        build_index(args.dir, args.index or os.path.join(args.dir, '.swssrec.idx'))
+        return
+
+    index = open_index(args)
+    try:
+        if args.command == 'history':
+            history(index, args.key, args.table)
+        elif args.command == 'rate':
+            rate(index, args.table)
+        elif args.command == 'gaps':
+            gaps(index, args.top)
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,9 @@ if sys.version_info < (3, 0):
 
 from datetime import datetime
 from swsscommon import swsscommon
+from dvslib.dvs_common import wait_for_result, PollingConfig
 from dvslib import dvs_database as dvs_db
+from dvslib import dvs_snapshot
 from dvslib import dvs_acl
 from dvslib import dvs_vlan
 from dvslib import dvs_lag
@@ -30,6 +32,12 @@ def ensure_system(cmd):
     if rc:
         raise RuntimeError('Failed to run command: %s. rc=%d. output: %s' % (cmd, rc, output))
 
+# Time saved by the convergence waits of the DockerVirtualSwitch helpers, per test
+settle_time_saved = {}
+
+# Time spent to set up the dvs fixture, per test module
+dvs_setup_time = {}
+
 def pytest_addoption(parser):
     parser.addoption("--dvsname", action="store", default=None,
                       help="dvs name")
@@ -37,6 +45,14 @@ def pytest_addoption(parser):
                       help="keep testbed after test")
     parser.addoption("--imgname", action="store", default="docker-sonic-vs",
                       help="image name")
+    parser.addoption("--dvspool", action="store_true", default=False,
+                      help="reuse one dvs per test process (e.g. per pytest-xdist worker) across test modules")
+    parser.addoption("--benchmark", action="store_true", default=False,
+                      help="run the scale benchmarks in test_scale.py")
+    parser.addoption("--benchmark-scale", action="store", type=float, default=1.0,
+                      help="scale factor applied to the number of entries injected by the scale benchmarks")
+    parser.addoption("--benchmark-results", action="store", default="scale_benchmark.json",
+                      help="file to store the scale benchmark results in, as JSON")
 
 class AsicDbValidator(object):
     def __init__(self, dvs):
@@ -101,35 +117,68 @@ class ApplDbValidator(object):
                 continue
             assert int(m.group(1)) > 0
 
+def ip_batch(cmds, netns_pid=None):
+    """Run ip commands in a single ip process, in the network namespace of netns_pid if given"""
+    prefix = "nsenter -t %d -n " % netns_pid if netns_pid else ""
+    return "%sip -batch - <<'EOF'\n%s\nEOF" % (prefix, "\n".join(cmds))
+
+def create_virtual_servers(ctn_name, pid, num):
+    """Create num virtual servers connected to the switch, with one batch of commands per namespace"""
+    servers = [VirtualServer(ctn_name, pid, i, create=False) for i in range(num)]
+    new_servers = [server for server in servers if server.cleanup]
+    if new_servers:
+        host_cmds = []
+        switch_cmds = []
+        server_cmds = []
+        for server in new_servers:
+            host_cmds += server.host_setup_cmds()
+            switch_cmds += server.switch_setup_cmds()
+            server_cmds += server.server_setup_cmds()
+        ensure_system(ip_batch(host_cmds))
+        ensure_system(ip_batch(switch_cmds, pid))
+        # disable ipv6, so no neigh on physical interfaces
+        ensure_system("nsenter -t %d -n sysctl -w %s" % (pid, " ".join(
+            "net.ipv6.conf.%s.disable_ipv6=1" % server.pifname for server in new_servers)))
+        ensure_system(" && ".join(server_cmds))
+    return servers
+
 class VirtualServer(object):
-    def __init__(self, ctn_name, pid, i):
+    def __init__(self, ctn_name, pid, i, create=True):
         self.nsname = "%s-srv%d" % (ctn_name, i)
         self.pifname = "eth%d" % (i + 1)
+        # the links are named after the switch pid in the host namespace so that
+        # switches created in parallel don't collide
+        self.vpeer_srv = "vs%ds%d" % (pid, i)
+        self.vpeer_sw = "vs%dp%d" % (pid, i)
+        self.pid = pid
         self.cleanup = True
 
         # create netns
         if os.path.exists("/var/run/netns/%s" % self.nsname):
             self.killall_processes()
             self.cleanup = False
-        else:
-            ensure_system("ip netns add %s" % self.nsname)
-
-            # create vpeer link
-            ensure_system("ip link add %s type veth peer name %s" % (self.nsname[0:12], self.pifname))
-            ensure_system("ip link set %s netns %s" % (self.nsname[0:12], self.nsname))
-            ensure_system("ip link set %s netns %d" % (self.pifname, pid))
+        elif create:
+            ensure_system(ip_batch(self.host_setup_cmds()))
+            ensure_system(ip_batch(self.switch_setup_cmds(), pid))
+            ensure_system("nsenter -t %d -n sysctl -w net.ipv6.conf.%s.disable_ipv6=1" % (pid, self.pifname))
+            ensure_system(" && ".join(self.server_setup_cmds()))
 
-            # bring up link in the virtual server
-            ensure_system("ip netns exec %s ip link set dev %s name eth0" % (self.nsname, self.nsname[0:12]))
-            ensure_system("ip netns exec %s ip link set dev eth0 up" % (self.nsname))
-            ensure_system("ip netns exec %s ethtool -K eth0 tx off" % (self.nsname))
+    def host_setup_cmds(self):
+        # create netns and vpeer link, move the ends to the virtual server and the virtual switch
+        return ["netns add %s" % self.nsname,
+                "link add %s type veth peer name %s" % (self.vpeer_srv, self.vpeer_sw),
+                "link set dev %s netns %s name eth0" % (self.vpeer_srv, self.nsname),
+                "link set dev %s netns %d name %s" % (self.vpeer_sw, self.pid, self.pifname)]
 
-            # bring up link in the virtual switch
-            ensure_system("nsenter -t %d -n ip link set dev %s up" % (pid, self.pifname))
+    def switch_setup_cmds(self):
+        # bring up link in the virtual switch, disable arp, so no neigh on physical interfaces
+        return ["link set dev %s up" % self.pifname,
+                "link set arp off dev %s" % self.pifname]
 
-            # disable arp, so no neigh on physical interfaces
-            ensure_system("nsenter -t %d -n ip link set arp off dev %s" % (pid, self.pifname))
-            ensure_system("nsenter -t %d -n sysctl -w net.ipv6.conf.%s.disable_ipv6=1" % (pid, self.pifname))
+    def server_setup_cmds(self):
+        # bring up link in the virtual server
+        return ["ip -n %s link set dev eth0 up" % self.nsname,
+                "ip netns exec %s ethtool -K eth0 tx off" % self.nsname]
 
     def killall_processes(self):
         pids = subprocess.check_output("ip netns pids %s" % (self.nsname), shell=True).decode('utf-8')
@@ -167,6 +216,17 @@ class DockerVirtualSwitch(object):
     FLEX_COUNTER_DB_ID = 5
     STATE_DB_ID = 6
 
+    # The helpers below used to sleep SETTLE_DELAY seconds after every operation. They now
+    # wait for the effect of the operation in APPL_DB/ASIC_DB instead, for at most as long.
+    SETTLE_DELAY = 1
+    CONVERGENCE_POLLING_CONFIG = PollingConfig(polling_interval=0.05, timeout=SETTLE_DELAY, strict=False)
+
+    # How often to check the process status while waiting for the dvs to be ready, in seconds
+    READY_CHECK_INTERVAL = 0.2
+
+    # How long to let a stopped daemon finish tearing down after its process is gone, in seconds
+    PROCESS_EXIT_SETTLE = 0.5
+
     def __init__(self, name=None, imgname=None, keeptb=False, fakeplatform=None):
         self.basicd = ['redis-server',
                        'rsyslogd']
@@ -219,10 +279,7 @@ class DockerVirtualSwitch(object):
             self.ctn_sw_pid = int(output)
 
             # create virtual servers
-            self.servers = []
-            for i in range(32):
-                server = VirtualServer(ctn_sw_name, self.ctn_sw_pid, i)
-                self.servers.append(server)
+            self.servers = create_virtual_servers(ctn_sw_name, self.ctn_sw_pid, 32)
 
             self.mount = "/var/run/redis-vs/{}".format(ctn_sw_name)
 
@@ -238,10 +295,7 @@ class DockerVirtualSwitch(object):
             self.ctn_sw_pid = int(output)
 
             # create virtual server
-            self.servers = []
-            for i in range(32):
-                server = VirtualServer(self.ctn_sw.name, self.ctn_sw_pid, i)
-                self.servers.append(server)
+            self.servers = create_virtual_servers(self.ctn_sw.name, self.ctn_sw_pid, 32)
 
             # mount redis to base to unique directory
             self.mount = "/var/run/redis-vs/{}".format(self.ctn_sw.name)
@@ -268,9 +322,16 @@ class DockerVirtualSwitch(object):
 
         self.dvs_acl = None
 
+        # Total time saved by wait_for_convergence compared to the fixed SETTLE_DELAY
+        self.settle_time_saved = 0
+
+        # Table snapshots used by the verification helpers, keyed by (db id, table name)
+        self.table_snapshots = {}
+
     def destroy(self):
         if self.appldb:
             del self.appldb
+        self.close_table_snapshots()
         if self.cleanup:
             self.ctn.remove(force=True)
             self.ctn_sw.remove(force=True)
@@ -281,9 +342,9 @@ class DockerVirtualSwitch(object):
     def check_ctn_status_and_db_connect(self):
         try:
             # temp fix: remove them once they are moved to vs start.sh
-            self.ctn.exec_run("sysctl -w net.ipv6.conf.default.disable_ipv6=0")
-            for i in range(0, 128, 4):
-                self.ctn.exec_run("sysctl -w net.ipv6.conf.eth%d.disable_ipv6=1" % (i + 1))
+            sysctls = ["net.ipv6.conf.default.disable_ipv6=0"]
+            sysctls += ["net.ipv6.conf.eth%d.disable_ipv6=1" % (i + 1) for i in range(0, 128, 4)]
+            self.ctn.exec_run("sysctl -w " + " ".join(sysctls))
             self.check_ready()
             self.init_asicdb_validator()
             self.appldb = ApplDbValidator(self)
@@ -299,7 +360,7 @@ class DockerVirtualSwitch(object):
         re_space = re.compile('\s+')
         process_status = {}
         ready = False
-        started = 0
+        start = time.time()
         while True:
             # get process status
             res = self.ctn.exec_run("supervisorctl status")
@@ -329,11 +390,10 @@ class DockerVirtualSwitch(object):
             if ready == True:
                 break
 
-            started += 1
-            if started > timeout:
+            if time.time() - start > timeout:
                 raise ValueError(out)
 
-            time.sleep(1)
+            time.sleep(self.READY_CHECK_INTERVAL)
 
     def net_cleanup(self):
         """clean up network, remove extra links"""
@@ -364,6 +424,7 @@ class DockerVirtualSwitch(object):
     def restart(self):
         if self.appldb:
             del self.appldb
+        self.close_table_snapshots()
         self.ctn_restart()
         self.check_ctn_status_and_db_connect()
 
@@ -390,7 +451,7 @@ class DockerVirtualSwitch(object):
 
     def stop_zebra(dvs):
         dvs.runcmd(['sh', '-c', 'pkill -9 zebra'])
-        time.sleep(1)
+        dvs.wait_for_process_exit("zebra")
 
     def start_fpmsyncd(dvs):
         dvs.runcmd(['sh', '-c', 'supervisorctl start fpmsyncd'])
@@ -400,7 +461,11 @@ class DockerVirtualSwitch(object):
 
     def stop_fpmsyncd(dvs):
         dvs.runcmd(['sh', '-c', 'pkill -x fpmsyncd'])
-        time.sleep(1)
+        dvs.wait_for_process_exit("fpmsyncd")
+
+    def wait_for_process_exit(self, pname):
+        self.wait_for_convergence(lambda: self.runcmd(['sh', '-c', '! pgrep -x {}'.format(pname)])[0] == 0)
+        time.sleep(self.PROCESS_EXIT_SETTLE)
 
     def init_asicdb_validator(self):
         self.asicdb = AsicDbValidator(self)
@@ -470,101 +535,95 @@ class DockerVirtualSwitch(object):
         pubsub.psubscribe("__keyspace@1__:ASIC_STATE:%s*" % objpfx)
         return pubsub
 
-    def CountSubscribedObjects(self, pubsub, ignore=None, timeout=10):
+    # The collection ends once no event has been received for timeout seconds, or earlier if
+    # the expected number of events or max_time is given and reached. With print_stats, the
+    # event rate of each object type is printed, e.g. to compare warm reboots.
+    def collect_subscribed_events(self, pubsub, timeout, expected=None, max_time=None,
+                                  print_stats=False, client=None):
+        collector = dvs_db.KeyspaceEventCollector(pubsub, timeout, max_time, expected)
+        events = collector.collect(client)
+        if print_stats:
+            collector.print_stats()
+        return collector, events
+
+    def CountSubscribedObjects(self, pubsub, ignore=None, timeout=10, expected=None, max_time=None,
+                               print_stats=False):
+        _, events = self.collect_subscribed_events(pubsub, timeout, expected, max_time, print_stats)
+
         nadd = 0
         ndel = 0
-        idle = 0
-        while True and idle < timeout:
-            message = pubsub.get_message()
-            if message:
-                print(message)
-                if ignore:
-                    fds = message['channel'].split(':')
-                    if fds[2] in ignore:
-                        continue
-                if message['data'] == 'hset':
-                    nadd += 1
-                elif message['data'] == 'del':
-                    ndel += 1
-                idle = 0
-            else:
-                time.sleep(1)
-                idle += 1
+        for message in events:
+            if ignore:
+                fds = message['channel'].split(':')
+                if fds[2] in ignore:
+                    continue
+            if message['data'] == 'hset':
+                nadd += 1
+            elif message['data'] == 'del':
+                ndel += 1
 
         return (nadd, ndel)
 
-    def GetSubscribedAppDbObjects(self, pubsub, ignore=None, timeout=10):
+    def GetSubscribedAppDbObjects(self, pubsub, ignore=None, timeout=10, expected=None, max_time=None,
+                                  print_stats=False):
         r = redis.Redis(unix_socket_path=self.redis_sock, db=swsscommon.APPL_DB,
                         encoding="utf-8", decode_responses=True)
+        collector, events = self.collect_subscribed_events(pubsub, timeout, expected, max_time,
+                                                           print_stats, r)
 
         addobjs = []
         delobjs = []
-        idle = 0
         prev_key = None
 
-        while True and idle < timeout:
-            message = pubsub.get_message()
-            if message:
-                print(message)
-                key = message['channel'].split(':', 1)[1]
-                # In producer/consumer_state_table scenarios, every entry will
-                # show up twice for every push/pop operation, so skip the second
-                # one to avoid double counting.
-                if key != None and key == prev_key:
-                    continue
-                # Skip instructions with meaningless keys. To be extended in the
-                # future to other undesired keys.
-                if key == "ROUTE_TABLE_KEY_SET" or key == "ROUTE_TABLE_DEL_SET":
+        for message, value in zip(events, collector.values):
+            key = message['channel'].split(':', 1)[1]
+            # In producer/consumer_state_table scenarios, every entry will
+            # show up twice for every push/pop operation, so skip the second
+            # one to avoid double counting.
+            if key != None and key == prev_key:
+                continue
+            # Skip instructions with meaningless keys. To be extended in the
+            # future to other undesired keys.
+            if key == "ROUTE_TABLE_KEY_SET" or key == "ROUTE_TABLE_DEL_SET":
+                continue
+            if ignore:
+                fds = message['channel'].split(':')
+                if fds[2] in ignore:
                     continue
-                if ignore:
-                    fds = message['channel'].split(':')
-                    if fds[2] in ignore:
-                        continue
-
-                if message['data'] == 'hset':
-                    (_, k) = key.split(':', 1)
-                    value=r.hgetall(key)
-                    addobjs.append({'key':json.dumps(k), 'vals':json.dumps(value)})
-                    prev_key = key
-                elif message['data'] == 'del':
-                    (_, k) = key.split(':', 1)
-                    delobjs.append({'key':json.dumps(k)})
-                idle = 0
-            else:
-                time.sleep(1)
-                idle += 1
+
+            if message['data'] == 'hset':
+                (_, k) = key.split(':', 1)
+                addobjs.append({'key':json.dumps(k), 'vals':json.dumps(value)})
+                prev_key = key
+            elif message['data'] == 'del':
+                (_, k) = key.split(':', 1)
+                delobjs.append({'key':json.dumps(k)})
 
         return (addobjs, delobjs)
 
 
-    def GetSubscribedAsicDbObjects(self, pubsub, ignore=None, timeout=10):
+    def GetSubscribedAsicDbObjects(self, pubsub, ignore=None, timeout=10, expected=None, max_time=None,
+                                   print_stats=False):
         r = redis.Redis(unix_socket_path=self.redis_sock, db=swsscommon.ASIC_DB,
                         encoding="utf-8", decode_responses=True)
+        collector, events = self.collect_subscribed_events(pubsub, timeout, expected, max_time,
+                                                           print_stats, r)
 
         addobjs = []
         delobjs = []
-        idle = 0
-
-        while True and idle < timeout:
-            message = pubsub.get_message()
-            if message:
-                print(message)
-                key = message['channel'].split(':', 1)[1]
-                if ignore:
-                    fds = message['channel'].split(':')
-                    if fds[2] in ignore:
-                        continue
-                if message['data'] == 'hset':
-                    value=r.hgetall(key)
-                    (_, t, k) = key.split(':', 2)
-                    addobjs.append({'type':t, 'key':k, 'vals':value})
-                elif message['data'] == 'del':
-                    (_, t, k) = key.split(':', 2)
-                    delobjs.append({'key':k})
-                idle = 0
-            else:
-                time.sleep(1)
-                idle += 1
+
+        for message, value in zip(events, collector.values):
+            key = message['channel'].split(':', 1)[1]
+            if ignore:
+                fds = message['channel'].split(':')
+                if fds[2] in ignore:
+                    continue
+            if message['data'] == 'hset':
+                (_, t, k) = key.split(':', 2)
+                addobjs.append({'type':t, 'key':k, 'vals':value})
+            elif message['data'] == 'del':
+                (_, t, k) = key.split(':', 2)
+                delobjs.append({'key':k})
 
         return (addobjs, delobjs)
 
@@ -578,30 +637,41 @@ class DockerVirtualSwitch(object):
             pubsub.psubscribe("__keyspace@{}__:{}".format(db, obj))
         return pubsub
 
-    def GetSubscribedMessages(self, pubsub, timeout=10):
-        messages = []
-        delobjs = []
-        idle = 0
-        prev_key = None
-
-        while True and idle < timeout:
-            message = pubsub.get_message()
-            if message:
-                messages.append(message)
-                idle = 0
-            else:
-                time.sleep(1)
-                idle += 1
-        return (messages)
+    def GetSubscribedMessages(self, pubsub, timeout=10, expected=None, max_time=None,
+                              print_stats=False):
+        collector, _ = self.collect_subscribed_events(pubsub, timeout, expected, max_time, print_stats)
+        return (collector.messages)
+
+    def get_table_snapshot(self, db, table):
+        """Get an up to date in-memory snapshot of `table` in `db`.
+
+        Snapshots are kept between calls and only re-read the entries that changed since the
+        last call.
+        """
+        db_id = db.getDbId()
+        snapshot = self.table_snapshots.get((db_id, table))
+        if snapshot:
+            snapshot.refresh()
+            return snapshot
+
+        client = redis.Redis(unix_socket_path=self.redis_sock, db=db_id,
+                             encoding="utf-8", decode_responses=True)
+        separator = swsscommon.Table(db, table).getTableNameSeparator()
+        snapshot = dvs_snapshot.TableSnapshot(client, db_id, table, separator)
+        self.table_snapshots[(db_id, table)] = snapshot
+        return snapshot
+
+    def close_table_snapshots(self):
+        for snapshot in self.table_snapshots.values():
+            snapshot.close()
+        self.table_snapshots = {}
 
     def get_map_iface_bridge_port_id(self, asic_db):
         port_id_2_iface = self.asicdb.portoidmap
-        tbl = swsscommon.Table(asic_db, "ASIC_STATE:SAI_OBJECT_TYPE_BRIDGE_PORT")
+        snapshot = self.get_table_snapshot(asic_db, "ASIC_STATE:SAI_OBJECT_TYPE_BRIDGE_PORT")
         iface_2_bridge_port_id = {}
-        for key in tbl.getKeys():
-            status, data = tbl.get(key)
-            assert status
-            values = dict(data)
+        for key in snapshot.keys():
+            values = snapshot.get(key)
             iface_id = values["SAI_BRIDGE_PORT_ATTR_PORT_ID"]
             iface_name = port_id_2_iface[iface_id]
             iface_2_bridge_port_id[iface_name] = key
@@ -609,48 +679,36 @@ class DockerVirtualSwitch(object):
         return iface_2_bridge_port_id
 
     def get_vlan_oid(self, asic_db, vlan_id):
-        tbl = swsscommon.Table(asic_db, "ASIC_STATE:SAI_OBJECT_TYPE_VLAN")
-        keys = tbl.getKeys()
-
-        for key in keys:
-            status, fvs = tbl.get(key)
-            assert status, "Error reading from table %s" % "ASIC_STATE:SAI_OBJECT_TYPE_VLAN"
-
-            for k, v in fvs:
-                if k == "SAI_VLAN_ATTR_VLAN_ID" and v == vlan_id:
-                    return True, key
+        snapshot = self.get_table_snapshot(asic_db, "ASIC_STATE:SAI_OBJECT_TYPE_VLAN")
+        keys = snapshot.find_by_attributes({"SAI_VLAN_ATTR_VLAN_ID": vlan_id})
+        if keys:
+            return True, keys[0]
 
         return False, "Not found vlan id %s" % vlan_id
 
     def is_table_entry_exists(self, db, table, keyregex, attributes):
-        tbl = swsscommon.Table(db, table)
-        keys = tbl.getKeys()
+        snapshot = self.get_table_snapshot(db, table)
+
+        for key in snapshot.find_by_attributes(dict(attributes)):
+            if re.match(keyregex, key) is not None:
+                return True, []
 
         extra_info = []
-        for key in keys:
+        for key in snapshot.keys():
             if re.match(keyregex, key) is None:
                 continue
 
-            status, fvs = tbl.get(key)
-            assert status, "Error reading from table %s" % table
+            fvs = snapshot.get(key)
+            d_attributes = {k: v for k, v in dict(attributes).items() if fvs.get(k) != v}
+            extra_info.append("Desired attributes %s was not found for key %s" % (str(d_attributes), key))
 
-            d_attributes = dict(attributes)
-            for k, v in fvs:
-                if k in d_attributes and d_attributes[k] == v:
-                    del d_attributes[k]
-
-            if len(d_attributes) != 0:
-                extra_info.append("Desired attributes %s was not found for key %s" % (str(d_attributes), key))
-            else:
-                return True, extra_info
-        else:
-            if not extra_info:
-                extra_info.append("Desired key regex %s was not found" % str(keyregex))
-            return False, extra_info
+        if not extra_info:
+            extra_info.append("Desired key regex %s was not found" % str(keyregex))
+        return False, extra_info
 
     def all_table_entry_has(self, db, table, keyregex, attributes):
-        tbl = swsscommon.Table(db, table)
-        keys = tbl.getKeys()
+        snapshot = self.get_table_snapshot(db, table)
+        keys = snapshot.keys()
         extra_info = []
 
         if len(keys) == 0:
@@ -661,13 +719,8 @@ class DockerVirtualSwitch(object):
             if re.match(keyregex, key) is None:
                 continue
 
-            status, fvs = tbl.get(key)
-            assert status, "Error reading from table %s" % table
-
-            d_attributes = dict(attributes)
-            for k, v in fvs:
-                if k in d_attributes and d_attributes[k] == v:
-                    del d_attributes[k]
+            fvs = snapshot.get(key)
+            d_attributes = {k: v for k, v in dict(attributes).items() if fvs.get(k) != v}
 
             if len(d_attributes) != 0:
                 extra_info.append("Desired attributes %s were not found for key %s" % (str(d_attributes), key))
@@ -676,8 +729,8 @@ class DockerVirtualSwitch(object):
         return True, extra_info
 
     def all_table_entry_has_no(self, db, table, keyregex, attributes_list):
-        tbl = swsscommon.Table(db, table)
-        keys = tbl.getKeys()
+        snapshot = self.get_table_snapshot(db, table)
+        keys = snapshot.keys()
         extra_info = []
 
         if len(keys) == 0:
@@ -688,10 +741,7 @@ class DockerVirtualSwitch(object):
             if re.match(keyregex, key) is None:
                 continue
 
-            status, fvs = tbl.get(key)
-            assert status, "Error reading from table %s" % table
-
-            for k, v in fvs:
+            for k in snapshot.get(key):
                 if k in attributes_list:
                     extra_info.append("Unexpected attribute %s was found for key %s" % (k, key))
                     return False, extra_info
@@ -699,86 +749,143 @@ class DockerVirtualSwitch(object):
         return True, extra_info
 
     def is_fdb_entry_exists(self, db, table, key_values, attributes):
-        tbl =  swsscommon.Table(db, table)
-        keys = tbl.getKeys()
+        snapshot = self.get_table_snapshot(db, table)
+        keys = snapshot.find_by_key_fields(dict(key_values))
 
-        exists = False
         extra_info = []
-        key_found = False
         for key in keys:
-            try:
-                d_key = json.loads(key)
-            except ValueError:
-                d_key = json.loads('{' + key + '}')
-
-            key_found = True
-
-            for k, v in key_values:
-                if k not in d_key or v != d_key[k]:
-                    key_found = False
-                    break
-
-            if not key_found:
-                continue
-
-            status, fvs = tbl.get(key)
-            assert status, "Error reading from table %s" % table
-
-            d_attributes = dict(attributes)
-            for k, v in fvs:
-                if k in d_attributes and d_attributes[k] == v:
-                    del d_attributes[k]
+            fvs = snapshot.get(key)
+            d_attributes = {k: v for k, v in dict(attributes).items() if fvs.get(k) != v}
 
             if len(d_attributes) != 0:
-                exists = False
                 extra_info.append("Desired attributes %s was not found for key %s" % (str(d_attributes), key))
             else:
-                exists = True
-                break
+                return True, extra_info
 
-        if not key_found:
-            exists = False
+        if not keys:
             extra_info.append("Desired key with parameters %s was not found" % str(key_values))
 
-        return exists, extra_info
+        return False, extra_info
+
+    def wait_for_convergence(self, converged):
+        """Wait until `converged` returns True, for at most SETTLE_DELAY seconds.
+
+        Args:
+            converged: A function that checks if the effect of an operation is visible in the
+                databases.
+
+        Returns:
+            True if the operation converged before the timeout.
+        """
+        start = time.time()
+        status, _ = wait_for_result(lambda: (converged(), None), self.CONVERGENCE_POLLING_CONFIG)
+        if status:
+            self.settle_time_saved += max(0, self.SETTLE_DELAY - (time.time() - start))
+
+        return status
+
+    def appl_db_entry(self, table, key):
+        (status, fvs) = swsscommon.Table(self.get_app_db().db_connection, table).get(key)
+        return dict(fvs) if status else None
+
+    def asic_db_entry(self, obj_type, key):
+        (status, fvs) = swsscommon.Table(self.get_asic_db().db_connection, "ASIC_STATE:" + obj_type).get(key)
+        return dict(fvs) if status else None
+
+    def asic_db_key_exists(self, obj_type, substr):
+        keys = swsscommon.Table(self.get_asic_db().db_connection, "ASIC_STATE:" + obj_type).getKeys()
+        return any(substr in key for key in keys)
+
+    def asic_db_route_exists(self, prefix):
+        if "/" not in prefix:
+            prefix += "/128" if ":" in prefix else "/32"
+        return self.asic_db_key_exists("SAI_OBJECT_TYPE_ROUTE_ENTRY", "\"dest\":\"%s\"" % prefix)
+
+    def asic_db_vlan_member_exists(self, vlan, interface):
+        port_oid = self.asicdb.portnamemap.get(interface)
+        found, vlan_oid = self.get_vlan_oid(self.get_asic_db().db_connection, vlan)
+        if port_oid is None or not found:
+            return False
+
+        tbl = swsscommon.Table(self.get_asic_db().db_connection, "ASIC_STATE:SAI_OBJECT_TYPE_BRIDGE_PORT")
+        bridge_port_oids = [k for k in tbl.getKeys()
+                            if (self.asic_db_entry("SAI_OBJECT_TYPE_BRIDGE_PORT", k) or {})
+                                .get("SAI_BRIDGE_PORT_ATTR_PORT_ID") == port_oid]
+
+        tbl = swsscommon.Table(self.get_asic_db().db_connection, "ASIC_STATE:SAI_OBJECT_TYPE_VLAN_MEMBER")
+        for k in tbl.getKeys():
+            fvs = self.asic_db_entry("SAI_OBJECT_TYPE_VLAN_MEMBER", k) or {}
+            if (fvs.get("SAI_VLAN_MEMBER_ATTR_VLAN_ID") == vlan_oid and
+                    fvs.get("SAI_VLAN_MEMBER_ATTR_BRIDGE_PORT_ID") in bridge_port_oids):
+                return True
+
+        return False
+
+    def asic_db_key_count(self, obj_type):
+        return len(swsscommon.Table(self.get_asic_db().db_connection, "ASIC_STATE:" + obj_type).getKeys())
 
     def create_vlan(self, vlan):
         tbl = swsscommon.Table(self.cdb, "VLAN")
         fvs = swsscommon.FieldValuePairs([("vlanid", vlan)])
         tbl.set("Vlan" + vlan, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.get_vlan_oid(self.get_asic_db().db_connection, vlan)[0])
 
     def remove_vlan(self, vlan):
         tbl = swsscommon.Table(self.cdb, "VLAN")
         tbl._del("Vlan" + vlan)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.appl_db_entry("VLAN_TABLE", "Vlan" + vlan) is None and
+                                          not self.get_vlan_oid(self.get_asic_db().db_connection, vlan)[0])
+
+    def vlan_member_converged(self, vlan, interface, exists):
+        if (self.appl_db_entry("VLAN_MEMBER_TABLE", "Vlan" + vlan + ":" + interface) is not None) != exists:
+            return False
+        # Only members on physical ports can be looked up in ASIC_DB
+        if interface not in self.asicdb.portnamemap:
+            return True
+        return self.asic_db_vlan_member_exists(vlan, interface) == exists
 
     def create_vlan_member(self, vlan, interface):
         tbl = swsscommon.Table(self.cdb, "VLAN_MEMBER")
         fvs = swsscommon.FieldValuePairs([("tagging_mode", "untagged")])
         tbl.set("Vlan" + vlan + "|" + interface, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.vlan_member_converged(vlan, interface, True))
 
     def remove_vlan_member(self, vlan, interface):
         tbl = swsscommon.Table(self.cdb, "VLAN_MEMBER")
         tbl._del("Vlan" + vlan + "|" + interface)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.vlan_member_converged(vlan, interface, False))
 
     def create_vlan_member_tagged(self, vlan, interface):
         tbl = swsscommon.Table(self.cdb, "VLAN_MEMBER")
         fvs = swsscommon.FieldValuePairs([("tagging_mode", "tagged")])
         tbl.set("Vlan" + vlan + "|" + interface, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.vlan_member_converged(vlan, interface, True))
 
     def remove_vlan_member(self, vlan, interface):
         tbl = swsscommon.Table(self.cdb, "VLAN_MEMBER")
         tbl._del("Vlan" + vlan + "|" + interface)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.vlan_member_converged(vlan, interface, False))
 
     def remove_vlan(self, vlan):
         tbl = swsscommon.Table(self.cdb, "VLAN")
         tbl._del("Vlan" + vlan)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.appl_db_entry("VLAN_TABLE", "Vlan" + vlan) is None and
+                                          not self.get_vlan_oid(self.get_asic_db().db_connection, vlan)[0])
+
+    def port_attr_converged(self, interface, field, value, asic_attr, asic_value):
+        if interface.startswith("PortChannel"):
+            appl_tbl_name = "LAG_TABLE"
+        elif interface.startswith("Vlan"):
+            appl_tbl_name = "VLAN_TABLE"
+        else:
+            appl_tbl_name = "PORT_TABLE"
+        if (self.appl_db_entry(appl_tbl_name, interface) or {}).get(field) != value:
+            return False
+        # Only physical ports can be looked up in ASIC_DB
+        port_oid = self.asicdb.portnamemap.get(interface)
+        if port_oid is None:
+            return True
+        return (self.asic_db_entry("SAI_OBJECT_TYPE_PORT", port_oid) or {}).get(asic_attr) == asic_value
 
     def set_interface_status(self, interface, admin_status):
         if interface.startswith("PortChannel"):
@@ -790,7 +897,9 @@ class DockerVirtualSwitch(object):
         tbl = swsscommon.Table(self.cdb, tbl_name)
         fvs = swsscommon.FieldValuePairs([("admin_status", admin_status)])
         tbl.set(interface, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.port_attr_converged(
+            interface, "admin_status", admin_status,
+            "SAI_PORT_ATTR_ADMIN_STATE", "true" if admin_status == "up" else "false"))
 
     def add_ip_address(self, interface, ip):
         if interface.startswith("PortChannel"):
@@ -803,7 +912,8 @@ class DockerVirtualSwitch(object):
         fvs = swsscommon.FieldValuePairs([("NULL", "NULL")])
         tbl.set(interface, fvs)
         tbl.set(interface + "|" + ip, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.appl_db_entry("INTF_TABLE", interface + ":" + ip) is not None and
+                                          self.asic_db_route_exists(ip.split("/")[0]))
 
     def remove_ip_address(self, interface, ip):
         if interface.startswith("PortChannel"):
@@ -815,7 +925,8 @@ class DockerVirtualSwitch(object):
         tbl = swsscommon.Table(self.cdb, tbl_name)
         tbl._del(interface + "|" + ip);
         tbl._del(interface);
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.appl_db_entry("INTF_TABLE", interface + ":" + ip) is None and
+                                          not self.asic_db_route_exists(ip.split("/")[0]))
 
     def set_mtu(self, interface, mtu):
         if interface.startswith("PortChannel"):
@@ -827,39 +938,45 @@ class DockerVirtualSwitch(object):
         tbl = swsscommon.Table(self.cdb, tbl_name)
         fvs = swsscommon.FieldValuePairs([("mtu", mtu)])
         tbl.set(interface, fvs)
-        time.sleep(1)
+        # The port MTU in ASIC_DB includes the ethernet header, vlan tag and FCS
+        self.wait_for_convergence(lambda: self.port_attr_converged(
+            interface, "mtu", mtu, "SAI_PORT_ATTR_MTU", str(int(mtu) + 22)))
 
     def add_neighbor(self, interface, ip, mac):
         tbl = swsscommon.ProducerStateTable(self.pdb, "NEIGH_TABLE")
         fvs = swsscommon.FieldValuePairs([("neigh", mac),
                                           ("family", "IPv4")])
         tbl.set(interface + ":" + ip, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.asic_db_key_exists(
+            "SAI_OBJECT_TYPE_NEIGHBOR_ENTRY", "\"ip\":\"%s\"" % ip))
 
     def remove_neighbor(self, interface, ip):
         tbl = swsscommon.ProducerStateTable(self.pdb, "NEIGH_TABLE")
         tbl._del(interface + ":" + ip)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: not self.asic_db_key_exists(
+            "SAI_OBJECT_TYPE_NEIGHBOR_ENTRY", "\"ip\":\"%s\"" % ip))
 
     def add_route(self, prefix, nexthop):
         self.runcmd("ip route add " + prefix + " via " + nexthop)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.asic_db_route_exists(prefix))
 
     def remove_route(self, prefix):
         self.runcmd("ip route del " + prefix)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: not self.asic_db_route_exists(prefix))
 
     def create_fdb(self, vlan, mac, interface):
         tbl = swsscommon.ProducerStateTable(self.pdb, "FDB_TABLE")
         fvs = swsscommon.FieldValuePairs([("port", interface),
                                           ("type", "dynamic")])
         tbl.set("Vlan" + vlan + ":" + mac, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.asic_db_key_exists(
+            "SAI_OBJECT_TYPE_FDB_ENTRY", "\"mac\":\"%s\"" % mac.replace("-", ":").upper()))
 
     def remove_fdb(self, vlan, mac):
         tbl = swsscommon.ProducerStateTable(self.pdb, "FDB_TABLE")
         tbl._del("Vlan" + vlan + ":" + mac)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: not self.asic_db_key_exists(
+            "SAI_OBJECT_TYPE_FDB_ENTRY", "\"mac\":\"%s\"" % mac.replace("-", ":").upper()))
 
     def setup_db(self):
         self.pdb = swsscommon.DBConnector(0, self.redis_sock, 0)
@@ -899,17 +1016,19 @@ class DockerVirtualSwitch(object):
         ntf.send("set_ro", str(key), fvp)
 
     def create_acl_table(self, table, type, ports):
+        num_tables = self.asic_db_key_count("SAI_OBJECT_TYPE_ACL_TABLE")
         tbl = swsscommon.Table(self.cdb, "ACL_TABLE")
         fvs = swsscommon.FieldValuePairs([("policy_desc", table),
                                           ("type", type),
                                           ("ports", ",".join(ports))])
         tbl.set(table, fvs)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.asic_db_key_count("SAI_OBJECT_TYPE_ACL_TABLE") > num_tables)
 
     def remove_acl_table(self, table):
+        num_tables = self.asic_db_key_count("SAI_OBJECT_TYPE_ACL_TABLE")
         tbl = swsscommon.Table(self.cdb, "ACL_TABLE")
         tbl._del(table)
-        time.sleep(1)
+        self.wait_for_convergence(lambda: self.asic_db_key_count("SAI_OBJECT_TYPE_ACL_TABLE") < num_tables)
 
     def update_acl_table(self, table, fvs):
         tbl = swsscommon.Table(self.cdb, "ACL_TABLE")
@@ -1030,13 +1149,41 @@ class DockerVirtualSwitch(object):
 
         return self.state_db
 
+@pytest.yield_fixture(scope="session")
+def dvs_pool(request):
+    # dvs shared by the test modules of this process in --dvspool mode
+    pool = []
+    yield pool
+    for dvs in pool:
+        dvs.destroy()
+
 @pytest.yield_fixture(scope="module")
-def dvs(request):
+def dvs(request, dvs_pool):
     name = request.config.getoption("--dvsname")
     keeptb = request.config.getoption("--keeptb")
     imgname = request.config.getoption("--imgname")
     fakeplatform = getattr(request.module, "DVS_FAKE_PLATFORM", None)
+    start = time.time()
+
+    # modules that need a fake platform always get a dedicated dvs
+    if request.config.getoption("--dvspool") and name == None and fakeplatform == None:
+        if dvs_pool:
+            dvs = dvs_pool[0]
+            # start from a clean switch, like a persistent dvs does
+            dvs.net_cleanup()
+            dvs.restart()
+            dvs.app_db = dvs.asic_db = dvs.counters_db = None
+            dvs.config_db = dvs.flex_db = dvs.state_db = None
+        else:
+            dvs = DockerVirtualSwitch(None, imgname, keeptb)
+            dvs_pool.append(dvs)
+        dvs_setup_time[request.module.__name__] = time.time() - start
+        yield dvs
+        dvs.get_logs(request.module.__name__)
+        return
+
     dvs = DockerVirtualSwitch(name, imgname, keeptb, fakeplatform)
+    dvs_setup_time[request.module.__name__] = time.time() - start
     yield dvs
     if name == None:
         dvs.get_logs(request.module.__name__)
@@ -1044,6 +1191,32 @@ def dvs(request):
         dvs.get_logs()
     dvs.destroy()
 
+@pytest.fixture(autouse=True)
+def settle_time_report(request):
+    if "dvs" not in request.fixturenames:
+        yield
+        return
+
+    dvs = request.getfixturevalue("dvs")
+    saved = dvs.settle_time_saved
+    yield
+    settle_time_saved[request.node.nodeid] = dvs.settle_time_saved - saved
+
+def pytest_terminal_summary(terminalreporter):
+    if dvs_setup_time:
+        terminalreporter.section("dvs setup time")
+        for module, setup_time in dvs_setup_time.items():
+            terminalreporter.write_line("{:8.2f}s {}".format(setup_time, module))
+        terminalreporter.write_line("{:8.2f}s total".format(sum(dvs_setup_time.values())))
+
+    if not settle_time_saved:
+        return
+
+    terminalreporter.section("settle time saved by convergence waits")
+    for nodeid, saved in settle_time_saved.items():
+        terminalreporter.write_line("{:8.2f}s {}".format(saved, nodeid))
+    terminalreporter.write_line("{:8.2f}s total".format(sum(settle_time_saved.values())))
+
 @pytest.yield_fixture
 def testlog(request, dvs):
     dvs.runcmd("logger === start test %s ===" % request.node.name)
@@ -0,0 +1,194 @@
+"""Utilities for measuring how fast orchagent programs APPL_DB entries into ASIC_DB."""
+import json
+import math
+import threading
+import time
+
+from typing import Callable, Dict, List, Tuple
+import redis
+from swsscommon import swsscommon
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get the `pct` percentile of `values` using the nearest-rank method.
+
+    Args:
+        values: The values, in any order.
+        pct: The percentile to compute, between 0 and 100.
+
+    Returns:
+        The percentile, or 0 if there are no values.
+    """
+    if not values:
+        return 0
+
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class ConvergenceBenchmark:
+    """ConvergenceBenchmark times the APPL_DB -> ASIC_DB convergence of one object type.
+
+    Entries are written to APPL_DB with a buffered ProducerStateTable and flushed every
+    `batch_size` entries. A listener thread watches the ASIC_DB keyspace notifications for the
+    object type and records when each entry shows up in (or disappears from) ASIC_DB. The latency
+    of an entry is measured from the flush of its batch to its ASIC_DB notification.
+    """
+
+    def __init__(self, dvs, app_table: str, asic_object_type: str,
+                 asic_key_id: Callable[[Dict[str, str]], str], batch_size: int = 1000):
+        """Initialize a ConvergenceBenchmark instance.
+
+        Args:
+            dvs: The virtual switch to run the benchmark on.
+            app_table: The APPL_DB table to write the entries to, e.g. "ROUTE_TABLE".
+            asic_object_type: The SAI object type the entries are programmed as,
+                e.g. "SAI_OBJECT_TYPE_ROUTE_ENTRY".
+            asic_key_id: A function that maps the fields of an ASIC_DB key to the ID that was
+                passed to `add`/`remove` for that entry.
+            batch_size: The number of entries written between two flushes.
+        """
+        self.app_table = app_table
+        self.asic_object_type = asic_object_type
+        self.asic_key_id = asic_key_id
+        self.batch_size = batch_size
+
+        self.app_db = swsscommon.DBConnector(swsscommon.APPL_DB, dvs.redis_sock, 0)
+        self.asic_client = redis.Redis(unix_socket_path=dvs.redis_sock, db=swsscommon.ASIC_DB,
+                                       encoding="utf-8", decode_responses=True)
+
+    def add(self, entries: List[Tuple[str, str, List[Tuple[str, str]]]],
+            timeout: float) -> Dict[str, float]:
+        """Write `entries` to APPL_DB and wait for all of them to be programmed in ASIC_DB.
+
+        Args:
+            entries: The entries as (ID, APPL_DB key, field-value pairs) tuples.
+            timeout: The maximum amount of time to wait for convergence, in seconds.
+
+        Returns:
+            The convergence statistics of the run.
+        """
+        def write(table, key, fvs):
+            table.set(key, swsscommon.FieldValuePairs(fvs))
+
+        return self._run(entries, write, "hset", timeout)
+
+    def remove(self, entries: List[Tuple[str, str, List[Tuple[str, str]]]],
+               timeout: float) -> Dict[str, float]:
+        """Remove `entries` from APPL_DB and wait for all of them to be removed from ASIC_DB.
+
+        Args:
+            entries: The entries as (ID, APPL_DB key, field-value pairs) tuples.
+            timeout: The maximum amount of time to wait for convergence, in seconds.
+
+        Returns:
+            The convergence statistics of the run.
+        """
+        def write(table, key, fvs):
+            table._del(key)
+
+        return self._run(entries, write, "del", timeout)
+
+    def _run(self, entries, write, operation, timeout):
+        pending = {entry_id for entry_id, _, _ in entries}
+        programmed = {}
+        done = threading.Event()
+
+        pubsub = self.asic_client.pubsub()
+        pubsub.psubscribe(f"__keyspace@{swsscommon.ASIC_DB}__:ASIC_STATE:{self.asic_object_type}:*")
+        # Wait for the subscription to be confirmed so that no change can be missed
+        pubsub.get_message(timeout=1)
+
+        def listen():
+            deadline = time.time() + timeout
+            while pending and time.time() < deadline:
+                message = pubsub.get_message(timeout=min(1, max(deadline - time.time(), 0)))
+                if not message or message["type"] != "pmessage" or message["data"] != operation:
+                    continue
+
+                asic_key = message["channel"].split(":", 3)[3]
+                try:
+                    entry_id = self.asic_key_id(json.loads(asic_key))
+                except (ValueError, KeyError):
+                    continue
+
+                if entry_id in pending:
+                    pending.discard(entry_id)
+                    programmed[entry_id] = time.time()
+
+            done.set()
+
+        listener = threading.Thread(target=listen)
+        listener.start()
+
+        injected = {}
+        pipeline = swsscommon.RedisPipeline(self.app_db)
+        table = swsscommon.ProducerStateTable(pipeline, self.app_table, True)
+        start = time.time()
+        try:
+            for i in range(0, len(entries), self.batch_size):
+                batch = entries[i:i + self.batch_size]
+                for _, key, fvs in batch:
+                    write(table, key, fvs)
+                table.flush()
+
+                flushed = time.time()
+                for entry_id, _, _ in batch:
+                    injected[entry_id] = flushed
+            inject_time = time.time() - start
+        finally:
+            done.wait(timeout + 5)
+            listener.join()
+            pubsub.close()
+
+        duration = max(programmed.values(), default=start) - start
+        latencies = [max(programmed[entry_id] - injected[entry_id], 0)
+                     for entry_id in programmed if entry_id in injected]
+
+        return {
+            "operation": "add" if operation == "hset" else "remove",
+            "app_table": self.app_table,
+            "asic_object_type": self.asic_object_type,
+            "count": len(entries),
+            "converged": len(programmed),
+            "inject_time": inject_time,
+            "duration": duration,
+            "throughput": len(programmed) / duration if duration > 0 else 0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p99": percentile(latencies, 99),
+            "latency_max": max(latencies, default=0),
+        }
+
+
+class BenchmarkResults:
+    """BenchmarkResults collects the results of a benchmark run and stores them as JSON."""
+
+    def __init__(self, path: str, metadata: Dict[str, str]):
+        """Initialize a BenchmarkResults instance.
+
+        Args:
+            path: The file to store the results in.
+            metadata: Information about the run, e.g. the image name, stored with the results.
+        """
+        self.path = path
+        self.metadata = metadata
+        self.results = []
+
+    def add(self, name: str, result: Dict[str, float]) -> None:
+        """Record the result of benchmark `name` and print a summary line.
+
+        Args:
+            name: The name of the benchmark.
+            result: The convergence statistics returned by ConvergenceBenchmark.
+        """
+        self.results.append(dict(result, name=name))
+        print("%s: %s %d/%d entries in %.2fs (%.0f/s), latency p50 %.3fs p99 %.3fs" %
+              (name, result["operation"], result["converged"], result["count"],
+               result["duration"], result["throughput"],
+               result["latency_p50"], result["latency_p99"]))
+
+    def save(self) -> None:
+        """Write the results to `path`."""
+        with open(self.path, "w") as f:
+            json.dump({"metadata": self.metadata, "results": self.results}, f, indent=4)
@@ -3,7 +3,7 @@
 import collections
 import time
 
-from typing import Any, Callable, Tuple
+from typing import Any, Callable, Optional, Tuple
 
 _PollingConfig = collections.namedtuple('PollingConfig', 'polling_interval timeout strict')
 
@@ -21,6 +21,7 @@ class PollingConfig(_PollingConfig):
 def wait_for_result(
     polling_function: Callable[[], Tuple[bool, Any]],
     polling_config: PollingConfig,
+    wait_for_change: Optional[Callable[[float], None]] = None,
 ) -> Tuple[bool, Any]:
     """Run `polling_function` periodically using the specified `polling_config`.
 
@@ -29,6 +30,10 @@ def wait_for_result(
             must return a status which indicates if the function was succesful or not, as well as
             some return value.
         polling_config: The parameters to use to poll the polling function.
+        wait_for_change: An optional function that blocks until the data checked by
+            `polling_function` may have changed, or until the timeout (in seconds) passed to it
+            expires. If it is provided, `polling_function` is only run again after a change
+            instead of every `polling_interval`.
 
     Returns:
         If the polling function succeeds, then this method will return True and the output of the
@@ -37,6 +42,9 @@ def wait_for_result(
         If it does not succeed within the provided timeout, it will return False and whatever the
         output of the polling function was on the final attempt.
     """
+    if wait_for_change and polling_config.polling_interval != 0:
+        return _wait_for_change_result(polling_function, polling_config, wait_for_change)
+
     if polling_config.polling_interval == 0:
         iterations = 1
     else:
@@ -54,3 +62,28 @@ def wait_for_result(
         assert False, f"Operation timed out after {polling_config.timeout} seconds"
 
     return (False, result)
+
+
+def _wait_for_change_result(
+    polling_function: Callable[[], Tuple[bool, Any]],
+    polling_config: PollingConfig,
+    wait_for_change: Callable[[float], None],
+) -> Tuple[bool, Any]:
+    deadline = time.monotonic() + polling_config.timeout
+
+    while True:
+        status, result = polling_function()
+
+        if status:
+            return (True, result)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        wait_for_change(remaining)
+
+    if polling_config.strict:
+        assert False, f"Operation timed out after {polling_config.timeout} seconds"
+
+    return (False, result)
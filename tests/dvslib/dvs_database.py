@@ -1,27 +1,239 @@
 """Utilities for interacting with redis when writing VS tests."""
-from typing import Dict, List
+import re
+import time
+
+from typing import Callable, Dict, Iterable, List, Optional
+import redis
 from swsscommon import swsscommon
 from dvslib.dvs_common import wait_for_result, PollingConfig
 
 
+def keyspace_events_enabled(client: redis.Redis) -> bool:
+    """Check if redis publishes the keyspace notifications needed to watch hash tables.
+
+    Args:
+        client: The redis client to check.
+
+    Returns:
+        True if keyspace notifications are enabled for hash and generic commands.
+    """
+    try:
+        config = client.config_get("notify-keyspace-events")
+    except redis.RedisError:
+        return False
+
+    flags = config.get("notify-keyspace-events", "")
+    return "K" in flags and ("A" in flags or ("h" in flags and "g" in flags))
+
+
+class KeyspaceWatcher:
+    """KeyspaceWatcher waits for redis keyspace notifications on a set of keys.
+
+    The subscription is confirmed by redis when the watcher is created, so any change made
+    after that point wakes up `wait`.
+    """
+
+    def __init__(self, client: redis.Redis, db_id: int, pattern: str):
+        """Subscribe to keyspace notifications for the keys matching `pattern`.
+
+        Args:
+            client: The redis client used to open the subscription.
+            db_id: The integer ID of the database that contains the keys.
+            pattern: A redis glob-style pattern that matches the watched keys.
+        """
+        self.pubsub = client.pubsub()
+        self.pubsub.psubscribe(f"__keyspace@{db_id}__:{pattern}")
+
+        # Wait for the subscription to be confirmed so that no change can be missed
+        self.pubsub.get_message(timeout=1)
+
+    def wait(self, timeout: float) -> None:
+        """Wait until one of the watched keys changes or until `timeout` expires.
+
+        Args:
+            timeout: The maximum amount of time to wait, in seconds.
+        """
+        message = self.pubsub.get_message(timeout=timeout)
+
+        # Consume any pending notifications, the caller will read the latest state anyway
+        while message:
+            message = self.pubsub.get_message()
+
+    def close(self) -> None:
+        """Remove the subscription."""
+        self.pubsub.close()
+
+    @staticmethod
+    def escape(key: str) -> str:
+        """Escape the glob-style special characters in `key`.
+
+        Args:
+            key: The key to escape.
+
+        Returns:
+            A pattern that only matches `key`.
+        """
+        return re.sub(r"([*?\[\]\\])", r"\\\1", key)
+
+
+class KeyspaceEventCollector:
+    """KeyspaceEventCollector collects the keyspace notifications received on a subscription.
+
+    Collection blocks on the subscription socket and stops once no event has arrived for
+    `quiet_period` seconds, as soon as `expected` events have been received, or after `max_time`
+    seconds, whichever comes first. Only the quiet period applies by default.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, pubsub: redis.client.PubSub, quiet_period: float = 10,
+                 max_time: Optional[float] = None, expected: Optional[int] = None):
+        """Initialize a KeyspaceEventCollector instance.
+
+        Args:
+            pubsub: The subscription to read the notifications from.
+            quiet_period: How long to wait for the next event before deciding the stream is quiet,
+                in seconds.
+            max_time: The maximum amount of time to spend collecting events, in seconds, if any.
+            expected: The number of events to stop at, if known.
+        """
+        self.pubsub = pubsub
+        self.quiet_period = quiet_period
+        self.max_time = max_time
+        self.expected = expected
+        self.messages = []
+        self.values = []
+        self.stats = {}
+        self.elapsed = 0
+
+    def collect(self, client: Optional[redis.Redis] = None) -> List[Dict[str, str]]:
+        """Collect the keyspace events.
+
+        Args:
+            client: The redis client for the database that contains the keys. If given, the value
+                of the key of each "hset" event is read as soon as the event has been received and
+                kept in `values`, at the same index as the event.
+
+        Returns:
+            The notifications received, in order. Subscription confirmations are left out of the
+            result but kept in `messages`.
+        """
+        events = []
+        start = time.time()
+        deadline = start + self.max_time if self.max_time is not None else None
+        last_event = start
+
+        while self.expected is None or len(events) < self.expected:
+            now = time.time()
+            wait = last_event + self.quiet_period - now
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            if wait <= 0:
+                break
+
+            message = self.pubsub.get_message(timeout=wait)
+
+            # Take whatever else is already pending, so that its values are read together
+            received = len(events)
+            while message:
+                self.messages.append(message)
+                if message["type"] == "pmessage":
+                    events.append(message)
+                    last_event = time.time()
+
+                    key = message["channel"].split(":", 1)[1]
+                    counts = self.stats.setdefault(self.object_type(key), {})
+                    counts[message["data"]] = counts.get(message["data"], 0) + 1
+
+                if self.expected is not None and len(events) >= self.expected:
+                    break
+                if len(events) - received >= self.BATCH_SIZE:
+                    break
+                message = self.pubsub.get_message()
+
+            if client is not None:
+                self.values.extend(self._fetch(client, events[received:]))
+
+        self.elapsed = time.time() - start
+        return events
+
+    @staticmethod
+    def _fetch(client: redis.Redis, events: List[Dict[str, str]]) -> List[Optional[Dict[str, str]]]:
+        """Read the current value of the keys of the "hset" events with pipelined HGETALLs.
+
+        Args:
+            client: The redis client for the database that contains the keys.
+            events: The events to read the keys of.
+
+        Returns:
+            The values of the keys, or None for the other events, in the same order as `events`.
+        """
+        pipe = client.pipeline(transaction=False)
+        for message in events:
+            if message["data"] == "hset":
+                pipe.hgetall(message["channel"].split(":", 1)[1])
+
+        if not len(pipe):
+            return [None] * len(events)
+
+        values = iter(pipe.execute())
+        return [next(values) if message["data"] == "hset" else None for message in events]
+
+    def print_stats(self) -> None:
+        """Print the number of events received and the event rate for each object type."""
+        elapsed = max(self.elapsed, 1e-6)
+        for object_type, counts in sorted(self.stats.items()):
+            total = sum(counts.values())
+            ops = " ".join("%s=%d" % (op, n) for op, n in sorted(counts.items()))
+            print("keyspace events: %s %s (%.1f/s over %.2fs)" % (object_type, ops,
+                                                                  total / elapsed, self.elapsed))
+
+    @staticmethod
+    def object_type(key: str) -> str:
+        """Get the object type of `key`, e.g. the SAI object type of ASIC_STATE keys or the table
+        name of other keys.
+
+        Args:
+            key: The redis key.
+
+        Returns:
+            The object type of the key.
+        """
+        fields = key.split(":", 2)
+        if fields[0] == "ASIC_STATE" and len(fields) > 1:
+            return fields[1]
+
+        return fields[0]
+
+
 class DVSDatabase:
     """DVSDatabase provides access to redis databases on the virtual switch.
 
     By default, database operations are configured to use `DEFAULT_POLLING_CONFIG`. Users can
     specify their own PollingConfig, but this shouldn't typically be necessary.
+
+    If keyspace notifications are enabled in redis, the wait methods are woken up by changes to
+    the table or key they are waiting on instead of polling the database every
+    `polling_interval`. Otherwise, they fall back to polling.
     """
 
     DEFAULT_POLLING_CONFIG = PollingConfig(polling_interval=0.01, timeout=5, strict=True)
 
-    def __init__(self, db_id: int, connector: str):
+    def __init__(self, db_id: int, connector: str, use_keyspace_events: bool = True):
         """Initialize a DVSDatabase instance.
 
         Args:
             db_id: The integer ID used to identify the given database instance in redis.
             connector: The I/O connection used to communicate with
                 redis (e.g. UNIX socket, TCP socket, etc.).
+            use_keyspace_events: Whether to wait on keyspace notifications instead of polling,
+                if they are enabled in redis.
         """
+        self.db_id = db_id
         self.db_connection = swsscommon.DBConnector(db_id, connector, 0)
+        self.redis_client = redis.Redis(unix_socket_path=connector, db=db_id,
+                                        encoding="utf-8", decode_responses=True)
+        self.use_keyspace_events = use_keyspace_events and keyspace_events_enabled(self.redis_client)
 
     def create_entry(self, table_name: str, key: str, entry: Dict[str, str]) -> None:
         """Add the mapping {`key` -> `entry`} to the specified table.
@@ -109,9 +321,8 @@ class DVSDatabase:
             fv_pairs = self.get_entry(table_name, key)
             return (bool(fv_pairs), fv_pairs)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name, key)
 
         if not status:
             assert not polling_config.strict, \
@@ -144,9 +355,8 @@ class DVSDatabase:
             fv_pairs = self.get_entry(table_name, key)
             return (all(fv_pairs.get(k) == v for k, v in expected_fields.items()), fv_pairs)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name, key)
 
         if not status:
             assert not polling_config.strict, \
@@ -180,9 +390,8 @@ class DVSDatabase:
             fv_pairs = self.get_entry(table_name, key)
             return (fv_pairs == expected_entry, fv_pairs)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name, key)
 
         if not status:
             assert not polling_config.strict, \
@@ -211,9 +420,8 @@ class DVSDatabase:
             fv_pairs = self.get_entry(table_name, key)
             return (not bool(fv_pairs), fv_pairs)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name, key)
 
         if not status:
             assert not polling_config.strict, \
@@ -241,9 +449,8 @@ class DVSDatabase:
             keys = self.get_keys(table_name)
             return (len(keys) == num_keys, keys)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name)
 
         if not status:
             assert not polling_config.strict, \
@@ -272,9 +479,8 @@ class DVSDatabase:
             keys = self.get_keys(table_name)
             return (all(key in keys for key in expected_keys), keys)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name)
 
         if not status:
             assert not polling_config.strict, \
@@ -303,9 +509,8 @@ class DVSDatabase:
             keys = self.get_keys(table_name)
             return (all(key not in keys for key in deleted_keys), keys)
 
-        status, result = wait_for_result(
-            __access_function,
-            self._disable_strict_polling(polling_config))
+        status, result = self._wait_for_result(
+            __access_function, polling_config, table_name)
 
         if not status:
             expected = [key for key in result if key not in deleted_keys]
@@ -315,6 +520,31 @@ class DVSDatabase:
 
         return result
 
+    def _wait_for_result(
+        self,
+        polling_function: Callable,
+        polling_config: PollingConfig,
+        table_name: str,
+        key: Optional[str] = None
+    ):
+        if not self.use_keyspace_events:
+            return wait_for_result(polling_function, self._disable_strict_polling(polling_config))
+
+        # The separator between table name and key depends on the database, so match any
+        # single character.
+        if key is None:
+            pattern = f"{KeyspaceWatcher.escape(table_name)}?*"
+        else:
+            pattern = f"{KeyspaceWatcher.escape(table_name)}?{KeyspaceWatcher.escape(key)}"
+
+        watcher = KeyspaceWatcher(self.redis_client, self.db_id, pattern)
+        try:
+            return wait_for_result(polling_function,
+                                   self._disable_strict_polling(polling_config),
+                                   watcher.wait)
+        finally:
+            watcher.close()
+
     @staticmethod
     def _disable_strict_polling(polling_config: PollingConfig) -> PollingConfig:
         disabled_config = PollingConfig(polling_interval=polling_config.polling_interval,
@@ -0,0 +1,190 @@
+"""In-memory snapshots of redis tables for verifying large tables in VS tests."""
+import json
+import uuid
+
+from typing import Dict, Iterable, List, Set
+import redis
+from dvslib.dvs_database import KeyspaceWatcher, keyspace_events_enabled
+
+
+class TableSnapshot:
+    """TableSnapshot holds all the entries of a table in memory and answers queries on them.
+
+    The entries are read in one pass with SCAN and pipelined HGETALL. Queries by attribute value
+    and by the fields of JSON keys (e.g. ASIC_DB route, neighbor and FDB entries) are answered
+    from indexes that are built on first use.
+
+    If keyspace notifications are enabled in redis, the snapshot subscribes to the notifications
+    of the table and `refresh` only reads the entries that changed since the last refresh.
+    Otherwise, `refresh` reads the whole table again.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, client: redis.Redis, db_id: int, table_name: str, separator: str = ":"):
+        """Read all the entries of the specified table.
+
+        Args:
+            client: The redis client for the database that contains the table.
+            db_id: The integer ID of the database that contains the table.
+            table_name: The name of the table.
+            separator: The separator between the table name and the keys.
+        """
+        self.client = client
+        self.db_id = db_id
+        self.prefix = f"{table_name}{separator}"
+        self.pubsub = None
+        self._load()
+
+    def refresh(self) -> None:
+        """Bring the snapshot up to date with the database."""
+        if not self.pubsub:
+            self._load()
+            return
+
+        try:
+            changed_keys = self._get_changed_keys()
+        except redis.ConnectionError:
+            # The database was restarted, start over
+            self._load()
+            return
+
+        self._read_entries(changed_keys)
+
+    def close(self) -> None:
+        """Remove the keyspace subscription, if any."""
+        if self.pubsub:
+            self.pubsub.close()
+            self.pubsub = None
+
+    def keys(self) -> List[str]:
+        """Get all of the keys in the table."""
+        return list(self.entries.keys())
+
+    def get(self, key: str) -> Dict[str, str]:
+        """Get the entry stored at `key`, or an empty Dict if there is none."""
+        return self.entries.get(key, {})
+
+    def find_by_attributes(self, attributes: Dict[str, str]) -> List[str]:
+        """Get the keys of the entries that have all the specified attribute values.
+
+        Args:
+            attributes: The attributes and their values we expect to see in the entries.
+
+        Returns:
+            The keys of the matching entries.
+        """
+        if not attributes:
+            return self.keys()
+
+        keys = None
+        for attr, value in attributes.items():
+            matches = self._get_attr_index(attr).get(value, set())
+            keys = set(matches) if keys is None else keys & matches
+            if not keys:
+                return []
+
+        return list(keys)
+
+    def find_by_key_fields(self, key_fields: Dict[str, str]) -> List[str]:
+        """Get the keys of the entries whose JSON key has all the specified fields.
+
+        Args:
+            key_fields: The key fields and their values, e.g. {"mac": "52:54:00:25:06:E9"}.
+
+        Returns:
+            The keys of the matching entries.
+        """
+        if self._key_fields is None:
+            self._key_fields = {key: self._parse_key(key) for key in self.entries}
+
+        return [key for key, fields in self._key_fields.items()
+                if all(k in fields and fields[k] == v for k, v in key_fields.items())]
+
+    def _load(self) -> None:
+        self.close()
+        self.entries = {}
+        self._attr_index = {}
+        self._key_fields = None
+
+        if keyspace_events_enabled(self.client):
+            pattern = f"{KeyspaceWatcher.escape(self.prefix)}*"
+            self.pubsub = self.client.pubsub()
+            self.pubsub.psubscribe(f"__keyspace@{self.db_id}__:{pattern}")
+
+            # Wait for the subscription to be confirmed so that no change can be missed
+            self.pubsub.get_message(timeout=1)
+
+        pattern = f"{KeyspaceWatcher.escape(self.prefix)}*"
+        self._read_entries(self.client.scan_iter(match=pattern, count=self.BATCH_SIZE))
+
+    def _get_changed_keys(self) -> Set[str]:
+        # Redis replies to PING after delivering every notification that was published before,
+        # so all the changes made before the refresh are received once the token comes back.
+        token = uuid.uuid4().hex
+        self.pubsub.ping(token)
+
+        changed_keys = set()
+        while True:
+            message = self.pubsub.get_message(timeout=1)
+            if message is None:
+                break
+            if message["type"] == "pong" and message["data"] == token:
+                break
+            if message["type"] == "pmessage":
+                changed_keys.add(message["channel"].split(":", 1)[1])
+
+        return changed_keys
+
+    def _read_entries(self, redis_keys: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        batch = []
+        for redis_key in redis_keys:
+            batch.append(redis_key)
+            pipe.hgetall(redis_key)
+            if len(batch) >= self.BATCH_SIZE:
+                self._update_entries(batch, pipe.execute())
+                batch = []
+
+        if batch:
+            self._update_entries(batch, pipe.execute())
+
+    def _update_entries(self, redis_keys: List[str], values: List[Dict[str, str]]) -> None:
+        for redis_key, entry in zip(redis_keys, values):
+            key = redis_key[len(self.prefix):]
+            old_entry = self.entries.pop(key, None)
+
+            for attr, index in self._attr_index.items():
+                if old_entry and attr in old_entry:
+                    index[old_entry[attr]].discard(key)
+                if entry and attr in entry:
+                    index.setdefault(entry[attr], set()).add(key)
+
+            if entry:
+                self.entries[key] = entry
+                if self._key_fields is not None:
+                    self._key_fields[key] = self._parse_key(key)
+            elif self._key_fields is not None:
+                self._key_fields.pop(key, None)
+
+    def _get_attr_index(self, attr: str) -> Dict[str, Set[str]]:
+        if attr not in self._attr_index:
+            index = {}
+            for key, entry in self.entries.items():
+                if attr in entry:
+                    index.setdefault(entry[attr], set()).add(key)
+            self._attr_index[attr] = index
+
+        return self._attr_index[attr]
+
+    @staticmethod
+    def _parse_key(key: str) -> Dict[str, str]:
+        try:
+            fields = json.loads(key)
+        except ValueError:
+            try:
+                fields = json.loads("{" + key + "}")
+            except ValueError:
+                return {}
+
+        return fields if isinstance(fields, dict) else {}
@@ -322,4 +322,81 @@ namespace consumer_test
         validate_syncmap(consumer->m_toSync, 1, key, exp_kofv);
 
     }
+
+    TEST_F(ConsumerTest, ConsumerPark_Resolve)
+    {
+        // Test case, park a SET until its dependency is resolved
+        auto entry = KeyOpFieldsValuesTuple(
+            { key,
+                SET_COMMAND,
+                { { f1, v1a } } });
+
+        consumer->addToSync(entry);
+        auto it = consumer->park(consumer->m_toSync.begin(), "DEP:1");
+
+        ASSERT_EQ(it, consumer->m_toSync.end());
+        ASSERT_TRUE(consumer->m_toSync.empty());
+        ASSERT_EQ(consumer->getParkedCount(), 1);
+
+        // parked tasks are still pending
+        vector<string> ts;
+        consumer->dumpPendingTasks(ts);
+        ASSERT_EQ(ts.size(), 1);
+
+        // another dependency doesn't move the task back
+        Orch::resolveDependency("DEP:2");
+        ASSERT_EQ(consumer->getParkedCount(), 1);
+
+        Orch::resolveDependency("DEP:1");
+        ASSERT_EQ(consumer->getParkedCount(), 0);
+        ASSERT_EQ(consumer->getStats().getParked(), 1);
+        ASSERT_EQ(consumer->getStats().getUnparked(), 1);
+        exp_kofv = entry;
+        validate_syncmap(consumer->m_toSync, 1, key, exp_kofv);
+    }
+
+    TEST_F(ConsumerTest, ConsumerPark_AddToSync)
+    {
+        // Test case, a new SET for a parked key is merged with the parked SET
+        auto entrya = KeyOpFieldsValuesTuple(
+            { key,
+                SET_COMMAND,
+                { { f1, v1a },
+                    { f2, v2a } } });
+
+        auto entryb = KeyOpFieldsValuesTuple(
+            { key,
+                SET_COMMAND,
+                { { f1, v1b } } });
+
+        consumer->addToSync(entrya);
+        consumer->park(consumer->m_toSync.begin(), "DEP:1");
+        consumer->addToSync(entryb);
+
+        ASSERT_EQ(consumer->getParkedCount(), 0);
+        ASSERT_EQ(consumer->getStats().getParkedDepth(), 0);
+        ASSERT_EQ(consumer->unpark("DEP:1"), 0);
+
+        exp_kofv = KeyOpFieldsValuesTuple(
+            { key,
+                SET_COMMAND,
+                { { f2, v2a },
+                    { f1, v1b } } });
+        validate_syncmap(consumer->m_toSync, 1, key, exp_kofv);
+    }
+
+    TEST_F(ConsumerTest, ConsumerPark_RetryAll)
+    {
+        // Test case, the periodic retry moves every parked task back
+        consumer->addToSync(KeyOpFieldsValuesTuple({ "key1", SET_COMMAND, { { f1, v1a } } }));
+        consumer->addToSync(KeyOpFieldsValuesTuple({ "key2", SET_COMMAND, { { f1, v1a } } }));
+        consumer->park(consumer->m_toSync.find("key1"), "DEP:1");
+        consumer->park(consumer->m_toSync.find("key2"), "DEP:2");
+        ASSERT_EQ(consumer->getParkedCount(), 2);
+
+        Orch::retryParkedTasks();
+
+        ASSERT_EQ(consumer->getParkedCount(), 0);
+        ASSERT_EQ(consumer->m_toSync.size(), 2);
+    }
 }
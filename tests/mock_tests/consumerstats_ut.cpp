@@ -0,0 +1,140 @@
+#include "ut_helper.h"
+#include "mock_orchagent_main.h"
+#include "mock_table.h"
+
+extern PortsOrch *gPortsOrch;
+
+namespace consumerstats_test
+{
+    using namespace std;
+
+    struct ConsumerStatsTest : public ::testing::Test
+    {
+        virtual void SetUp() override
+        {
+            ::testing_db::reset();
+        }
+
+        virtual void TearDown() override
+        {
+            ::testing_db::reset();
+        }
+
+        map<string, string> dump(const ConsumerStats &stats)
+        {
+            vector<FieldValueTuple> fvs;
+            stats.dump(fvs);
+
+            map<string, string> fields;
+            for (auto &fv : fvs)
+            {
+                fields[fvField(fv)] = fvValue(fv);
+            }
+            return fields;
+        }
+    };
+
+    TEST_F(ConsumerStatsTest, HistogramBuckets)
+    {
+        ASSERT_EQ(LatencyHistogram::getBucket(0), 0);
+        ASSERT_EQ(LatencyHistogram::getBucket(1), 1);
+        ASSERT_EQ(LatencyHistogram::getBucket(3), 2);
+        ASSERT_EQ(LatencyHistogram::getBucket(4), 3);
+        ASSERT_EQ(LatencyHistogram::getBucket(UINT64_MAX), LatencyHistogram::BUCKETS - 1);
+
+        LatencyHistogram histogram;
+        ASSERT_EQ(histogram.getPercentile(50), 0);
+        ASSERT_EQ(histogram.dumpBuckets(), "0");
+
+        for (int i = 0; i < 99; i++)
+        {
+            histogram.add(3);
+        }
+        histogram.add(1000);
+
+        ASSERT_EQ(histogram.getCount(), 100);
+        ASSERT_EQ(histogram.getTotal(), 1297);
+        ASSERT_EQ(histogram.getMax(), 1000);
+        ASSERT_EQ(histogram.getPercentile(50), 4);
+        ASSERT_EQ(histogram.getPercentile(99), 4);
+        ASSERT_EQ(histogram.getPercentile(100), 1000);
+        ASSERT_EQ(histogram.dumpBuckets(), "0,0,99,0,0,0,0,0,0,0,1");
+    }
+
+    TEST_F(ConsumerStatsTest, DoTask)
+    {
+        ConsumerStats stats;
+        auto start = ConsumerStats::clock::now();
+
+        stats.addToSync(start, 10, 10);
+        stats.addDoTask(start, 10, 4, 0);
+        stats.addDoTask(start, 4, 4, 0);
+        stats.addDoTask(start, 4, 0, 0);
+
+        ASSERT_EQ(stats.getAdded(), 10);
+        ASSERT_EQ(stats.getDone(), 10);
+        ASSERT_EQ(stats.getRetries(), 8);
+        ASSERT_EQ(stats.getDepth(), 0);
+        ASSERT_EQ(stats.getMaxDepth(), 10);
+        ASSERT_EQ(stats.getDoTaskLatency().getCount(), 3);
+
+        auto fields = dump(stats);
+        ASSERT_EQ(fields["retries"], "8");
+        ASSERT_EQ(fields["max_depth"], "10");
+        ASSERT_EQ(fields["do_task_count"], "3");
+        ASSERT_EQ(fields.count("pops_p99_us"), 1);
+    }
+
+    TEST_F(ConsumerStatsTest, DoTaskParked)
+    {
+        ConsumerStats stats;
+        auto start = ConsumerStats::clock::now();
+
+        // doTask() does one task and parks two
+        stats.addToSync(start, 3, 3);
+        stats.addParked();
+        stats.addParked();
+        stats.addDoTask(start, 3, 0, 0);
+
+        ASSERT_EQ(stats.getDone(), 1);
+        ASSERT_EQ(stats.getParkedDepth(), 2);
+
+        // One is unparked and left for a retry
+        stats.addUnparked(1);
+        stats.addDoTask(start, 1, 1, 1);
+
+        ASSERT_EQ(stats.getDone(), 1);
+
+        // The other one is unparked by doTask() itself, and both are done
+        stats.addUnparked(1);
+        stats.addDoTask(start, 1, 0, 1);
+
+        ASSERT_EQ(stats.getAdded(), 5);
+        ASSERT_EQ(stats.getDone(), 3);
+        ASSERT_EQ(stats.getRetries(), 1);
+        ASSERT_EQ(stats.getParkedDepth(), 0);
+        ASSERT_EQ(stats.getAdded(), stats.getDone() + stats.getParked() + stats.getDepth());
+
+        auto fields = dump(stats);
+        ASSERT_EQ(fields["parked_total"], "2");
+        ASSERT_EQ(fields["unparked_total"], "2");
+    }
+
+    TEST_F(ConsumerStatsTest, ConsumerAddToSync)
+    {
+        swss::DBConnector config_db("CONFIG_DB", 0);
+        Consumer consumer(new swss::ConsumerStateTable(&config_db, "CFG_TEST_TABLE", 1, 1), gPortsOrch, "CFG_TEST_TABLE");
+
+        deque<KeyOpFieldsValuesTuple> entries;
+        entries.push_back(KeyOpFieldsValuesTuple("key1", SET_COMMAND, { { "field", "value" } }));
+        entries.push_back(KeyOpFieldsValuesTuple("key1", DEL_COMMAND, { }));
+        entries.push_back(KeyOpFieldsValuesTuple("key2", SET_COMMAND, { { "field", "value" } }));
+        consumer.addToSync(entries);
+
+        auto &stats = consumer.getStats();
+        ASSERT_EQ(stats.getAdded(), 3);
+        ASSERT_EQ(stats.getDepth(), 2);
+        ASSERT_EQ(stats.getMaxDepth(), 2);
+        ASSERT_EQ(stats.getAddToSyncLatency().getCount(), 1);
+    }
+}
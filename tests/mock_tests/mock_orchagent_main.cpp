@@ -4,6 +4,7 @@ extern "C" {
 }
 
 #include "orchdaemon.h"
+#include "swssrecorder.h"
 
 /* Global variables */
 sai_object_id_t gVirtualRouterId;
@@ -19,8 +20,7 @@ bool gSairedisRecord = true;
 bool gSwssRecord = true;
 bool gLogRotate = false;
 bool gSaiRedisLogRotate = false;
-ofstream gRecordOfs;
-string gRecordFile;
+SwssRecorder gSwssRecorder;
 
 MirrorOrch *gMirrorOrch;
 VRFOrch *gVrfOrch;
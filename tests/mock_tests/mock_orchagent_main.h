@@ -20,8 +20,6 @@ extern bool gSwssRecord;
 extern bool gSairedisRecord;
 extern bool gLogRotate;
 extern bool gSaiRedisLogRotate;
-extern ofstream gRecordOfs;
-extern string gRecordFile;
 
 extern MacAddress gMacAddress;
 extern MacAddress gVxlanMacAddress;
@@ -0,0 +1,54 @@
+#include <algorithm>
+
+#include "producerstatetable.h"
+
+using TableDataT = std::map<std::string, std::vector<swss::FieldValueTuple>>;
+using TablesT = std::map<std::string, TableDataT>;
+
+namespace testing_db
+{
+    extern std::map<int, TablesT> gDB;
+}
+
+namespace swss
+{
+    using namespace testing_db;
+
+    ProducerStateTable::ProducerStateTable(RedisPipeline *pipeline, const std::string &tableName, bool buffered) :
+        TableBase(pipeline->getDbId(), tableName),
+        TableName_KeySet(tableName),
+        m_buffered(buffered),
+        m_pipeowned(false),
+        m_pipe(pipeline)
+    {
+    }
+
+    /* Apply the updates the way orchagent leaves them in the table: the fields of a set are merged */
+    void ProducerStateTable::set(const std::string &key,
+                                 const std::vector<FieldValueTuple> &values,
+                                 const std::string &op,
+                                 const std::string &prefix)
+    {
+        auto &entry = gDB[m_pipe->getDbId()][getTableName()][key];
+        for (const auto &fv : values)
+        {
+            auto it = std::find_if(entry.begin(), entry.end(),
+                                   [&](const FieldValueTuple &v) { return fvField(v) == fvField(fv); });
+            if (it != entry.end())
+            {
+                fvValue(*it) = fvValue(fv);
+            }
+            else
+            {
+                entry.push_back(fv);
+            }
+        }
+    }
+
+    void ProducerStateTable::del(const std::string &key,
+                                 const std::string &op,
+                                 const std::string &prefix)
+    {
+        gDB[m_pipe->getDbId()][getTableName()].erase(key);
+    }
+}
@@ -5,6 +5,7 @@
 
 #include "aclorch.h"
 #include "crmorch.h"
+#include "warmRestartAssist.h"
 
 #undef protected
 #undef private
@@ -59,4 +60,35 @@ struct Portal
             crmOrch->getResAvailableCounters();
         }
     };
+
+    struct AppRestartAssistInternal
+    {
+        /* Cache an entry as if it was read from appDB */
+        static void setDbEntry(AppRestartAssist *assist, const string &tableName, const string &key,
+                               const vector<FieldValueTuple> &fv)
+        {
+            auto &entry = assist->appTableCacheMap[tableName][key];
+            entry.state = AppRestartAssist::STALE;
+            entry.inDb = true;
+            entry.dbHash = AppRestartAssist::hashFieldValues(fv);
+            entry.fv.clear();
+        }
+
+        static bool isCached(AppRestartAssist *assist, const string &tableName, const string &key)
+        {
+            return assist->appTableCacheMap[tableName].count(key) != 0;
+        }
+
+        static AppRestartAssist::cache_state_t getState(AppRestartAssist *assist, const string &tableName,
+                                                        const string &key)
+        {
+            return assist->appTableCacheMap[tableName].at(key).state;
+        }
+
+        static const vector<FieldValueTuple> &getFieldValues(AppRestartAssist *assist, const string &tableName,
+                                                             const string &key)
+        {
+            return assist->appTableCacheMap[tableName].at(key).fv;
+        }
+    };
 };
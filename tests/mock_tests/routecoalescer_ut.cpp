@@ -0,0 +1,173 @@
+#include "ut_helper.h"
+#include "mock_table.h"
+#include "fpmsyncd/routecoalescer.h"
+
+namespace routecoalescer_test
+{
+    using namespace std;
+
+    struct RouteCoalescerTest : public ::testing::Test
+    {
+        const string prefix = "10.1.0.0/24";
+
+        vector<FieldValueTuple> route = { { "nexthop", "10.0.0.2" }, { "ifname", "Ethernet4" } };
+        vector<FieldValueTuple> blackhole = { { "blackhole", "true" } };
+
+        shared_ptr<swss::DBConnector> m_app_db;
+        shared_ptr<swss::RedisPipeline> m_pipeline;
+        shared_ptr<swss::ProducerStateTable> m_producer;
+        shared_ptr<swss::Table> m_table;
+        shared_ptr<RouteCoalescer> m_coalescer;
+
+        virtual void SetUp() override
+        {
+            ::testing_db::reset();
+
+            m_app_db = make_shared<swss::DBConnector>("APPL_DB", 0);
+            m_pipeline = make_shared<swss::RedisPipeline>(m_app_db.get());
+            m_producer = make_shared<swss::ProducerStateTable>(m_pipeline.get(), APP_ROUTE_TABLE_NAME, true);
+            m_table = make_shared<swss::Table>(m_app_db.get(), APP_ROUTE_TABLE_NAME);
+            m_coalescer = make_shared<RouteCoalescer>(m_producer.get(), 10);
+        }
+
+        virtual void TearDown() override
+        {
+            m_coalescer.reset();
+            m_table.reset();
+            m_producer.reset();
+            m_pipeline.reset();
+            m_app_db.reset();
+
+            ::testing_db::reset();
+        }
+
+        bool getRoute(const string &key, vector<FieldValueTuple> &values)
+        {
+            return m_table->get(key, values);
+        }
+    };
+
+    TEST_F(RouteCoalescerTest, SetThenDel)
+    {
+        m_coalescer->set(prefix, route);
+        m_coalescer->del(prefix);
+        ASSERT_EQ(m_coalescer->getPendingCount(), 1);
+
+        m_coalescer->flush();
+
+        vector<FieldValueTuple> values;
+        ASSERT_FALSE(getRoute(prefix, values));
+        ASSERT_EQ(m_coalescer->getWritten(), 1);
+        ASSERT_EQ(m_coalescer->getSuppressed(), 1);
+    }
+
+    TEST_F(RouteCoalescerTest, DelThenSet)
+    {
+        m_producer->set(prefix, blackhole);
+
+        m_coalescer->del(prefix);
+        m_coalescer->set(prefix, route);
+        m_coalescer->flush();
+
+        // The blackhole field of the deleted route is gone
+        vector<FieldValueTuple> values;
+        ASSERT_TRUE(getRoute(prefix, values));
+        ASSERT_EQ(values, route);
+        ASSERT_EQ(m_coalescer->getWritten(), 2);
+        ASSERT_EQ(m_coalescer->getSuppressed(), 0);
+
+        // A delete coalesced with the set is not written again in the next window
+        m_coalescer->set(prefix, blackhole);
+        m_coalescer->flush();
+        ASSERT_TRUE(getRoute(prefix, values));
+        ASSERT_EQ(values.size(), 3);
+    }
+
+    TEST_F(RouteCoalescerTest, SetDelSetThenDel)
+    {
+        m_producer->set(prefix, blackhole);
+
+        m_coalescer->set(prefix, blackhole);
+        m_coalescer->del(prefix);
+        m_coalescer->set(prefix, route);
+        m_coalescer->del(prefix);
+        m_coalescer->flush();
+
+        vector<FieldValueTuple> values;
+        ASSERT_FALSE(getRoute(prefix, values));
+        ASSERT_EQ(m_coalescer->getUpdates(), 4);
+        ASSERT_EQ(m_coalescer->getWritten(), 1);
+        ASSERT_EQ(m_coalescer->getSuppressed(), 3);
+    }
+
+    TEST_F(RouteCoalescerTest, SetThenSet)
+    {
+        m_coalescer->set(prefix, route);
+        m_coalescer->set(prefix, { { "nexthop", "10.0.0.3" } });
+        m_coalescer->flush();
+
+        // The fields are merged as if both sets were written
+        vector<FieldValueTuple> values;
+        ASSERT_TRUE(getRoute(prefix, values));
+        ASSERT_EQ(values, vector<FieldValueTuple>({ { "nexthop", "10.0.0.3" }, { "ifname", "Ethernet4" } }));
+        ASSERT_EQ(m_coalescer->getWritten(), 1);
+        ASSERT_EQ(m_coalescer->getSuppressed(), 1);
+    }
+
+    TEST_F(RouteCoalescerTest, TimerFlush)
+    {
+        for (int i = 0; i < 5; i++)
+        {
+            m_coalescer->set("10.1." + to_string(i) + ".0/24", route);
+        }
+
+        vector<FieldValueTuple> values;
+        ASSERT_FALSE(getRoute("10.1.0.0/24", values));
+        ASSERT_EQ(m_coalescer->getPendingCount(), 5);
+
+        // Flushed by fpmsyncd at the end of the window
+        m_coalescer->flush();
+
+        ASSERT_EQ(m_coalescer->getPendingCount(), 0);
+        ASSERT_TRUE(getRoute("10.1.4.0/24", values));
+        ASSERT_EQ(m_coalescer->getFlushes(), 1);
+        ASSERT_EQ(m_coalescer->getSizeFlushes(), 0);
+
+        // Nothing pending, nothing to flush
+        m_coalescer->flush();
+        ASSERT_EQ(m_coalescer->getFlushes(), 1);
+    }
+
+    TEST_F(RouteCoalescerTest, SizeFlush)
+    {
+        for (int i = 0; i < 9; i++)
+        {
+            m_coalescer->set("10.1." + to_string(i) + ".0/24", route);
+        }
+
+        // Updates of a pending prefix don't count towards the limit
+        m_coalescer->del("10.1.0.0/24");
+        ASSERT_EQ(m_coalescer->getFlushes(), 0);
+
+        m_coalescer->set("10.1.9.0/24", route);
+
+        vector<FieldValueTuple> values;
+        ASSERT_EQ(m_coalescer->getPendingCount(), 0);
+        ASSERT_EQ(m_coalescer->getSizeFlushes(), 1);
+        ASSERT_FALSE(getRoute("10.1.0.0/24", values));
+        ASSERT_TRUE(getRoute("10.1.9.0/24", values));
+        ASSERT_EQ(m_coalescer->getWritten(), 10);
+    }
+
+    TEST_F(RouteCoalescerTest, Disabled)
+    {
+        m_coalescer->setMaxPending(0);
+
+        m_coalescer->set(prefix, route);
+
+        vector<FieldValueTuple> values;
+        ASSERT_TRUE(getRoute(prefix, values));
+        ASSERT_EQ(m_coalescer->getPendingCount(), 0);
+        ASSERT_EQ(m_coalescer->getWritten(), 1);
+    }
+}
@@ -0,0 +1,143 @@
+#include "ut_helper.h"
+#include "swssrecorder.h"
+
+#include <stdio.h>
+
+#include <fstream>
+#include <sstream>
+
+namespace swssrecorder_test
+{
+    using namespace std;
+
+    struct SwssRecorderTest : public ::testing::Test
+    {
+        string file = "swssrecorder_ut.rec";
+
+        KeyOpFieldsValuesTuple route = KeyOpFieldsValuesTuple(
+            "1.1.1.0/24", SET_COMMAND,
+            { { "nexthop", "10.0.0.1" }, { "ifname", "Ethernet0" } });
+        KeyOpFieldsValuesTuple neigh = KeyOpFieldsValuesTuple("Ethernet0:10.0.0.1", DEL_COMMAND, {});
+
+        virtual void SetUp() override
+        {
+            remove(file.c_str());
+        }
+
+        virtual void TearDown() override
+        {
+            remove(file.c_str());
+        }
+
+        void recordAll(SwssRecorder &recorder)
+        {
+            recorder.recordLine("recording started");
+            recorder.record("ROUTE_TABLE:", route);
+            recorder.record("NEIGH_TABLE:", neigh);
+        }
+
+        /* Get the lines of a text recording without their timestamps */
+        vector<string> readLines(istream &in)
+        {
+            vector<string> lines;
+            string line;
+            while (getline(in, line))
+            {
+                auto pos = line.find('|');
+                lines.push_back(pos == string::npos ? line : line.substr(pos + 1));
+            }
+            return lines;
+        }
+
+        vector<string> expectedLines()
+        {
+            return {
+                "recording started",
+                "ROUTE_TABLE:1.1.1.0/24|SET|nexthop:10.0.0.1|ifname:Ethernet0",
+                "NEIGH_TABLE:Ethernet0:10.0.0.1|DEL",
+            };
+        }
+    };
+
+    TEST_F(SwssRecorderTest, RecordText)
+    {
+        SwssRecorder recorder;
+        ASSERT_TRUE(recorder.start(file, SwssRecorder::Format::TEXT));
+        recordAll(recorder);
+        recorder.stop();
+
+        ifstream in(file);
+        ASSERT_EQ(readLines(in), expectedLines());
+        ASSERT_EQ(recorder.getRecorded(), 3);
+        ASSERT_EQ(recorder.getDropped(), 0);
+    }
+
+    TEST_F(SwssRecorderTest, RecordBinary)
+    {
+        SwssRecorder recorder;
+        ASSERT_TRUE(recorder.start(file, SwssRecorder::Format::BINARY));
+        recordAll(recorder);
+        recorder.stop();
+
+        /* Appending to the recording must keep it readable */
+        ASSERT_TRUE(recorder.start(file, SwssRecorder::Format::BINARY));
+        recorder.record("ROUTE_TABLE:", route);
+        recorder.stop();
+
+        ifstream in(file, ifstream::binary);
+        stringstream text;
+        ASSERT_TRUE(SwssRecorder::convertToText(in, text));
+
+        auto expected = expectedLines();
+        expected.push_back(expected[1]);
+        ASSERT_EQ(readLines(text), expected);
+    }
+
+    TEST_F(SwssRecorderTest, ConvertInvalid)
+    {
+        stringstream in("not a binary recording");
+        stringstream out;
+        ASSERT_FALSE(SwssRecorder::convertToText(in, out));
+    }
+
+    TEST_F(SwssRecorderTest, DropWhenFull)
+    {
+        const size_t count = 10000;
+
+        SwssRecorder recorder;
+        ASSERT_TRUE(recorder.start(file, SwssRecorder::Format::TEXT, 4));
+        for (size_t i = 0; i < count; i++)
+        {
+            recorder.record("ROUTE_TABLE:", route);
+        }
+        recorder.stop();
+
+        ASSERT_EQ(recorder.getRecorded() + recorder.getDropped(), count);
+
+        /* Every record is either in the file or counted in a drop marker */
+        ifstream in(file);
+        uint64_t recorded = 0, dropped = 0;
+        for (auto &line : readLines(in))
+        {
+            uint64_t n;
+            if (sscanf(line.c_str(), "recording dropped %lu records", &n) == 1)
+            {
+                dropped += n;
+            }
+            else
+            {
+                recorded++;
+            }
+        }
+        ASSERT_EQ(recorded, recorder.getRecorded());
+        ASSERT_EQ(dropped, recorder.getDropped());
+    }
+
+    TEST_F(SwssRecorderTest, NotStarted)
+    {
+        SwssRecorder recorder;
+        recordAll(recorder);
+        ASSERT_EQ(recorder.getRecorded(), 0);
+        ASSERT_EQ(recorder.getDropped(), 0);
+    }
+}
@@ -0,0 +1,100 @@
+#include "ut_helper.h"
+#include "mock_table.h"
+
+namespace warmrestartassist_test
+{
+    using namespace std;
+
+    struct AppRestartAssistTest : public ::testing::Test
+    {
+        const string table = "NEIGH_TABLE";
+        const string key = "Vlan1000:192.168.0.2";
+
+        vector<FieldValueTuple> neigh = { { "neigh", "00:00:00:00:00:02" }, { "family", "IPv4" } };
+
+        shared_ptr<swss::DBConnector> m_app_db;
+        shared_ptr<swss::RedisPipeline> m_pipeline;
+        shared_ptr<AppRestartAssist> m_assist;
+
+        virtual void SetUp() override
+        {
+            ::testing_db::reset();
+
+            m_app_db = make_shared<swss::DBConnector>("APPL_DB", 0);
+            m_pipeline = make_shared<swss::RedisPipeline>(m_app_db.get());
+            m_assist = make_shared<AppRestartAssist>(m_pipeline.get(), "neighsyncd", "swss");
+        }
+
+        virtual void TearDown() override
+        {
+            m_assist.reset();
+            m_pipeline.reset();
+            m_app_db.reset();
+
+            ::testing_db::reset();
+        }
+
+        AppRestartAssist::cache_state_t getState(const string &key)
+        {
+            return Portal::AppRestartAssistInternal::getState(m_assist.get(), table, key);
+        }
+    };
+
+    TEST_F(AppRestartAssistTest, HashIgnoresFieldOrder)
+    {
+        vector<FieldValueTuple> reordered = { neigh[1], neigh[0] };
+        ASSERT_EQ(AppRestartAssist::hashFieldValues(neigh), AppRestartAssist::hashFieldValues(reordered));
+
+        ASSERT_NE(AppRestartAssist::hashFieldValues(neigh), AppRestartAssist::hashFieldValues({ neigh[0] }));
+        ASSERT_NE(AppRestartAssist::hashFieldValues(neigh),
+                  AppRestartAssist::hashFieldValues({ { "neigh", "IPv4" }, { "family", "00:00:00:00:00:02" } }));
+        ASSERT_NE(AppRestartAssist::hashFieldValues({ { "ab", "c" } }),
+                  AppRestartAssist::hashFieldValues({ { "a", "bc" } }));
+    }
+
+    TEST_F(AppRestartAssistTest, SameOnlyOnExactMatch)
+    {
+        Portal::AppRestartAssistInternal::setDbEntry(m_assist.get(), table, key, neigh);
+        ASSERT_EQ(getState(key), AppRestartAssist::STALE);
+
+        // The same field/values in another order
+        m_assist->insertToMap(table, key, { neigh[1], neigh[0] }, false);
+        ASSERT_EQ(getState(key), AppRestartAssist::SAME);
+        ASSERT_TRUE(Portal::AppRestartAssistInternal::getFieldValues(m_assist.get(), table, key).empty());
+
+        // A subset of the field/values in appDB is written again
+        m_assist->insertToMap(table, key, { neigh[0] }, false);
+        ASSERT_EQ(getState(key), AppRestartAssist::NEW);
+        ASSERT_EQ(Portal::AppRestartAssistInternal::getFieldValues(m_assist.get(), table, key).size(), 1);
+
+        // Back to the value in appDB
+        m_assist->insertToMap(table, key, neigh, false);
+        ASSERT_EQ(getState(key), AppRestartAssist::SAME);
+    }
+
+    TEST_F(AppRestartAssistTest, NewReceivedTwiceStaysNew)
+    {
+        m_assist->insertToMap(table, key, neigh, false);
+        ASSERT_EQ(getState(key), AppRestartAssist::NEW);
+
+        // Not in appDB, so it still has to be written
+        m_assist->insertToMap(table, key, neigh, false);
+        ASSERT_EQ(getState(key), AppRestartAssist::NEW);
+
+        auto &fv = Portal::AppRestartAssistInternal::getFieldValues(m_assist.get(), table, key);
+        ASSERT_EQ(fv.size(), 2);
+        ASSERT_EQ(fvValue(fv[0]), "00:00:00:00:00:02");
+    }
+
+    TEST_F(AppRestartAssistTest, Delete)
+    {
+        Portal::AppRestartAssistInternal::setDbEntry(m_assist.get(), table, key, neigh);
+
+        m_assist->insertToMap(table, key, {}, true);
+        ASSERT_EQ(getState(key), AppRestartAssist::DELETE);
+
+        // Deleting an entry which isn't cached is a no-op
+        m_assist->insertToMap(table, "Vlan1000:192.168.0.3", {}, true);
+        ASSERT_FALSE(Portal::AppRestartAssistInternal::isCached(m_assist.get(), table, "Vlan1000:192.168.0.3"));
+    }
+}
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from dvslib.dvs_benchmark import BenchmarkResults, ConvergenceBenchmark
+
+
+# Number of entries injected by each benchmark, before --benchmark-scale is applied
+NUM_ROUTES = 100000
+NUM_NEIGHBORS = 10000
+NUM_FDBS = 32768
+
+# Time allowed for convergence, on top of a fixed minimum
+TIMEOUT_PER_ENTRY = 0.01
+MIN_TIMEOUT = 60
+
+# Skip at collection time, so that no dvs is started for the skipped benchmarks
+pytestmark = pytest.mark.skipif("not config.getoption('--benchmark')",
+                                reason="scale benchmarks only run with --benchmark")
+
+
+@pytest.fixture(scope="module")
+def results(request):
+    metadata = {
+        "imgname": request.config.getoption("--imgname"),
+        "scale": request.config.getoption("--benchmark-scale"),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    results = BenchmarkResults(request.config.getoption("--benchmark-results"), metadata)
+    yield results
+    results.save()
+
+
+@pytest.fixture(scope="module")
+def scale(request):
+    return request.config.getoption("--benchmark-scale")
+
+
+def scaled(count, scale):
+    return max(int(count * scale), 1)
+
+
+def timeout(count):
+    return MIN_TIMEOUT + count * TIMEOUT_PER_ENTRY
+
+
+def run_benchmark(results, name, benchmark, entries):
+    result = benchmark.add(entries, timeout(len(entries)))
+    results.add(name, result)
+    assert result["converged"] == len(entries)
+
+    result = benchmark.remove(entries, timeout(len(entries)))
+    results.add(name, result)
+    assert result["converged"] == len(entries)
+
+
+class TestScale(object):
+    def test_RouteScale(self, dvs, testlog, results, scale):
+        dvs.setup_db()
+
+        dvs.set_interface_status("Ethernet0", "up")
+        dvs.add_ip_address("Ethernet0", "10.0.0.0/31")
+        dvs.add_neighbor("Ethernet0", "10.0.0.1", "00:00:00:00:00:01")
+
+        try:
+            entries = []
+            for i in range(scaled(NUM_ROUTES, scale)):
+                prefix = "100.%d.%d.%d/32" % ((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+                entries.append((prefix, prefix, [("nexthop", "10.0.0.1"), ("ifname", "Ethernet0")]))
+
+            benchmark = ConvergenceBenchmark(dvs, "ROUTE_TABLE", "SAI_OBJECT_TYPE_ROUTE_ENTRY",
+                                             lambda fields: fields["dest"])
+            run_benchmark(results, "route", benchmark, entries)
+        finally:
+            dvs.remove_neighbor("Ethernet0", "10.0.0.1")
+            dvs.remove_ip_address("Ethernet0", "10.0.0.0/31")
+            dvs.set_interface_status("Ethernet0", "down")
+
+    def test_NeighborScale(self, dvs, testlog, results, scale):
+        dvs.setup_db()
+
+        dvs.set_interface_status("Ethernet4", "up")
+        dvs.add_ip_address("Ethernet4", "10.1.0.0/16")
+
+        try:
+            entries = []
+            for i in range(2, scaled(NUM_NEIGHBORS, scale) + 2):
+                ip = "10.1.%d.%d" % ((i >> 8) & 0xff, i & 0xff)
+                mac = "00:01:00:00:%02x:%02x" % ((i >> 8) & 0xff, i & 0xff)
+                entries.append((ip, "Ethernet4:" + ip, [("neigh", mac), ("family", "IPv4")]))
+
+            benchmark = ConvergenceBenchmark(dvs, "NEIGH_TABLE", "SAI_OBJECT_TYPE_NEIGHBOR_ENTRY",
+                                             lambda fields: fields["ip"])
+            run_benchmark(results, "neighbor", benchmark, entries)
+        finally:
+            dvs.remove_ip_address("Ethernet4", "10.1.0.0/16")
+            dvs.set_interface_status("Ethernet4", "down")
+
+    def test_FdbScale(self, dvs, testlog, results, scale):
+        dvs.setup_db()
+
+        dvs.create_vlan("2")
+        dvs.create_vlan_member("2", "Ethernet8")
+        dvs.set_interface_status("Ethernet8", "up")
+
+        try:
+            entries = []
+            for i in range(scaled(NUM_FDBS, scale)):
+                mac = "52:54:00:%02X:%02X:%02X" % ((i >> 16) & 0xff, (i >> 8) & 0xff, i & 0xff)
+                entries.append((mac, "Vlan2:" + mac.replace(":", "-"),
+                                [("port", "Ethernet8"), ("type", "dynamic")]))
+
+            benchmark = ConvergenceBenchmark(dvs, "FDB_TABLE", "SAI_OBJECT_TYPE_FDB_ENTRY",
+                                             lambda fields: fields["mac"])
+            run_benchmark(results, "fdb", benchmark, entries)
+        finally:
+            dvs.set_interface_status("Ethernet8", "down")
+            dvs.remove_vlan_member("2", "Ethernet8")
+            dvs.remove_vlan("2")
@@ -0,0 +1,102 @@
+import argparse
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "swssconfig"))
+import swssrec_analyzer as analyzer
+
+
+SWSS_REC = [
+    "2020-05-13.10:20:34.000001|recording started",
+    "2020-05-13.10:20:34.000010|VLAN|Vlan1000|SET|vlanid:1000",
+    "2020-05-13.10:20:34.000020|VLAN_MEMBER|Vlan1000|Ethernet0|SET|tagging_mode:untagged",
+    "2020-05-13.10:20:34.000030|INTERFACE|Ethernet4|10.0.0.1/24|SET",
+    "2020-05-13.10:20:35.000000|ROUTE_TABLE:10.1.0.0/24|SET|nexthop:10.0.0.2|ifname:Ethernet4",
+    "2020-05-13.10:20:35.100000|NEIGH_TABLE:Vlan1000:192.168.0.2|SET|neigh:00:00:00:00:00:02|family:IPv4",
+    "2020-05-13.10:20:36.000000|VLAN_MEMBER|Vlan1000|Ethernet0|DEL",
+]
+
+SAIREDIS_REC = [
+    "2020-05-13.10:20:35.050000|c|SAI_OBJECT_TYPE_ROUTE_ENTRY:"
+    "{\"dest\":\"10.1.0.0/24\",\"switch_id\":\"oid:0x21000000000000\",\"vr\":\"oid:0x3000000000022\"}"
+    "|SAI_ROUTE_ENTRY_ATTR_NEXT_HOP_ID=oid:0x40000000005c6",
+    "2020-05-13.10:20:35.300000|c|SAI_OBJECT_TYPE_NEIGHBOR_ENTRY:"
+    "{\"ip\":\"192.168.0.2\",\"rif\":\"oid:0x6000000000598\",\"switch_id\":\"oid:0x21000000000000\"}"
+    "|SAI_NEIGHBOR_ENTRY_ATTR_DST_MAC_ADDRESS=00:00:00:00:00:02",
+]
+
+
+@pytest.fixture
+def recordings(tmpdir):
+    tmpdir.join("swss.rec").write("\n".join(SWSS_REC) + "\n")
+    tmpdir.join("sairedis.rec").write("\n".join(SAIREDIS_REC) + "\n")
+
+    index = analyzer.open_index(argparse.Namespace(dir=str(tmpdir), index=None))
+    yield index
+    index.close()
+
+
+def history(index, capsys, key):
+    analyzer.history(index, key)
+    return [line.split("|", 2)[1] for line in capsys.readouterr().out.splitlines()]
+
+
+class TestSwssRecAnalyzer(object):
+    def test_ParseSwssLine(self):
+        assert analyzer.parse_swss_line(b"ts|ROUTE_TABLE:10.1.0.0/24|SET|nexthop:10.0.0.2") == \
+            (b"ROUTE_TABLE", b"10.1.0.0/24")
+        assert analyzer.parse_swss_line(b"ts|VLAN|Vlan1000|SET|vlanid:1000") == (b"VLAN", b"Vlan1000")
+        assert analyzer.parse_swss_line(b"ts|VLAN_MEMBER|Vlan1000|Ethernet0|SET|tagging_mode:untagged") == \
+            (b"VLAN_MEMBER", b"Vlan1000|Ethernet0")
+        assert analyzer.parse_swss_line(b"ts|BUFFER_PG|Ethernet0|3-4|DEL") == (b"BUFFER_PG", b"Ethernet0|3-4")
+        assert analyzer.parse_swss_line(b"ts|recording started") is None
+
+    def test_History(self, recordings, capsys):
+        assert history(recordings, capsys, "Vlan1000|Ethernet0") == ["VLAN_MEMBER", "VLAN_MEMBER"]
+        assert history(recordings, capsys, "Ethernet4|10.0.0.1/24") == ["INTERFACE"]
+
+        # Either form of the key gives the APPL_DB and the ASIC_DB operations
+        expected = ["NEIGH_TABLE:Vlan1000:192.168.0.2", "c"]
+        assert history(recordings, capsys, "Vlan1000:192.168.0.2") == expected
+        assert history(recordings, capsys, "192.168.0.2") == expected
+        assert history(recordings, capsys, "10.1.0.0/24") == ["ROUTE_TABLE:10.1.0.0/24", "c"]
+
+    def test_Rate(self, recordings, capsys):
+        analyzer.rate(recordings)
+        rates = capsys.readouterr().out.splitlines()
+
+        assert "VLAN_MEMBER 2020-05-13.10:20:34 1" in rates
+        assert "VLAN_MEMBER 2020-05-13.10:20:36 1" in rates
+        assert "INTERFACE 2020-05-13.10:20:34 1" in rates
+        assert "SAI_OBJECT_TYPE_NEIGHBOR_ENTRY 2020-05-13.10:20:35 1" in rates
+
+    def test_Gaps(self, recordings, capsys):
+        analyzer.gaps(recordings, 10)
+        gaps = capsys.readouterr().out.splitlines()
+
+        assert gaps == [
+            "200.000 ms 2020-05-13.10:20:35.100000 NEIGH_TABLE:Vlan1000:192.168.0.2 -> SAI_OBJECT_TYPE_NEIGHBOR_ENTRY",
+            "50.000 ms 2020-05-13.10:20:35.000000 ROUTE_TABLE:10.1.0.0/24 -> SAI_OBJECT_TYPE_ROUTE_ENTRY",
+        ]
+
+    def test_BinaryRecording(self, tmpdir, monkeypatch):
+        # Converted by a stand-in for swssrec2text, which copies the text recording
+        converter = tmpdir.join("swssrec2text")
+        converter.write("#!/bin/sh\ncat \"$1.txt\"\n")
+        converter.chmod(0o755)
+        monkeypatch.setattr(analyzer, "SWSSREC2TEXT", str(converter))
+
+        tmpdir.join("swss.rec.bin.1").write("binary")
+        tmpdir.join("swss.rec.bin.1.txt").write("\n".join(SWSS_REC) + "\n")
+        tmpdir.join("swss.rec").write("")
+
+        files = analyzer.find_recordings(str(tmpdir))
+        assert [os.path.basename(path) for _, path in files] == [".swss.rec.bin.1.txt", "swss.rec"]
+
+        index = analyzer.open_index(argparse.Namespace(dir=str(tmpdir), index=None))
+        try:
+            assert index.key_count == 6
+        finally:
+            index.close()
@@ -1,7 +1,10 @@
 #include <string>
 #include <algorithm>
+#include <system_error>
+#include <hiredis/hiredis.h>
 #include "logger.h"
 #include "schema.h"
+#include "redisreply.h"
 #include "warm_restart.h"
 #include "warmRestartAssist.h"
 
@@ -74,10 +77,12 @@ AppRestartAssist::~AppRestartAssist()
     }
 }
 
+/*
+ * The application table is only cleared here, reconcile() writes the changes on
+ * the pipeline of this class so that they are flushed once per table.
+ */
 void AppRestartAssist::registerAppTable(const std::string &tableName, ProducerStateTable *psTable)
 {
-    m_psTables[tableName]  = psTable;
-
     // Clear the producerstate table to make sure no pending data for the AppTable
     psTable->clear();
     m_appTables[tableName] = new Table(m_pipeLine, tableName, false);
@@ -94,121 +99,202 @@ string AppRestartAssist::joinVectorString(const vector<FieldValueTuple> &fv)
     return s;
 }
 
-// Set the cache entry state
-void AppRestartAssist::setCacheEntryState(std::vector<FieldValueTuple> &fvVector,
-    cache_state_t state)
+// FNV-1a, continuing from hash
+static uint64_t hashBytes(uint64_t hash, const string &s)
 {
-    fvVector.back().second = cacheStateMap.at(state);
+    for (unsigned char c : s)
+    {
+        hash ^= c;
+        hash *= 0x100000001b3ULL;
+    }
+    return hash;
 }
 
-// Get the cache entry state
-AppRestartAssist::cache_state_t AppRestartAssist::getCacheEntryState(const std::vector<FieldValueTuple> &fvVector)
+// splitmix64 finalizer, spreads the hash of each field/value over the 64 bits
+static uint64_t mixHash(uint64_t hash)
 {
-    for (auto &iter : cacheStateMap)
+    hash ^= hash >> 30;
+    hash *= 0xbf58476d1ce4e5b9ULL;
+    hash ^= hash >> 27;
+    hash *= 0x94d049bb133111ebULL;
+    hash ^= hash >> 31;
+    return hash;
+}
+
+uint64_t AppRestartAssist::hashFieldValues(const vector<FieldValueTuple> &fv)
+{
+    // The field/value hashes are summed, so the order of the field/values doesn't matter
+    uint64_t hash = fv.size();
+    for (const auto &temps : fv)
     {
-        if (fvVector.back().second == iter.second)
-        {
-            return iter.first;
-        }
+        uint64_t h = hashBytes(0xcbf29ce484222325ULL, fvField(temps));
+        h = hashBytes(h ^ 0xff, fvValue(temps));
+        hash += mixHash(h);
     }
-    throw std::logic_error("cache entry state is invalid");
+    return hash;
 }
 
-// Read table(s) from APPDB and append stale flag then insert to cachemap
+// Read table(s) from APPDB as STALE entries of the cachemap
 void AppRestartAssist::readTablesToMap()
 {
-    vector<string> keys;
+    // The tables are read on the connection of the pipeline, which must not have pending replies
+    m_pipeLine->flush();
 
     for (auto it = m_appTables.begin(); it != m_appTables.end(); it++)
     {
-        (it->second)->getKeys(keys);
-        FieldValueTuple state(CACHE_STATE_FIELD, "");
+        readTableToMap(it->first, it->second);
+        WarmStart::setWarmStartState(m_appName, WarmStart::RESTORED);
+        SWSS_LOG_NOTICE("Restored %zu entries of appDB table %s to internal cache map",
+                appTableCacheMap[it->first].size(), (it->first).c_str());
+    }
+    return;
+}
+
+void AppRestartAssist::readTableToMap(const string &tableName, Table *table)
+{
+    DBConnector *db = m_pipeLine->getDBConnector();
+    string prefix = table->getTableName() + table->getTableNameSeparator();
+    string cursor = "0";
+    vector<string> keys;
 
-        for (const auto &key: keys)
+    auto &cacheMap = appTableCacheMap[tableName];
+
+    do
+    {
+        RedisCommand scan;
+        scan.format("SCAN %s MATCH %s* COUNT %d", cursor.c_str(), prefix.c_str(), SCAN_COUNT);
+        RedisReply r(db, scan, REDIS_REPLY_ARRAY);
+
+        redisReply *reply = r.getContext();
+        if (reply->elements != 2)
         {
-            vector<FieldValueTuple> fv;
+            throw system_error(make_error_code(errc::io_error), "Unexpected SCAN reply");
+        }
+        cursor = string(reply->element[0]->str, reply->element[0]->len);
 
-                // if the fieldvalue is empty, skip
-            if (!(it->second)->get(key, fv))
-            {
-                continue;
-            }
+        redisReply *found = reply->element[1];
+        for (size_t i = 0; i < found->elements; i++)
+        {
+            keys.emplace_back(found->element[i]->str, found->element[i]->len);
+        }
 
-            fv.push_back(state);
-            setCacheEntryState(fv, STALE);
+        if (keys.size() >= READ_BATCH_SIZE || cursor == "0")
+        {
+            readEntries(tableName, keys, prefix.length());
+            keys.clear();
+        }
+    } while (cursor != "0");
 
-            string s = joinVectorString(fv);
+    // SCAN may return a key more than once, which only overwrites the entry
+    SWSS_LOG_INFO("Read %zu entries from %s", cacheMap.size(), tableName.c_str());
+}
 
-            SWSS_LOG_INFO("write to cachemap: %s, key: %s, "
-                   "%s", (it->first).c_str(), key.c_str(), s.c_str());
+// Read the entries of keys with pipelined HGETALL, and insert them to the cachemap
+void AppRestartAssist::readEntries(const string &tableName, const vector<string> &keys, size_t prefixLen)
+{
+    redisContext *ctx = m_pipeLine->getDBConnector()->getContext();
+    auto &cacheMap = appTableCacheMap[tableName];
 
-            // insert to the cache map
-            appTableCacheMap[it->first][key] = fv;
+    for (const auto &key : keys)
+    {
+        RedisCommand hgetall;
+        hgetall.format("HGETALL %s", key.c_str());
+        if (redisAppendFormattedCommand(ctx, hgetall.c_str(), hgetall.length()) != REDIS_OK)
+        {
+            throw system_error(make_error_code(errc::io_error), "Failed to send HGETALL");
         }
-        WarmStart::setWarmStartState(m_appName, WarmStart::RESTORED);
-        SWSS_LOG_NOTICE("Restored appDB table to %s internal cache map", (it->first).c_str());
     }
-    return;
+
+    vector<FieldValueTuple> fv;
+    for (const auto &key : keys)
+    {
+        redisReply *reply = NULL;
+        if (redisGetReply(ctx, (void **)&reply) != REDIS_OK || reply == NULL)
+        {
+            throw system_error(make_error_code(errc::io_error), "Failed to read HGETALL reply");
+        }
+        RedisReply r(reply);
+
+        // if the fieldvalue is empty, skip
+        if (reply->type != REDIS_REPLY_ARRAY || reply->elements == 0)
+        {
+            continue;
+        }
+
+        fv.clear();
+        for (size_t i = 0; i + 1 < reply->elements; i += 2)
+        {
+            fv.emplace_back(string(reply->element[i]->str, reply->element[i]->len),
+                            string(reply->element[i + 1]->str, reply->element[i + 1]->len));
+        }
+
+        CacheEntry &entry = cacheMap[key.substr(prefixLen)];
+        entry.state = STALE;
+        entry.inDb = true;
+        entry.dbHash = hashFieldValues(fv);
+        entry.fv.clear();
+    }
 }
- 
+
 /*
  * Check and insert to CacheMap Logic:
  * if delete_key:
  *  mark the entry as "DELETE";
  * else:
  *  if key exist {
- *    if it has different value: update with "NEW" flag.
- *    if same value:  mark it as "SAME";
+ *    if appDB has a different value, or doesn't have it: update with "NEW" flag.
+ *    if same value as appDB:  mark it as "SAME";
  *  } else {
  *    insert with "NEW" flag.
  *   }
  */
 void AppRestartAssist::insertToMap(string tableName, string key, vector<FieldValueTuple> fvVector, bool delete_key)
 {
-    SWSS_LOG_INFO("Received message %s, key: %s, "
-            "%s, delete = %d", tableName.c_str(), key.c_str(), joinVectorString(fvVector).c_str(), delete_key);
+    SWSS_LOG_INFO("Received message %s, key: %s, delete = %d",
+            tableName.c_str(), key.c_str(), delete_key);
 
-    auto found = appTableCacheMap[tableName].find(key);
+    auto &cacheMap = appTableCacheMap[tableName];
+    auto found = cacheMap.find(key);
 
     if (delete_key)
     {
         SWSS_LOG_NOTICE("%s, delete key: %s, ", tableName.c_str(), key.c_str());
         /* mark it as DELETE if exist, otherwise, no-op */
-        if (found != appTableCacheMap[tableName].end())
+        if (found != cacheMap.end())
         {
-            setCacheEntryState(found->second, DELETE);
+            found->second.state = DELETE;
+            found->second.fv.clear();
         }
     }
-    else if (found != appTableCacheMap[tableName].end())
+    else if (found != cacheMap.end())
     {
-        // check only the original vector range (exclude cache-state field/value)
-        if(! contains(found->second, fvVector))
+        CacheEntry &entry = found->second;
+        if (entry.inDb && entry.dbHash == hashFieldValues(fvVector))
         {
-            SWSS_LOG_NOTICE("%s, found key: %s, new value ", tableName.c_str(), key.c_str());
-
-            FieldValueTuple state(CACHE_STATE_FIELD, "");
-            fvVector.push_back(state);
+            SWSS_LOG_INFO("%s, found key: %s, same value", tableName.c_str(), key.c_str());
 
-            // mark as NEW flag
-            setCacheEntryState(fvVector, NEW);
-            appTableCacheMap[tableName][key] = fvVector;
+            // mark as SAME flag
+            entry.state = SAME;
+            entry.fv.clear();
         }
         else
         {
-            SWSS_LOG_INFO("%s, found key: %s, same value", tableName.c_str(), key.c_str());
+            SWSS_LOG_NOTICE("%s, found key: %s, new value ", tableName.c_str(), key.c_str());
 
-            // mark as SAME flag
-            setCacheEntryState(found->second, SAME);
+            // mark as NEW flag
+            entry.state = NEW;
+            entry.fv = move(fvVector);
         }
     }
     else
     {
         // not found, mark the entry as NEW and insert to map
         SWSS_LOG_NOTICE("%s, not found key: %s, new", tableName.c_str(), key.c_str());
-        FieldValueTuple state(CACHE_STATE_FIELD, "");
-        fvVector.push_back(state);
-        setCacheEntryState(fvVector, NEW);
-        appTableCacheMap[tableName][key] = fvVector;
+        CacheEntry &entry = cacheMap[key];
+        entry.state = NEW;
+        entry.inDb = false;
+        entry.dbHash = 0;
+        entry.fv = move(fvVector);
     }
     return;
 }
@@ -217,9 +303,10 @@ void AppRestartAssist::insertToMap(string tableName, string key, vector<FieldVal
  * Reconcile logic:
  *  iterate throught the cache map
  *  if the entry has "SAME" flag, do nothing
- *  if has "STALE/DELETE" flag, delete it from appDB.
+ *  if has "STALE/DELETE" flag, delete it from appDB if it is there.
  *  else if "NEW" flag,  add it to appDB
  *  else, throw (should never happen)
+ * The changes are written in pipelined batches, and flushed at the end.
  */
 void AppRestartAssist::reconcile()
 {
@@ -229,39 +316,53 @@ void AppRestartAssist::reconcile()
     for (auto tableIter = appTableCacheMap.begin(); tableIter != appTableCacheMap.end(); ++tableIter)
     {
         tableName = tableIter->first;
+
+        // Same table as the application's one, but buffered in the pipeline
+        ProducerStateTable psTable(m_pipeLine, tableName, true);
+        size_t same = 0, added = 0, deleted = 0;
+
         for (auto it = (tableIter->second).begin(); it != (tableIter->second).end(); ++it)
         {
-            string s = joinVectorString(it->second);
-            auto state = getCacheEntryState(it->second);
+            auto state = it->second.state;
 
             if (state == SAME)
             {
-                SWSS_LOG_INFO("%s SAME, key: %s, %s",
-                        tableName.c_str(), it->first.c_str(), s.c_str());
+                same++;
                 continue;
             }
             else if (state == STALE || state == DELETE)
             {
-                SWSS_LOG_NOTICE("%s STALE/DELETE, key: %s, %s",
-                        tableName.c_str(), it->first.c_str(), s.c_str());
+                if (!it->second.inDb)
+                {
+                    continue;
+                }
+
+                SWSS_LOG_NOTICE("%s %s, key: %s", tableName.c_str(),
+                        cacheStateMap.at(state).c_str(), it->first.c_str());
 
                 //delete from appDB
-                m_psTables[tableName]->del(it->first);
+                psTable.del(it->first);
+                deleted++;
             }
             else if (state == NEW)
             {
-                SWSS_LOG_NOTICE("%s NEW, key: %s, %s",
-                        tableName.c_str(), it->first.c_str(), s.c_str());
+                SWSS_LOG_NOTICE("%s NEW, key: %s, %s", tableName.c_str(),
+                        it->first.c_str(), joinVectorString(it->second.fv).c_str());
 
-                //add to appDB, exclude the state
-                it->second.pop_back();
-                m_psTables[tableName]->set(it->first, it->second);
+                //add to appDB
+                psTable.set(it->first, it->second.fv);
+                added++;
             }
             else
             {
                 throw std::logic_error("cache entry state is invalid");
             }
         }
+        m_pipeLine->flush();
+
+        SWSS_LOG_NOTICE("%s reconciled: %zu same, %zu new, %zu deleted",
+                tableName.c_str(), same, added, deleted);
+
         // reconcile finished, clear the map, mark the warmstart state
         appTableCacheMap[tableName].clear();
     }
@@ -294,18 +395,3 @@ bool AppRestartAssist::checkReconcileTimer(Selectable *s)
     }
     return false;
 }
-
-// check if left vector contains all elements of right vector
-bool AppRestartAssist::contains(const std::vector<FieldValueTuple>& left,
-              const std::vector<FieldValueTuple>& right)
-{
-    for (auto const& rv : right)
-    {
-        if (std::find(left.begin(), left.end(), rv) == left.end())
-        {
-            return false;
-        }
-    }
-
-    return true;
-}
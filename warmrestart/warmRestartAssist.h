@@ -3,6 +3,7 @@
 
 #include <unordered_map>
 #include <string>
+#include <vector>
 #include "dbconnector.h"
 #include "table.h"
 #include "producerstatetable.h"
@@ -38,7 +39,8 @@ namespace swss {
  *      }
  *
  * 5, In the select loop, check if the reconcile timer is expired, if so,
- *    stop timer and call the reconcilation function:
+ *    stop timer and call the reconcilation function, which only writes the
+ *    entries that were added, changed or removed:
  *      Selectable *temps;
  *      s.select(&temps);
  *      if (appClass.getRestartAssist()->isWarmStartInProgress())
@@ -51,7 +53,6 @@ namespace swss {
  *      }
  */
 typedef std::map <std::string, Table *>              Tables;
-typedef std::map <std::string, ProducerStateTable *> ProducerStateTables;
 
 class AppRestartAssist
 {
@@ -87,11 +88,20 @@ public:
     }
     void registerAppTable(const std::string &tableName, ProducerStateTable *psTable);
 
+    /*
+     * Hash of the field/values of an entry, which doesn't depend on their order:
+     * entries with the same field/values in a different order are the same.
+     */
+    static uint64_t hashFieldValues(const std::vector<FieldValueTuple> &fv);
+
 private:
     typedef std::map<cache_state_t, std::string> cache_state_map;
     // Enum to string translation map
     static const cache_state_map cacheStateMap;
-    const std::string CACHE_STATE_FIELD = "cache-state";
+
+    // Number of keys asked to each SCAN, and of HGETALL sent at once
+    static const int SCAN_COUNT = 1000;
+    static const size_t READ_BATCH_SIZE = 1000;
 
     /*
      * Default timer to be 5 seconds
@@ -99,7 +109,19 @@ private:
      * Precedence ascent order: Default -> loading class with value -> configuration
      */
     static const uint32_t DEFAULT_INTERNAL_TIMER_VALUE = 5;
-    typedef std::map<std::string, std::unordered_map<std::string, std::vector<swss::FieldValueTuple>>> AppTableMap;
+
+    /*
+     * Cache entry, with the field/values of the entries compared as a 64 bits hash.
+     * The field/values are only kept for the entries to be written by reconcile().
+     */
+    struct CacheEntry
+    {
+        cache_state_t state;
+        bool inDb;                             // the entry is in appDB
+        uint64_t dbHash;                       // hash of the entry in appDB
+        std::vector<swss::FieldValueTuple> fv; // new field/values, for NEW entries only
+    };
+    typedef std::map<std::string, std::unordered_map<std::string, CacheEntry>> AppTableMap;
 
     // cache map to store temperary application table
     AppTableMap appTableCacheMap;
@@ -108,18 +130,15 @@ private:
     Tables              m_appTables;  // app tables
     std::string         m_dockerName; // docker name of the application
     std::string         m_appName;    // application name
-    ProducerStateTables m_psTables;   // producer state tables
 
     bool m_warmStartInProgress;       // indicate if warm start is in progress
     time_t m_reconcileTimer;          // reconcile timer value
     SelectableTimer m_warmStartTimer; // reconcile timer
 
-    // Set or get cache entry state
     std::string joinVectorString(const std::vector<FieldValueTuple> &fv);
-    void setCacheEntryState(std::vector<FieldValueTuple> &fvVector, cache_state_t state);
-    cache_state_t getCacheEntryState(const std::vector<FieldValueTuple> &fvVector);
-    bool contains(const std::vector<FieldValueTuple>& left,
-                  const std::vector<FieldValueTuple>& right);
+    // Load a table with SCAN, and its entries with pipelined HGETALL
+    void readTableToMap(const std::string &tableName, Table *table);
+    void readEntries(const std::string &tableName, const std::vector<std::string> &keys, size_t prefixLen);
 };
 
 }